@@ -2,18 +2,19 @@
 Backtester - CSV Replay Engine for Performance Analysis
 """
 
-import csv
 import sys
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Any
 import argparse
+import numpy as np
 
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config.strategy import StrategyEngine, RiskManager
 from data.db import SessionLocal, init_db
 from utils.indicators import IndicatorCalculator
+from utils.data_mapper import load_csv_batch
 from utils.logger import get_logger
 
 logger = get_logger()
@@ -41,52 +42,46 @@ class Backtester:
             "profit_factor": 0,
         }
     
-    def load_csv(self) -> List[Dict[str, Any]]:
+    def load_csv(self) -> Dict[str, np.ndarray]:
         """
-        Load OHLCV data from CSV
+        Load OHLCV data from CSV into columnar arrays
         Expected columns: timestamp,open,high,low,close,volume
         """
-        data = []
         try:
-            with open(self.csv_file, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    data.append({
-                        "timestamp": row["timestamp"],
-                        "open": float(row["open"]),
-                        "high": float(row["high"]),
-                        "low": float(row["low"]),
-                        "close": float(row["close"]),
-                        "volume": int(row["volume"])
-                    })
-            logger.info(f"Loaded {len(data)} candles from {self.csv_file}")
+            data = load_csv_batch(self.csv_file)
+            logger.info(f"Loaded {len(data['close'])} candles from {self.csv_file}")
             return data
         except Exception as e:
             logger.error(f"Failed to load CSV: {str(e)}")
-            return []
+            return {}
     
     def run(self) -> Dict[str, Any]:
         """
         Run backtesting on loaded CSV data
         """
         data = self.load_csv()
-        if not data:
+        if not data or not len(data["close"]):
             return self.results
         
         # Separate into M1 and M5 (assuming CSV is M1, aggregate M5)
-        m1_data = data
+        closes = data["close"].tolist()
+        highs = data["high"].tolist()
+        lows = data["low"].tolist()
+        volumes = data["volume"].tolist()
+        timestamps_ms = data["timestamp_ms"].tolist()
         
         print(f"\n{'='*60}")
         print(f"Backtesting {self.csv_file}")
-        print(f"Candles: {len(m1_data)}")
+        print(f"Candles: {len(closes)}")
         print(f"{'='*60}\n")
         
-        for i, candle in enumerate(m1_data):
+        for i, close in enumerate(closes):
             # Prepare market data for strategy
-            m1_closes = [c["close"] for c in m1_data[max(0, i-50):i+1]]
-            m1_highs = [c["high"] for c in m1_data[max(0, i-50):i+1]]
-            m1_lows = [c["low"] for c in m1_data[max(0, i-50):i+1]]
-            m1_volumes = [c["volume"] for c in m1_data[max(0, i-50):i+1]]
+            start = max(0, i-50)
+            m1_closes = closes[start:i+1]
+            m1_highs = highs[start:i+1]
+            m1_lows = lows[start:i+1]
+            m1_volumes = volumes[start:i+1]
             
             market_data = {
                 "m1_closes": m1_closes,
@@ -96,10 +91,10 @@ class Backtester:
                 "m5_highs": m1_highs,
                 "m5_lows": m1_lows,
                 "m1_volumes": m1_volumes,
-                "current_price": candle["close"],
-                "bid": candle["close"] - 0.02,
-                "ask": candle["close"] + 0.02,
-                "timestamp": datetime.fromisoformat(candle["timestamp"])
+                "current_price": close,
+                "bid": close - 0.02,
+                "ask": close + 0.02,
+                "timestamp": datetime.utcfromtimestamp(timestamps_ms[i] / 1000)
             }
             
             # Check if we can trade
@@ -120,48 +115,19 @@ class Backtester:
         return self.results
     
     def _calculate_stats(self) -> None:
-        """Calculate performance statistics"""
-        from data.models import Trade, TradeStatus
+        """Calculate performance statistics (one grouped query, not a row per trade)"""
+        from data.trade_stats import TradeStatistics
         
-        closed_trades = self.db.query(Trade).filter(
-            Trade.status.in_([TradeStatus.CLOSED_LOSE, TradeStatus.CLOSED_WIN])
-        ).all()
+        summary = TradeStatistics().rebuild(self.db).summary()
         
-        self.results["total_trades"] = len(closed_trades)
-        
-        wins = [t for t in closed_trades if t.status == TradeStatus.CLOSED_WIN]
-        losses = [t for t in closed_trades if t.status == TradeStatus.CLOSED_LOSE]
-        
-        self.results["wins"] = len(wins)
-        self.results["losses"] = len(losses)
-        
-        if closed_trades:
-            self.results["win_rate"] = (len(wins) / len(closed_trades)) * 100
-        
-        # Total P/L
-        total_pl = sum(t.virtual_pl_usd or 0 for t in closed_trades)
-        self.results["total_pl_usd"] = total_pl
-        
-        # Total pips
-        total_pips = sum(t.pips_gained or 0 for t in closed_trades)
-        self.results["total_pips"] = total_pips
-        
-        # Profit factor
-        win_pl = sum(t.virtual_pl_usd or 0 for t in wins)
-        loss_pl = sum(abs(t.virtual_pl_usd or 0) for t in losses)
-        self.results["profit_factor"] = win_pl / loss_pl if loss_pl > 0 else 0
-        
-        # Average R/R
-        rr_ratios = []
-        for t in closed_trades:
-            if t.sl_price and t.tp_price:
-                if t.direction.value == "BUY":
-                    rr = (t.tp_price - t.entry_price) / (t.entry_price - t.sl_price)
-                else:
-                    rr = (t.entry_price - t.tp_price) / (t.sl_price - t.entry_price)
-                rr_ratios.append(rr)
-        
-        self.results["avg_rr"] = sum(rr_ratios) / len(rr_ratios) if rr_ratios else 0
+        self.results["total_trades"] = summary["closed"]
+        self.results["wins"] = summary["wins"]
+        self.results["losses"] = summary["losses"]
+        self.results["win_rate"] = summary["win_rate"]
+        self.results["total_pl_usd"] = summary["total_pl_usd"]
+        self.results["total_pips"] = summary["total_pips"]
+        self.results["profit_factor"] = summary["profit_factor"]
+        self.results["avg_rr"] = summary["avg_rr"]
     
     def _print_report(self) -> None:
         """Print backtesting report"""
@@ -0,0 +1,139 @@
+"""
+Ingestion Benchmark - fetch -> normalize -> cache -> signal against the replay stand-in
+
+Runs offline: recorded responses (or synthetic Polygon bars) are served by
+services.replay.ReplayServer on localhost.
+
+Usage:
+    python benchmarks/bench_ingestion.py --requests 2000 --concurrency 8
+    python benchmarks/bench_ingestion.py --recordings data/recordings --latency-ms 40 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.replay import ReplayServer
+from services.rest_poller import RESTPoller
+from config.strategy import StrategyEngine
+
+def synthesize_recordings(directory: Path, bars: int, seed: int = 7) -> None:
+    """Write synthetic Polygon M1/M5 aggregate responses (random walk around 2035)"""
+    rng = random.Random(seed)
+    start = 1700055000
+    with open(directory / "polygon.jsonl", "w") as f:
+        for multiplier in (1, 5):
+            price = 2035.0
+            for i in range(bars):
+                o = price
+                c = o + rng.gauss(0, 0.4)
+                bar = {"t": (start + i * 60 * multiplier) * 1000, "o": round(o, 2), "c": round(c, 2),
+                       "h": round(max(o, c) + abs(rng.gauss(0, 0.2)), 2),
+                       "l": round(min(o, c) - abs(rng.gauss(0, 0.2)), 2), "v": rng.randint(50, 500)}
+                price = c
+                f.write(json.dumps({
+                    "provider": "polygon",
+                    "path": f"/v2/aggs/ticker/C:XAUUSD/range/{multiplier}/minute",
+                    "params": {"limit": 1},
+                    "status": 200,
+                    "body": json.dumps({"status": "OK", "results": [bar]}),
+                    "latency_ms": 0,
+                    "recorded_at": start + i * 60 * multiplier,
+                }) + "\n")
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def run(poller: RESTPoller, strategy: StrategyEngine, requests: int, concurrency: int):
+    latencies = []
+    failures = 0
+    signals = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal failures, signals
+        for _ in counter:
+            started = time.perf_counter()
+            bar = await poller.get_market_data(timeframe="M1")
+            if bar is None:
+                failures += 1
+            else:
+                poller.add_to_cache(bar, "M1")
+                m1 = poller.get_cached_data("M1")
+                analysis = {
+                    "m1_closes": [d["close"] for d in m1],
+                    "m1_highs": [d["high"] for d in m1],
+                    "m1_lows": [d["low"] for d in m1],
+                    "m1_volumes": [d["volume"] for d in m1],
+                    "m5_closes": [d["close"] for d in m1],
+                    "m5_highs": [d["high"] for d in m1],
+                    "m5_lows": [d["low"] for d in m1],
+                    "current_price": m1[-1]["close"],
+                    "bid": m1[-1]["close"] - 0.02,
+                    "ask": m1[-1]["close"] + 0.02,
+                    "timestamp": datetime(2025, 11, 15, 12, 0),
+                }
+                if strategy.generate_signal(analysis):
+                    signals += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, failures, signals, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the market data ingestion path offline")
+    parser.add_argument("--recordings", type=str, default=None, help="Recordings dir (default: synthetic)")
+    parser.add_argument("--bars", type=int, default=1000, help="Synthetic bars per timeframe")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--cache-ttl", type=float, default=0, help="RESTPoller cache TTL (0 = always fetch)")
+    args = parser.parse_args()
+
+    tmp = None
+    recordings = args.recordings
+    if recordings is None:
+        tmp = tempfile.TemporaryDirectory()
+        recordings = tmp.name
+        synthesize_recordings(Path(recordings), args.bars)
+
+    server = ReplayServer(recordings, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          error_rate=args.error_rate, seed=1).start()
+    poller = RESTPoller(mode="replay", replay_base_url=server.url)
+    poller.quote_cache_ttl = args.cache_ttl
+    strategy = StrategyEngine(None)
+
+    try:
+        latencies, failures, signals, elapsed = asyncio.run(run(poller, strategy, args.requests, args.concurrency))
+    finally:
+        server.stop()
+        if tmp is not None:
+            tmp.cleanup()
+
+    print(f"\n{'='*60}")
+    print("INGESTION BENCHMARK (replay)")
+    print(f"{'='*60}")
+    print(f"Requests: {args.requests} | Concurrency: {args.concurrency} | Elapsed: {elapsed:.2f}s")
+    print(f"Throughput: {args.requests / elapsed:.1f} iterations/s")
+    print(f"Latency ms: p50={percentile(latencies, 50):.2f} p95={percentile(latencies, 95):.2f} "
+          f"p99={percentile(latencies, 99):.2f} max={max(latencies):.2f}")
+    print(f"Failures: {failures} | Signals: {signals}")
+    print(f"Server: {server.stats} | Cache: {poller.cache_stats}")
+    print(f"{'='*60}\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Trades Query Benchmark - risk-check and /status queries against a large trade history
+
+Seeds a throwaway SQLite file with N trades spread over the past year, then
+times each query and prints its EXPLAIN QUERY PLAN, once without the trades
+indexes and once after data.db.migrate_db() has created them.
+
+Usage:
+    python benchmarks/bench_trade_queries.py --trades 1000000
+    python benchmarks/bench_trade_queries.py --trades 100000 --runs 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+from data.db import migrate_db
+from data.models import Trade, LIVE_VARIANT
+
+# (name, SQL) - what RiskManager and /status issue per tick / request (live ledger only)
+QUERIES = [
+    ("open_count", "SELECT count(*) FROM trades WHERE variant = :variant AND status = 'OPEN'"),
+    ("trades_today", "SELECT count(*) FROM trades WHERE variant = :variant AND created_at >= :today"),
+    ("daily_loss", "SELECT virtual_pl_usd FROM trades WHERE variant = :variant AND created_at >= :today "
+                   "AND status IN ('CLOSED_LOSE', 'CLOSED_WIN')"),
+    ("status_totals", "SELECT status, count(*), sum(virtual_pl_usd) FROM trades "
+                      "WHERE variant = :variant AND status IN ('CLOSED_LOSE', 'CLOSED_WIN') GROUP BY status"),
+]
+
+def seed(engine, trades: int, open_trades: int = 3, seed_value: int = 11) -> None:
+    """Insert trades created over the last 365 days (all closed but open_trades)"""
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    step = timedelta(days=365) / max(trades, 1)
+    table = Trade.__table__
+    batch = []
+
+    with engine.begin() as conn:
+        for i in range(trades):
+            created = now - timedelta(days=365) + step * i
+            win = rng.random() < 0.55
+            status = "OPEN" if i >= trades - open_trades else ("CLOSED_WIN" if win else "CLOSED_LOSE")
+            entry = 2000 + rng.random() * 100
+            batch.append({
+                "id": str(uuid.uuid4()), "signal_id": str(uuid.uuid4()), "ticker": "XAUUSD",
+                "variant": LIVE_VARIANT,
+                "direction": "BUY" if rng.random() < 0.5 else "SELL", "entry_price": entry,
+                "sl_price": entry - 0.25, "tp_price": entry + 0.45, "signal_timestamp_utc": created,
+                "status": status, "confidence_score": 80.0, "created_at": created,
+                "virtual_pl_usd": None if status == "OPEN" else (0.45 if win else -0.25),
+            })
+            if len(batch) >= 50000:
+                conn.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(table.insert(), batch)
+
+def time_query(conn, sql: str, params: dict, runs: int):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+def report(engine, label: str, runs: int) -> None:
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    params = {"today": today, "variant": LIVE_VARIANT}
+    print(f"\n--- {label} ---")
+    with engine.connect() as conn:
+        for name, sql in QUERIES:
+            p50, p99 = time_query(conn, sql, params, runs)
+            plan = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params).fetchall()
+            print(f"{name:<14} p50={p50:9.3f}ms p99={p99:9.3f}ms")
+            for row in plan:
+                print(f"{'':<14} plan: {row[-1]}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark trades table query paths")
+    parser.add_argument("--trades", type=int, default=1000000)
+    parser.add_argument("--runs", type=int, default=100)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        # Table without its indexes, like a bot.db created before they existed
+        Trade.__table__.create(engine)
+        for index in Trade.__table__.indexes:
+            index.drop(engine, checkfirst=True)
+
+        started = time.perf_counter()
+        seed(engine, args.trades)
+        print(f"Seeded {args.trades} trades in {time.perf_counter() - started:.1f}s ({path})")
+
+        report(engine, "without indexes", args.runs)
+
+        started = time.perf_counter()
+        migrate_db(engine)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        print(f"\nmigrate_db() built indexes in {time.perf_counter() - started:.1f}s")
+
+        report(engine, "with indexes", args.runs)
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ Settings & Environment Variables Manager
 Centralized configuration loading with defaults and validation
 """
 
+import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -89,6 +90,111 @@ GOLDAPI_API_KEY = os.getenv("GOLDAPI_API_KEY", "")
 METALS_API_KEY = os.getenv("METALS_API_KEY", "")
 METALPRICE_API_KEY = os.getenv("METALPRICE_API_KEY", "")
 
+# ========== PROVIDER ENDPOINTS ==========
+# live: real APIs | record: real APIs + save responses | replay: serve saved responses locally
+DATA_PROVIDER_MODE = os.getenv("DATA_PROVIDER_MODE", "live").lower()
+PROVIDER_BASE_URLS = {
+    "polygon": os.getenv("POLYGON_BASE_URL", "https://api.polygon.io"),
+    "finnhub": os.getenv("FINNHUB_BASE_URL", "https://finnhub.io"),
+    "twelvedata": os.getenv("TWELVEDATA_BASE_URL", "https://api.twelvedata.com"),
+}
+RECORDINGS_DIR = os.getenv("RECORDINGS_DIR", str(DATA_DIR / "recordings"))
+REPLAY_BASE_URL = os.getenv("REPLAY_BASE_URL", "http://127.0.0.1:8765")
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", 0))
+REPLAY_JITTER_MS = float(os.getenv("REPLAY_JITTER_MS", 0))
+REPLAY_ERROR_RATE = float(os.getenv("REPLAY_ERROR_RATE", 0))
+REPLAY_ERROR_STATUS = int(os.getenv("REPLAY_ERROR_STATUS", 503))
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", 0))  # 0 = one recorded response per request
+
+# ========== PROVIDER RATE LIMITS ==========
+# Token bucket per provider: burst size, per-minute refill, per-day budget (0 = unlimited)
+PROVIDER_RATE_LIMITS = {
+    "polygon": {
+        "burst": int(os.getenv("POLYGON_RATE_BURST", 5)),
+        "per_minute": int(os.getenv("POLYGON_RATE_PER_MINUTE", 5)),
+        "per_day": int(os.getenv("POLYGON_RATE_PER_DAY", 0)),
+    },
+    "finnhub": {
+        "burst": int(os.getenv("FINNHUB_RATE_BURST", 10)),
+        "per_minute": int(os.getenv("FINNHUB_RATE_PER_MINUTE", 60)),
+        "per_day": int(os.getenv("FINNHUB_RATE_PER_DAY", 0)),
+    },
+    "twelvedata": {
+        "burst": int(os.getenv("TWELVEDATA_RATE_BURST", 8)),
+        "per_minute": int(os.getenv("TWELVEDATA_RATE_PER_MINUTE", 8)),
+        "per_day": int(os.getenv("TWELVEDATA_RATE_PER_DAY", 800)),
+    },
+}
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", 2.0))
+RATE_LIMIT_LOW_PRIORITY_RESERVE = float(os.getenv("RATE_LIMIT_LOW_PRIORITY_RESERVE", 0.5))
+
+# ========== STREAMING ==========
+WS_ENABLED = os.getenv("WS_ENABLED", "false").lower() == "true"
+WS_URL = os.getenv("WS_URL", f"wss://ws.finnhub.io?token={FINNHUB_API_KEY}")
+WS_SYMBOL = os.getenv("WS_SYMBOL", "OANDA:XAU_USD")
+WS_RECONNECT_MIN_SECONDS = float(os.getenv("WS_RECONNECT_MIN_SECONDS", 1.0))
+WS_RECONNECT_MAX_SECONDS = float(os.getenv("WS_RECONNECT_MAX_SECONDS", 60.0))
+
+# ========== SCHEDULER ==========
+SCHEDULER_CLOSE_OFFSET_SECONDS = float(os.getenv("SCHEDULER_CLOSE_OFFSET_SECONDS", 1.0))
+SCHEDULER_MAX_PROVIDER_DELAY_SECONDS = float(os.getenv("SCHEDULER_MAX_PROVIDER_DELAY_SECONDS", 20.0))
+SCHEDULER_LATE_TOLERANCE_SECONDS = float(os.getenv("SCHEDULER_LATE_TOLERANCE_SECONDS", 1.0))
+QUOTE_POLL_INTERVAL_SECONDS = float(os.getenv("QUOTE_POLL_INTERVAL_SECONDS", 5.0))
+
+# ========== PIPELINE ==========
+PIPELINE_BAR_QUEUE_SIZE = int(os.getenv("PIPELINE_BAR_QUEUE_SIZE", 64))  # fetched bars (blocks, never drops)
+PIPELINE_PERSIST_QUEUE_SIZE = int(os.getenv("PIPELINE_PERSIST_QUEUE_SIZE", 256))  # trade writes (blocks)
+PIPELINE_NOTIFY_QUEUE_SIZE = int(os.getenv("PIPELINE_NOTIFY_QUEUE_SIZE", 100))  # notifications (drops oldest)
+
+# ========== PRICE PRECISION ==========
+# Integer tick mode: prices compared and stored as multiples of the symbol tick size
+FIXED_POINT_PRICES = os.getenv("FIXED_POINT_PRICES", "false").lower() == "true"
+SYMBOL_TICK_SIZES = {
+    "XAUUSD": float(os.getenv("XAUUSD_TICK_SIZE", 0.01)),
+    "XAGUSD": 0.001, "XPTUSD": 0.01,
+    "EURUSD": 0.00001, "GBPUSD": 0.00001, "AUDUSD": 0.00001, "NZDUSD": 0.00001,
+    "USDCHF": 0.00001, "USDCAD": 0.00001, "USDJPY": 0.001,
+}
+PIP_SIZE = float(os.getenv("PIP_SIZE", 0.01))  # XAUUSD: 1 pip = 0.01
+SYMBOL_PIP_SIZES = {
+    "XAUUSD": PIP_SIZE, "XAGUSD": 0.01, "XPTUSD": 0.1,
+    "EURUSD": 0.0001, "GBPUSD": 0.0001, "AUDUSD": 0.0001, "NZDUSD": 0.0001,
+    "USDCHF": 0.0001, "USDCAD": 0.0001, "USDJPY": 0.01,
+}
+# Units per standard lot (P/L = price move * contract size * lots, in the quote currency)
+SYMBOL_CONTRACT_SIZES = {
+    "XAUUSD": 100, "XAGUSD": 5000, "XPTUSD": 50,
+    "EURUSD": 100000, "GBPUSD": 100000, "AUDUSD": 100000, "NZDUSD": 100000,
+    "USDCHF": 100000, "USDCAD": 100000, "USDJPY": 100000,
+}
+
+# ========== SYMBOLS ==========
+SYMBOLS = [s.strip().upper() for s in os.getenv("SYMBOLS", "XAUUSD").split(",") if s.strip()]
+SYMBOL_WORKERS = int(os.getenv("SYMBOL_WORKERS", 1))  # processes; 0 = sized from SYMBOLS_PER_WORKER
+SYMBOLS_PER_WORKER = int(os.getenv("SYMBOLS_PER_WORKER", 8))
+
+# ========== TELEGRAM BROADCAST ==========
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+BROADCAST_GLOBAL_RATE = float(os.getenv("BROADCAST_GLOBAL_RATE", 30))  # messages/second across all chats
+BROADCAST_PER_CHAT_INTERVAL_SECONDS = float(os.getenv("BROADCAST_PER_CHAT_INTERVAL_SECONDS", 1.0))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", 30))  # requests in flight
+BROADCAST_QUEUE_SIZE = int(os.getenv("BROADCAST_QUEUE_SIZE", 100))  # pending messages (drops oldest)
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", 3))
+
+# ========== TELEGRAM COMMANDS ==========
+RIWAYAT_PAGE_SIZE = int(os.getenv("RIWAYAT_PAGE_SIZE", 10))  # /riwayat default trades per page
+RIWAYAT_MAX_PAGE_SIZE = int(os.getenv("RIWAYAT_MAX_PAGE_SIZE", 50))
+PERFORMA_DAYS = int(os.getenv("PERFORMA_DAYS", 7))  # daily rows in /performa
+PERFORMA_WEEKS = int(os.getenv("PERFORMA_WEEKS", 4))  # weekly rows in /performa
+# Per-day / per-week statistics kept in memory and in the snapshot (never fewer than /performa shows)
+STATS_DAY_BUCKETS = max(int(os.getenv("STATS_DAY_BUCKETS", 90)), PERFORMA_DAYS)
+STATS_WEEK_BUCKETS = max(int(os.getenv("STATS_WEEK_BUCKETS", 52)), PERFORMA_WEEKS)
+COMMAND_CACHE_SECONDS = float(os.getenv("COMMAND_CACHE_SECONDS", 5))  # rendered replies shared by all users
+
+# ========== SHADOW VARIANTS ==========
+# JSON object: variant name -> strategy parameter overrides, paper-traded on the live feed
+SHADOW_VARIANTS = json.loads(os.getenv("SHADOW_VARIANTS", "{}") or "{}")
+
 # ========== BEHAVIOR ==========
 WS_DISCONNECT_ALERT_SECONDS = int(os.getenv("WS_DISCONNECT_ALERT_SECONDS", 30))
 DRY_RUN_MODE = os.getenv("DRY_RUN_MODE", "false").lower() == "true"
@@ -96,6 +202,26 @@ DRY_RUN_MODE = os.getenv("DRY_RUN_MODE", "false").lower() == "true"
 # ========== DATABASE ==========
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATA_DIR}/bot.db")
 DB_WAL_MODE = os.getenv("DB_WAL_MODE", "true").lower() == "true"
+DB_BUSY_TIMEOUT_SECONDS = float(os.getenv("DB_BUSY_TIMEOUT_SECONDS", 30.0))  # wait on a locked SQLite DB
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", 4))  # read-only connections for HTTP/Telegram
+DB_READ_POOL_OVERFLOW = int(os.getenv("DB_READ_POOL_OVERFLOW", 4))
+DB_READ_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_READ_POOL_TIMEOUT_SECONDS", 10.0))
+BAR_PERSIST_ENABLED = os.getenv("BAR_PERSIST_ENABLED", "true").lower() == "true"
+BAR_PERSIST_BATCH_SIZE = int(os.getenv("BAR_PERSIST_BATCH_SIZE", 50))
+BAR_PERSIST_FLUSH_SECONDS = float(os.getenv("BAR_PERSIST_FLUSH_SECONDS", 5.0))
+BAR_PERSIST_QUEUE_SIZE = int(os.getenv("BAR_PERSIST_QUEUE_SIZE", 10000))
+DB_WRITER_QUEUE_SIZE = int(os.getenv("DB_WRITER_QUEUE_SIZE", 10000))
+DB_WRITER_TRADE_RETRIES = int(os.getenv("DB_WRITER_TRADE_RETRIES", 3))  # re-submits of a trade insert/close whose tick failed
+WARM_START_BARS = int(os.getenv("WARM_START_BARS", 500))  # per timeframe, 0 = cold start
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "true").lower() == "true"
+RETENTION_M1_DAYS = int(os.getenv("RETENTION_M1_DAYS", 14))  # older M1 is rolled into M5
+RETENTION_M5_DAYS = int(os.getenv("RETENTION_M5_DAYS", 90))  # older M5 is rolled into H1
+RETENTION_H1_DAYS = int(os.getenv("RETENTION_H1_DAYS", 0))  # 0 = keep H1 forever
+RETENTION_DELETE_BATCH = int(os.getenv("RETENTION_DELETE_BATCH", 5000))  # rows per delete transaction
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", 3600))
+# UTC hours for vacuum/checkpoint (gold's daily break); Saturdays always qualify
+RETENTION_OFF_SESSION_HOURS = [int(h) for h in os.getenv("RETENTION_OFF_SESSION_HOURS", "21").split(",") if h.strip()]
+RETENTION_VACUUM_PAGES = int(os.getenv("RETENTION_VACUUM_PAGES", 2000))  # pages freed per incremental vacuum
 
 # ========== LOGGING ==========
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -107,6 +233,14 @@ LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
 CHART_CACHE_DIR = str(CHARTS_DIR)
 CHART_TTL_HOURS = int(os.getenv("CHART_TTL_HOURS", 24))
 CHART_DPI = int(os.getenv("CHART_DPI", 300))
+CHART_ENABLED = os.getenv("CHART_ENABLED", "true").lower() == "true"  # attach charts to broadcasts
+CHART_TIMEFRAME = os.getenv("CHART_TIMEFRAME", "M1")
+CHART_BARS = int(os.getenv("CHART_BARS", 120))  # candles per chart
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", 2))  # render processes
+CHART_CACHE_MAX_MB = float(os.getenv("CHART_CACHE_MAX_MB", 200))  # least recently used charts deleted beyond this
+CHART_RENDER_TIMEOUT_SECONDS = float(os.getenv("CHART_RENDER_TIMEOUT_SECONDS", 30))
+# Charts used this recently are never deleted: their paths may still wait in the photo queue
+CHART_EVICT_GRACE_SECONDS = float(os.getenv("CHART_EVICT_GRACE_SECONDS", 300))
 
 # ========== VIRTUAL ACCOUNT ==========
 VIRTUAL_INITIAL_BALANCE = 1000000  # 1 juta IDR representasi
@@ -115,6 +249,8 @@ LOT_SIZE = 0.01  # 0.01 lot untuk modal kecil
 # App settings
 APP_PORT = int(os.getenv("APP_PORT", 8080))
 APP_HOST = os.getenv("APP_HOST", "0.0.0.0")
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", 15))  # idle keep-alive connections
+HTTP_MAX_HEADER_BYTES = int(os.getenv("HTTP_MAX_HEADER_BYTES", 16384))
 
 def print_config():
     """Print active configuration (for debugging)"""
@@ -4,9 +4,10 @@ Multi-timeframe signal generation with risk controls
 """
 
 import os
+from collections import deque
 from datetime import datetime, timedelta
 import json
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Callable
 from sqlalchemy.orm import Session
 from config.settings import (
     EMA_PERIODS_FAST, EMA_PERIODS_MED, EMA_PERIODS_SLOW, EMA_TREND_TIMEFRAME,
@@ -20,28 +21,91 @@ from config.settings import (
     MIN_SIGNAL_CONFIDENCE, SIGNAL_COOLDOWN_SECONDS,
     MAX_TRADES_PER_DAY, DAILY_LOSS_PERCENT, RISK_PER_TRADE_PERCENT,
     MAX_CONCURRENT_TRADES, TRADE_SESSION_FILTER, AVOID_LONDON_OPEN, AVOID_US_MAJOR_NEWS,
-    EVALUATION_MODE, VIRTUAL_INITIAL_BALANCE, LOT_SIZE
+    EVALUATION_MODE, VIRTUAL_INITIAL_BALANCE, LOT_SIZE, FIXED_POINT_PRICES, DB_WRITER_TRADE_RETRIES
 )
 from utils.indicators import IndicatorCalculator
 from utils.logger import get_logger
-from data.models import Trade, TradeStatus, TradeDirection, BotState
+from utils.price import to_ticks, from_ticks, ticks_to_pips, pip_size, pip_value, price_decimals
+from utils.position_book import OpenPositionBook, Position
+from data.trade_stats import risk_reward
+from data.models import Trade, TradeStatus, TradeDirection, BotState, LIVE_VARIANT
 import uuid
 
 logger = get_logger()
 
+# Tunable strategy parameters (settings values); shadow variants override a subset
+STRATEGY_PARAMS = {
+    "EMA_PERIODS_FAST": EMA_PERIODS_FAST,
+    "EMA_PERIODS_MED": EMA_PERIODS_MED,
+    "EMA_PERIODS_SLOW": EMA_PERIODS_SLOW,
+    "RSI_PERIOD": RSI_PERIOD,
+    "RSI_OVERSOLD_LEVEL": RSI_OVERSOLD_LEVEL,
+    "RSI_OVERBOUGHT_LEVEL": RSI_OVERBOUGHT_LEVEL,
+    "STOCH_K_PERIOD": STOCH_K_PERIOD,
+    "STOCH_D_PERIOD": STOCH_D_PERIOD,
+    "STOCH_SMOOTH_K": STOCH_SMOOTH_K,
+    "STOCH_OVERSOLD_LEVEL": STOCH_OVERSOLD_LEVEL,
+    "STOCH_OVERBOUGHT_LEVEL": STOCH_OVERBOUGHT_LEVEL,
+    "ATR_PERIOD": ATR_PERIOD,
+    "SL_ATR_MULTIPLIER": SL_ATR_MULTIPLIER,
+    "DEFAULT_SL_PIPS": DEFAULT_SL_PIPS,
+    "SL_BUFFER_FOR_SPREAD": SL_BUFFER_FOR_SPREAD,
+    "TP_RR_RATIO": TP_RR_RATIO,
+    "VOLUME_THRESHOLD_MULTIPLIER": VOLUME_THRESHOLD_MULTIPLIER,
+    "VOLUME_LOOKBACK_PERIOD": VOLUME_LOOKBACK_PERIOD,
+    "MAX_SPREAD_PIPS": MAX_SPREAD_PIPS,
+    "MIN_SIGNAL_CONFIDENCE": MIN_SIGNAL_CONFIDENCE,
+    "SIGNAL_COOLDOWN_SECONDS": SIGNAL_COOLDOWN_SECONDS,
+}
+
+def strategy_params(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """STRATEGY_PARAMS with overrides applied (unknown names raise ValueError)"""
+    unknown = set(overrides or {}) - set(STRATEGY_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown strategy parameters: {', '.join(sorted(unknown))}")
+    return dict(STRATEGY_PARAMS, **(overrides or {}))
+
 class StrategyEngine:
     """
     Multi-timeframe signal generation engine
     Combines EMA trend, RSI momentum, Stochastic confirmation
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, writer=None, risk_state: Optional["RiskState"] = None,
+                 position_book: Optional[OpenPositionBook] = None, stats=None,
+                 symbol: str = "XAUUSD", params: Optional[Dict[str, Any]] = None,
+                 variant: str = LIVE_VARIANT, calc=None,
+                 on_close: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Args:
+            db: Session used for reads (and for writes when no writer is given)
+            writer: Optional data.db_writer.DBWriter; trade updates are then queued
+                    to it instead of committed inline
+            risk_state: Optional RiskState notified of trade closes
+            position_book: Optional OpenPositionBook; exit checks then run in
+                           memory and the DB is only touched when a trade closes
+            stats: Optional data.trade_stats.TradeStatistics updated on each close
+            symbol: Instrument this engine trades (one engine per symbol)
+            params: Overrides of STRATEGY_PARAMS (shadow variants)
+            variant: Trade ledger this engine manages ("live" or a shadow variant name)
+            calc: Indicator calculator, e.g. a SharedIndicatorCache shared across engines
+            on_close: Optional callback(trade result dict) run after each close
+        """
         self.db = db
-        self.calc = IndicatorCalculator()
+        self.writer = writer
+        self.risk_state = risk_state
+        self.position_book = position_book
+        self.stats = stats
+        self.symbol = symbol
+        self.params = strategy_params(params)
+        self.variant = variant
+        self.calc = calc or IndicatorCalculator()
+        self.on_close = on_close
         self.last_signal_time = {}  # Track cooldown per direction
         self.virtual_balance = VIRTUAL_INITIAL_BALANCE
-        self.trades_today = 0
-        self.daily_loss = 0.0
+        self.pending_close = set()  # trade ids closed but not yet committed by the writer
+        self.failed_opens = deque()  # (trade, attempt) whose insert's writer tick rolled back
+        self.failed_closes = deque()  # (trade id, changes, attempt) whose writer tick rolled back
     
     def generate_signal(self, market_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -50,6 +114,7 @@ class StrategyEngine:
         Returns:
             Signal dict if valid, None otherwise
         """
+        p = self.params
         
         # Get close prices for indicators
         m1_closes = market_data.get("m1_closes", [])
@@ -65,15 +130,15 @@ class StrategyEngine:
         timestamp = market_data.get("timestamp", datetime.utcnow())
         
         # Check minimum data requirements
-        if len(m1_closes) < max(EMA_PERIODS_SLOW, RSI_PERIOD, STOCH_K_PERIOD, ATR_PERIOD):
+        if len(m1_closes) < max(p["EMA_PERIODS_SLOW"], p["RSI_PERIOD"], p["STOCH_K_PERIOD"], p["ATR_PERIOD"]):
             return None
         
         # ===== COMPONENT 1: EMA TREND (40%) =====
-        ema_alignment = self.calc.get_ema_alignment(m5_closes, EMA_PERIODS_FAST, EMA_PERIODS_MED, EMA_PERIODS_SLOW)
+        ema_alignment = self.calc.get_ema_alignment(m5_closes, p["EMA_PERIODS_FAST"], p["EMA_PERIODS_MED"], p["EMA_PERIODS_SLOW"])
         ema_score = 40 if ema_alignment != "NEUTRAL" else 0
         
         # ===== COMPONENT 2: RSI MOMENTUM (25%) =====
-        rsi_vals = self.calc.calculate_rsi(m1_closes, RSI_PERIOD)
+        rsi_vals = self.calc.calculate_rsi(m1_closes, p["RSI_PERIOD"])
         current_rsi = rsi_vals[-1]
         prev_rsi = rsi_vals[-2] if len(rsi_vals) > 1 else current_rsi
         
@@ -81,19 +146,19 @@ class StrategyEngine:
         signal_direction = None
         
         # RSI oversold (buy signal)
-        if self.calc.is_rsi_oversold(current_rsi, RSI_OVERSOLD_LEVEL):
+        if self.calc.is_rsi_oversold(current_rsi, p["RSI_OVERSOLD_LEVEL"]):
             if current_rsi > prev_rsi:  # RSI rising from oversold
                 rsi_score = 25
                 signal_direction = "BUY"
         
         # RSI overbought (sell signal)
-        elif self.calc.is_rsi_overbought(current_rsi, RSI_OVERBOUGHT_LEVEL):
+        elif self.calc.is_rsi_overbought(current_rsi, p["RSI_OVERBOUGHT_LEVEL"]):
             if current_rsi < prev_rsi:  # RSI falling from overbought
                 rsi_score = 25
                 signal_direction = "SELL"
         
         # ===== COMPONENT 3: STOCHASTIC CONFIRMATION (25%) =====
-        stoch_k, stoch_d = self.calc.calculate_stochastic(m1_highs, m1_lows, m1_closes, STOCH_K_PERIOD, STOCH_SMOOTH_K, STOCH_D_PERIOD)
+        stoch_k, stoch_d = self.calc.calculate_stochastic(m1_highs, m1_lows, m1_closes, p["STOCH_K_PERIOD"], p["STOCH_SMOOTH_K"], p["STOCH_D_PERIOD"])
         current_k = stoch_k[-1]
         current_d = stoch_d[-1]
         
@@ -101,19 +166,19 @@ class StrategyEngine:
         stoch_direction = None
         
         # Stochastic buy (K > D, both oversold)
-        if self.calc.is_stoch_oversold(current_k, STOCH_OVERSOLD_LEVEL):
+        if self.calc.is_stoch_oversold(current_k, p["STOCH_OVERSOLD_LEVEL"]):
             if current_k > current_d:  # K crosses above D
                 stoch_score = 25
                 stoch_direction = "BUY"
         
         # Stochastic sell (K < D, both overbought)
-        elif self.calc.is_stoch_overbought(current_k, STOCH_OVERBOUGHT_LEVEL):
+        elif self.calc.is_stoch_overbought(current_k, p["STOCH_OVERBOUGHT_LEVEL"]):
             if current_k < current_d:  # K crosses below D
                 stoch_score = 25
                 stoch_direction = "SELL"
         
         # ===== COMPONENT 4: VOLATILITY FILTER (5%) =====
-        atr_vals = self.calc.calculate_atr(m5_highs, m5_lows, m5_closes, ATR_PERIOD)
+        atr_vals = self.calc.calculate_atr(m5_highs, m5_lows, m5_closes, p["ATR_PERIOD"])
         current_atr = atr_vals[-1]
         avg_atr = sum(atr_vals[-10:]) / 10 if len(atr_vals) >= 10 else current_atr
         
@@ -122,12 +187,12 @@ class StrategyEngine:
             volatility_score = 5
         
         # ===== COMPONENT 5: VOLUME SPIKE (5%) =====
-        vol_avg = self.calc.calculate_volume_sma(m1_volumes, VOLUME_LOOKBACK_PERIOD)
+        vol_avg = self.calc.calculate_volume_sma(m1_volumes, p["VOLUME_LOOKBACK_PERIOD"])
         current_vol = m1_volumes[-1]
         avg_vol = vol_avg[-1] if vol_avg else current_vol
         
         volume_score = 0
-        if self.calc.is_volume_spike(current_vol, avg_vol, VOLUME_THRESHOLD_MULTIPLIER):
+        if self.calc.is_volume_spike(current_vol, avg_vol, p["VOLUME_THRESHOLD_MULTIPLIER"]):
             volume_score = 5
         
         # ===== CONFIDENCE CALCULATION =====
@@ -143,7 +208,7 @@ class StrategyEngine:
         
         total_confidence = ema_score + rsi_score + stoch_score + volatility_score + volume_score
         
-        if total_confidence < MIN_SIGNAL_CONFIDENCE:
+        if total_confidence < p["MIN_SIGNAL_CONFIDENCE"]:
             return None
         
         # ===== ADDITIONAL VALIDATIONS =====
@@ -154,7 +219,7 @@ class StrategyEngine:
             return None
         
         spread = ask - bid
-        if spread > MAX_SPREAD_PIPS * 0.01:  # Convert pips to price
+        if spread > p["MAX_SPREAD_PIPS"] * pip_size(self.symbol):  # Convert pips to price
             return None
         
         # ===== CALCULATE SL & TP =====
@@ -165,6 +230,7 @@ class StrategyEngine:
         # ===== CREATE SIGNAL =====
         signal = {
             "signal_id": str(uuid.uuid4()),
+            "symbol": self.symbol,
             "direction": signal_direction,
             "entry_price": current_price,
             "sl_price": sl_price,
@@ -181,16 +247,17 @@ class StrategyEngine:
         }
         
         # Log signal generation
-        logger.info(f"Signal Generated: {signal_direction} @ {current_price:.2f}, Conf: {total_confidence}%")
+        logger.info(f"Signal Generated: {self.symbol} {signal_direction} @ {current_price}, Conf: {total_confidence}%")
         
         return signal
     
     def _check_cooldown(self, direction: str) -> bool:
         """Check if enough time has passed since last signal in same direction"""
+        p = self.params
         last_time = self.last_signal_time.get(direction, 0)
         current_time = datetime.utcnow().timestamp()
         
-        if current_time - last_time < SIGNAL_COOLDOWN_SECONDS:
+        if current_time - last_time < p["SIGNAL_COOLDOWN_SECONDS"]:
             return False
         
         self.last_signal_time[direction] = current_time
@@ -220,9 +287,11 @@ class StrategyEngine:
         Returns:
             (sl_price, tp_price, rr_ratio)
         """
+        p = self.params
+        
         # SL calculation
-        sl_distance = max(DEFAULT_SL_PIPS * 0.01, atr * SL_ATR_MULTIPLIER)
-        if SL_BUFFER_FOR_SPREAD:
+        sl_distance = max(p["DEFAULT_SL_PIPS"] * pip_size(self.symbol), atr * p["SL_ATR_MULTIPLIER"])
+        if p["SL_BUFFER_FOR_SPREAD"]:
             sl_distance += spread
         
         if direction == "BUY":
@@ -231,7 +300,7 @@ class StrategyEngine:
             sl_price = entry + sl_distance
         
         # TP calculation based on RR ratio
-        tp_distance = sl_distance * TP_RR_RATIO
+        tp_distance = sl_distance * p["TP_RR_RATIO"]
         
         if direction == "BUY":
             tp_price = entry + tp_distance
@@ -241,7 +310,15 @@ class StrategyEngine:
         # Calculate actual RR ratio
         rr_ratio = tp_distance / sl_distance
         
-        return round(sl_price, 2), round(tp_price, 2), round(rr_ratio, 2)
+        if FIXED_POINT_PRICES:
+            # Levels land exactly on the tick grid so hit checks are integer compares
+            entry_ticks = to_ticks(entry, self.symbol)
+            sl_ticks = entry_ticks + to_ticks(sl_price - entry, self.symbol)
+            tp_ticks = entry_ticks + to_ticks(tp_price - entry, self.symbol)
+            return from_ticks(sl_ticks, self.symbol), from_ticks(tp_ticks, self.symbol), round(rr_ratio, 2)
+        
+        decimals = price_decimals(self.symbol)
+        return round(sl_price, decimals), round(tp_price, decimals), round(rr_ratio, 2)
     
     def update_trades(self, market_data: Dict[str, Any]) -> None:
         """
@@ -250,8 +327,34 @@ class StrategyEngine:
         current_price = market_data.get("current_price", 0)
         timestamp = market_data.get("timestamp", datetime.utcnow())
         
+        # Inserts first: a retried close must never reach the writer before its trade row
+        if self.failed_opens:
+            self._retry_failed_opens()
+        if self.failed_closes:
+            self._retry_failed_closes()
+        
+        if self.position_book is not None:
+            for position, hit_type, exit_price in self.position_book.triggered(current_price):
+                self.position_book.remove(position.id)
+                pips_gained = self.calc.calculate_pips_to_level(position.entry_price, exit_price, self.symbol)
+                if position.direction == TradeDirection.SELL:
+                    pips_gained = -pips_gained
+                self._close_trade(position, hit_type, exit_price, pips_gained, timestamp)
+            return
+        
         # Get open trades
-        open_trades = self.db.query(Trade).filter(Trade.status == TradeStatus.OPEN).all()
+        open_trades = self.db.query(Trade).filter(
+            Trade.status == TradeStatus.OPEN, Trade.ticker == self.symbol, Trade.variant == self.variant
+        ).all()
+        
+        if self.writer is not None:
+            # Closes still queued in the writer must not be closed twice
+            self.pending_close &= {trade.id for trade in open_trades}
+            open_trades = [trade for trade in open_trades if trade.id not in self.pending_close]
+        
+        if FIXED_POINT_PRICES:
+            self._update_trades_fixed(open_trades, to_ticks(current_price, self.symbol), timestamp)
+            return
         
         for trade in open_trades:
             hit_type = None
@@ -275,35 +378,305 @@ class StrategyEngine:
             
             if hit_type:
                 # Calculate P/L
-                pips_gained = self.calc.calculate_pips_to_level(trade.entry_price, exit_price)
+                pips_gained = self.calc.calculate_pips_to_level(trade.entry_price, exit_price, self.symbol)
                 if trade.direction == TradeDirection.SELL:
                     pips_gained = -pips_gained
                 
-                pl_usd = pips_gained * 0.01 * LOT_SIZE * 100  # 0.01 lot = $1/pip
-                
-                # Update trade
-                trade.status = hit_type
-                trade.exit_price = exit_price
-                trade.exit_timestamp_utc = timestamp
-                trade.pips_gained = pips_gained
-                trade.virtual_pl_usd = pl_usd
-                
-                # Update virtual balance
-                self.virtual_balance += pl_usd
-                if hit_type == TradeStatus.CLOSED_LOSE:
-                    self.daily_loss += abs(pl_usd)
-                
-                self.db.commit()
-                
-                logger.info(f"Trade closed: {trade.signal_id} | {hit_type.value} | P/L: ${pl_usd:.2f}")
+                self._close_trade(trade, hit_type, exit_price, pips_gained, timestamp)
+    
+    def _update_trades_fixed(self, open_trades, price_ticks: int, timestamp: datetime) -> None:
+        """SL/TP hit checks on integer ticks (FIXED_POINT_PRICES mode)"""
+        for trade in open_trades:
+            sl_ticks = to_ticks(trade.sl_price, self.symbol)
+            tp_ticks = to_ticks(trade.tp_price, self.symbol)
+            
+            if trade.direction == TradeDirection.BUY:
+                if price_ticks <= sl_ticks:
+                    hit_type, exit_ticks = TradeStatus.CLOSED_LOSE, sl_ticks
+                elif price_ticks >= tp_ticks:
+                    hit_type, exit_ticks = TradeStatus.CLOSED_WIN, tp_ticks
+                else:
+                    continue
+                moved = exit_ticks - to_ticks(trade.entry_price, self.symbol)
+            else:  # SELL
+                if price_ticks >= sl_ticks:
+                    hit_type, exit_ticks = TradeStatus.CLOSED_LOSE, sl_ticks
+                elif price_ticks <= tp_ticks:
+                    hit_type, exit_ticks = TradeStatus.CLOSED_WIN, tp_ticks
+                else:
+                    continue
+                moved = to_ticks(trade.entry_price, self.symbol) - exit_ticks
+            
+            self._close_trade(trade, hit_type, from_ticks(exit_ticks, self.symbol),
+                              ticks_to_pips(moved, self.symbol), timestamp)
+    
+    def _close_trade(self, trade, hit_type: TradeStatus, exit_price: float,
+                     pips_gained: float, timestamp: datetime) -> None:
+        """Record a SL/TP exit and update the virtual account"""
+        pl_usd = pips_gained * pip_value(self.symbol, exit_price) * LOT_SIZE
+        
+        changes = {
+            "status": hit_type,
+            "exit_price": exit_price,
+            "exit_timestamp_utc": timestamp,
+            "pips_gained": pips_gained,
+            "virtual_pl_usd": pl_usd,
+        }
+        
+        # Update virtual balance
+        self.virtual_balance += pl_usd
+        if self.risk_state is not None:
+            self.risk_state.on_trade_closed(pl_usd)
+        if self.stats is not None:
+            self.stats.record_close(trade.direction, hit_type, pl_usd, pips_gained, timestamp,
+                                    risk_reward(trade.direction, trade.entry_price, trade.sl_price, trade.tp_price))
+        snapshots = [state for state in (self.risk_state, self.stats) if state is not None]
+        
+        if self.writer is not None:
+            self.pending_close.add(trade.id)
+            self._submit_close(trade.id, changes, 1)
+        else:
+            # Update trade (book positions are detached, so load the row)
+            if isinstance(trade, Position):
+                _apply_trade_changes(self.db, trade.id, changes)
+            else:
+                for field, value in changes.items():
+                    setattr(trade, field, value)
+            for state in snapshots:
+                state.snapshot_mutation()(self.db)
+            self.db.commit()
+        
+        logger.info(f"Trade closed: {trade.signal_id} | {hit_type.value} | P/L: ${pl_usd:.2f}")
+        if self.on_close is not None:
+            self.on_close({
+                "signal_id": trade.signal_id,
+                "symbol": self.symbol,
+                "direction": trade.direction.value,
+                "status": hit_type.value,
+                "entry_price": trade.entry_price,
+                "sl_price": trade.sl_price,
+                "tp_price": trade.tp_price,
+                "exit_price": exit_price,
+                "pips_gained": pips_gained,
+                "virtual_pl_usd": pl_usd,
+                "closed_at": timestamp,
+            })
+
+    def open_trade(self, trade: Trade) -> None:
+        """
+        Record a new trade: the insert goes to the writer, in-memory state is updated now
+        
+        Call before the next exit check so a close never precedes its insert;
+        the risk counters, position book and stats count the trade straight
+        away so the next risk check sees it.
+        """
+        if self.writer is not None:
+            self._submit_open(trade, 1)
+        else:
+            self.db.add(trade)
+            self.db.commit()
+        if self.risk_state is not None:
+            self.risk_state.on_trade_opened()
+        if self.position_book is not None:
+            self.position_book.add(trade)
+        if self.stats is not None:
+            self.stats.record_open()
+    
+    def _submit_open(self, trade: Trade, attempt: int) -> None:
+        self.writer.submit(lambda session: session.add(trade),
+                           on_failure=lambda: self.failed_opens.append((trade, attempt)))
+    
+    def _retry_failed_opens(self) -> None:
+        """
+        Re-submit inserts whose transaction rolled back (or were dropped)
+        
+        Once the retries are used up the trade is taken back out of the
+        position book, risk counters and stats, unless it already closed in
+        memory, in which case its close fails the same way.
+        """
+        while self.failed_opens:
+            trade, attempt = self.failed_opens.popleft()
+            if attempt <= DB_WRITER_TRADE_RETRIES:
+                logger.warning(f"Retrying insert of trade {trade.id} (attempt {attempt + 1})")
+                self._submit_open(trade, attempt + 1)
+                continue
+            logger.error(f"Trade {trade.id} insert not persisted after {attempt} attempts; trade discarded")
+            if self.position_book is not None and self.position_book.remove(trade.id) is None:
+                continue  # already closed: its close finds no row and is dropped
+            if self.risk_state is not None:
+                self.risk_state.on_trade_discarded()
+            if self.stats is not None:
+                self.stats.record_discard()
+    
+    def _submit_close(self, trade_id: str, changes: Dict[str, Any], attempt: int) -> None:
+        """Queue a close and the state snapshots for the writer's current tick"""
+        self.writer.submit(lambda session: _apply_trade_changes(session, trade_id, changes),
+                           on_failure=lambda: self.failed_closes.append((trade_id, changes, attempt)))
+        # Snapshots commit in the same transaction as the close
+        for state in (self.risk_state, self.stats):
+            if state is not None:
+                self.writer.submit(state.snapshot_mutation())
+    
+    def _retry_failed_closes(self) -> None:
+        """
+        Re-submit closes whose transaction rolled back
+        
+        The in-memory book, balance and counters already reflect the close, so
+        the write is repeated (with fresh snapshots) rather than undone. The
+        trade stays in pending_close meanwhile so it is never closed twice.
+        """
+        while self.failed_closes:
+            trade_id, changes, attempt = self.failed_closes.popleft()
+            if attempt > DB_WRITER_TRADE_RETRIES:
+                self.pending_close.discard(trade_id)
+                logger.error(f"Trade {trade_id} close not persisted after {attempt} attempts; row left OPEN")
+                continue
+            logger.warning(f"Retrying close of trade {trade_id} (attempt {attempt + 1})")
+            self._submit_close(trade_id, changes, attempt + 1)
+
+def _apply_trade_changes(session: Session, trade_id: str, changes: Dict[str, Any]) -> None:
+    """Writer-side trade update (runs on the DB writer thread)"""
+    trade = session.get(Trade, trade_id)
+    if trade is None:
+        logger.warning(f"Trade {trade_id} vanished before its update was written")
+        return
+    for field, value in changes.items():
+        setattr(trade, field, value)
+
+class RiskState:
+    """
+    In-memory risk counters: trades today, realized daily loss, open positions
+    
+    Maintained from trade open/close events, reset at the UTC day boundary and
+    snapshotted to BotState so a restart resumes the same day's counters.
+    With symbols sharded across processes each shard keeps its own row, and
+    peer_keys lists the other shards' rows so limits are checked on the sum.
+    """
+    
+    STATE_KEY = "risk_state"
+    
+    def __init__(self, clock=datetime.utcnow, variant: str = LIVE_VARIANT):
+        self.clock = clock
+        self.variant = variant
+        if variant != LIVE_VARIANT:
+            self.STATE_KEY = f"{RiskState.STATE_KEY}:{variant}"
+        self.day = clock().strftime("%Y-%m-%d")
+        self.trades_today = 0
+        self.daily_loss = 0.0
+        self.open_positions = 0
+        self.peer_keys: List[str] = []  # BotState keys of the other shards
+    
+    @classmethod
+    def shard_key(cls, worker_index: int) -> str:
+        """BotState key of one symbol shard's live counters"""
+        return f"{cls.STATE_KEY}:{worker_index}" if worker_index else cls.STATE_KEY
+    
+    def on_trade_opened(self) -> None:
+        self._roll_day()
+        self.trades_today += 1
+        self.open_positions += 1
+    
+    def on_trade_discarded(self) -> None:
+        """Take back on_trade_opened for a trade that was never persisted"""
+        self._roll_day()
+        self.trades_today = max(0, self.trades_today - 1)
+        self.open_positions = max(0, self.open_positions - 1)
+    
+    def on_trade_closed(self, pl_usd: float) -> None:
+        self._roll_day()
+        self.open_positions = max(0, self.open_positions - 1)
+        if pl_usd < 0:
+            self.daily_loss += abs(pl_usd)
+    
+    def get_trades_today(self) -> int:
+        self._roll_day()
+        return self.trades_today
+    
+    def get_daily_loss(self) -> float:
+        self._roll_day()
+        return self.daily_loss
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "day": self.day,
+            "trades_today": self.trades_today,
+            "daily_loss": round(self.daily_loss, 6),
+            "open_positions": self.open_positions,
+        }
+    
+    def snapshot_mutation(self):
+        """Session callable writing the current counters to BotState"""
+        value = self.to_dict()
+        return lambda session: session.merge(BotState(key=self.STATE_KEY, value=value))
+    
+    def peer_totals(self, db: Session) -> Dict[str, Any]:
+        """
+        Sum of the other shards' last committed counters (same-day figures only)
+        
+        Returns:
+            {"trades_today", "daily_loss", "open_positions"}
+        """
+        self._roll_day()
+        totals = {"trades_today": 0, "daily_loss": 0.0, "open_positions": 0}
+        if not self.peer_keys:
+            return totals
+        for row in db.query(BotState).filter(BotState.key.in_(self.peer_keys)).all():
+            value = row.value or {}
+            totals["open_positions"] += int(value.get("open_positions", 0))
+            if value.get("day") == self.day:
+                totals["trades_today"] += int(value.get("trades_today", 0))
+                totals["daily_loss"] += float(value.get("daily_loss", 0.0))
+        return totals
+    
+    def load(self, db: Session, symbols: Optional[List[str]] = None) -> "RiskState":
+        """
+        Restore from the BotState snapshot (same-day counters only), or rebuild
+        from the trades table when there is no snapshot yet
+        
+        Args:
+            db: Session
+            symbols: Instruments this state covers (a shard's rebuild counts only its own trades)
+        """
+        row = db.get(BotState, self.STATE_KEY)
+        if row is not None and row.value:
+            self.open_positions = int(row.value.get("open_positions", 0))
+            if row.value.get("day") == self.day:
+                self.trades_today = int(row.value.get("trades_today", 0))
+                self.daily_loss = float(row.value.get("daily_loss", 0.0))
+            return self
+        
+        legacy = RiskManager(db, variant=self.variant, symbols=symbols)
+        self.trades_today = legacy._get_trades_today()
+        self.daily_loss = legacy._get_daily_loss()
+        self.open_positions = legacy._trades().filter(Trade.status == TradeStatus.OPEN).count()
+        return self
+    
+    def _roll_day(self) -> None:
+        day = self.clock().strftime("%Y-%m-%d")
+        if day != self.day:
+            self.day = day
+            self.trades_today = 0
+            self.daily_loss = 0.0
 
 class RiskManager:
     """
     Risk management and position control
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, state: Optional[RiskState] = None, variant: str = LIVE_VARIANT,
+                 symbols: Optional[List[str]] = None):
+        """
+        Args:
+            db: Session for the query-based checks
+            state: Optional RiskState; when given, checks read it (plus the other
+                shards' snapshot rows, if it has peers) instead of the trades table
+            variant: Trade ledger the query-based checks count
+            symbols: Restrict the query-based checks to these instruments (None = all)
+        """
         self.db = db
+        self.state = state
+        self.variant = variant
+        self.symbols = symbols
     
     def can_generate_signal(self) -> Tuple[bool, str]:
         """
@@ -312,35 +685,49 @@ class RiskManager:
         Returns:
             (can_trade, reason)
         """
+        # Limits hold across every symbol shard: add the other shards' counters
+        peers = self.state.peer_totals(self.db) if self.state else None
+        
         # Check trade limit
         if not EVALUATION_MODE:
-            trades_today = self._get_trades_today()
+            trades_today = self.state.get_trades_today() + peers["trades_today"] if self.state \
+                else self._get_trades_today()
             if trades_today >= MAX_TRADES_PER_DAY:
                 return False, f"Max trades ({MAX_TRADES_PER_DAY}) reached today"
         
         # Check daily loss limit
-        daily_loss = self._get_daily_loss()
+        daily_loss = self.state.get_daily_loss() + peers["daily_loss"] if self.state else self._get_daily_loss()
         loss_limit = VIRTUAL_INITIAL_BALANCE * (DAILY_LOSS_PERCENT / 100)
         if daily_loss >= loss_limit:
             return False, f"Daily loss limit (${loss_limit:.2f}) exceeded"
         
         # Check concurrent trades
-        open_trades = self.db.query(Trade).filter(Trade.status == TradeStatus.OPEN).count()
+        if self.state:
+            open_trades = self.state.open_positions + peers["open_positions"]
+        else:
+            open_trades = self._trades().filter(Trade.status == TradeStatus.OPEN).count()
         if open_trades >= MAX_CONCURRENT_TRADES:
             return False, f"Max concurrent trades ({MAX_CONCURRENT_TRADES}) reached"
         
         return True, "OK"
     
+    def _trades(self):
+        """Trades of this ledger (and symbols, if restricted)"""
+        query = self.db.query(Trade).filter(Trade.variant == self.variant)
+        if self.symbols is not None:
+            query = query.filter(Trade.ticker.in_(self.symbols))
+        return query
+    
     def _get_trades_today(self) -> int:
         """Get number of trades created today (UTC)"""
         today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        trades = self.db.query(Trade).filter(Trade.created_at >= today_start).count()
+        trades = self._trades().filter(Trade.created_at >= today_start).count()
         return trades
     
     def _get_daily_loss(self) -> float:
         """Get cumulative loss for today"""
         today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        closed_trades = self.db.query(Trade).filter(
+        closed_trades = self._trades().filter(
             Trade.created_at >= today_start,
             Trade.status.in_([TradeStatus.CLOSED_LOSE, TradeStatus.CLOSED_WIN])
         ).all()
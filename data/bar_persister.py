@@ -0,0 +1,215 @@
+"""
+Write-Behind Bar Persistence
+Completed bars are queued from the event loop and bulk-upserted into
+MarketDataCache by a background thread
+"""
+
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import pytz
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from config.settings import (
+    BAR_PERSIST_BATCH_SIZE, BAR_PERSIST_FLUSH_SECONDS, BAR_PERSIST_QUEUE_SIZE
+)
+from data.db import engine as default_engine, create_background_engine
+from data.models import MarketDataCache, TimeframeEnum
+from utils.logger import get_logger
+
+logger = get_logger()
+
+BAR_COLUMNS = ("open", "high", "low", "close", "volume", "bid", "ask")
+INDICATOR_COLUMNS = ("ema_5", "ema_10", "ema_20", "rsi", "stoch_k", "stoch_d", "atr")
+
+def bar_to_row(bar: Dict[str, Any], timeframe: str, ticker: str = "XAUUSD") -> Dict[str, Any]:
+    """Map a normalized bar to a MarketDataCache row (naive UTC timestamp)"""
+    timestamp = bar["timestamp_utc"]
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(pytz.UTC).replace(tzinfo=None)
+
+    row = {"ticker": ticker, "timeframe": TimeframeEnum(timeframe), "timestamp_utc": timestamp}
+    for column in BAR_COLUMNS + INDICATOR_COLUMNS:
+        row[column] = bar.get(column)
+    row["volume"] = int(row["volume"] or 0)
+    return row
+
+def row_to_bar(row) -> Dict[str, Any]:
+    """Map a MarketDataCache row back to the standard bar format (plus indicators)"""
+    bar = {"timestamp_utc": row.timestamp_utc.replace(tzinfo=pytz.UTC).isoformat()}
+    for column in BAR_COLUMNS + INDICATOR_COLUMNS:
+        bar[column] = getattr(row, column)
+    return bar
+
+def load_recent_bars(timeframe: str = "M1", limit: int = 500, ticker: str = "XAUUSD",
+                     engine=None) -> List[Dict[str, Any]]:
+    """
+    Latest persisted bars with their indicator values, oldest first
+    
+    Served by the uq_market_data (ticker, timeframe, timestamp_utc) index.
+    """
+    engine = engine or default_engine
+    table = MarketDataCache.__table__
+    query = (select(table)
+             .where(table.c.ticker == ticker, table.c.timeframe == TimeframeEnum(timeframe))
+             .order_by(table.c.timestamp_utc.desc())
+             .limit(limit))
+    with engine.connect() as conn:
+        rows = conn.execute(query).all()
+    return [row_to_bar(row) for row in reversed(rows)]
+
+def load_bar_range(timeframe: str, start: datetime, end: datetime, ticker: str = "XAUUSD",
+                   engine=None) -> List[Dict[str, Any]]:
+    """Persisted bars and indicators with start <= timestamp_utc < end (naive UTC), oldest first"""
+    engine = engine or default_engine
+    table = MarketDataCache.__table__
+    query = (select(table)
+             .where(table.c.ticker == ticker, table.c.timeframe == TimeframeEnum(timeframe),
+                    table.c.timestamp_utc >= start, table.c.timestamp_utc < end)
+             .order_by(table.c.timestamp_utc))
+    with engine.connect() as conn:
+        rows = conn.execute(query).all()
+    return [row_to_bar(row) for row in rows]
+
+class BarPersister:
+    """
+    Background writer for MarketDataCache
+
+    enqueue() never touches the database; a daemon thread flushes when
+    batch_size rows are pending or flush_interval seconds have passed. Rows are
+    upserted on uq_market_data so re-sent bars overwrite instead of failing.
+    """
+
+    def __init__(self, engine=None, batch_size: int = BAR_PERSIST_BATCH_SIZE,
+                 flush_interval: float = BAR_PERSIST_FLUSH_SECONDS,
+                 max_queue: int = BAR_PERSIST_QUEUE_SIZE):
+        self.engine = engine
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "dropped": 0, "errors": 0,
+                      "last_flush_ms": 0.0}
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._flushed = threading.Condition()
+
+    def start(self) -> "BarPersister":
+        if self._thread is not None:
+            return self
+        if self.engine is None:
+            self.engine = create_background_engine()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="bar-persister", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush what is queued and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def enqueue(self, bar: Dict[str, Any], timeframe: str = "M1", ticker: str = "XAUUSD") -> bool:
+        """
+        Queue a completed bar for persistence (non-blocking)
+
+        Returns:
+            False if the bar was dropped (queue full or unusable bar)
+        """
+        if not bar or not bar.get("timestamp_utc"):
+            return False
+        try:
+            self.queue.put_nowait(bar_to_row(bar, timeframe, ticker))
+        except (queue.Full, ValueError):
+            self.stats["dropped"] += 1
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until everything queued so far is written (for shutdown and tests)"""
+        target = self.stats["queued"] - self.stats["dropped"]
+        deadline = time.monotonic() + timeout
+        with self._flushed:
+            while self.stats["written"] + self.stats["errors"] < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self._flushed.wait(remaining)
+        return True
+
+    def _run(self) -> None:
+        pending: List[Dict[str, Any]] = []
+        last_flush = time.monotonic()
+
+        while True:
+            stopping = self._stop_event.is_set()
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                pending.append(self.queue.get(timeout=min(timeout, 0.5) if not stopping else 0))
+            except queue.Empty:
+                pass
+
+            # Drain whatever else is already waiting without blocking
+            while len(pending) < self.batch_size:
+                try:
+                    pending.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            due = time.monotonic() - last_flush >= self.flush_interval
+            if pending and (len(pending) >= self.batch_size or due or stopping):
+                self._write(pending)
+                pending = []
+                last_flush = time.monotonic()
+            elif due:
+                last_flush = time.monotonic()
+
+            if stopping and not pending and self.queue.empty():
+                return
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        # Last write wins for a bar repeated within one batch
+        unique = {}
+        for row in rows:
+            unique[(row["ticker"], row["timeframe"], row["timestamp_utc"])] = row
+
+        started = time.perf_counter()
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(self._upsert(), list(unique.values()))
+            self.stats["written"] += len(rows)
+            self.stats["batches"] += 1
+        except Exception as e:
+            self.stats["errors"] += len(rows)
+            logger.error(f"Bar persistence failed ({len(rows)} bars): {str(e)}")
+        self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        with self._flushed:
+            self._flushed.notify_all()
+
+    def _upsert(self):
+        insert = pg_insert if self.engine.dialect.name == "postgresql" else sqlite_insert
+        table = MarketDataCache.__table__
+        stmt = insert(table)
+        update = {column: stmt.excluded[column] for column in BAR_COLUMNS}
+        # A re-sent bar without indicators keeps the stored values
+        update.update({column: func.coalesce(stmt.excluded[column], table.c[column])
+                       for column in INDICATOR_COLUMNS})
+        return stmt.on_conflict_do_update(
+            index_elements=["ticker", "timeframe", "timestamp_utc"],
+            set_=update,
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats, pending=self.queue.qsize())
+
+# Global persister instance
+bar_persister = BarPersister()
@@ -3,36 +3,117 @@ Database Connection & Session Management
 SQLAlchemy initialization with WAL mode for SQLite
 """
 
-from sqlalchemy import create_engine, event, text
+from sqlalchemy import create_engine, event, text, inspect
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import StaticPool, QueuePool
 import os
-from config.settings import DATABASE_URL, DB_WAL_MODE
+from config.settings import (
+    DATABASE_URL, DB_WAL_MODE, DB_BUSY_TIMEOUT_SECONDS,
+    DB_READ_POOL_SIZE, DB_READ_POOL_OVERFLOW, DB_READ_POOL_TIMEOUT_SECONDS
+)
 from data.models import Base
 
-# Create engine with SQLite optimizations
+def _is_memory_sqlite(url: str) -> bool:
+    return url.lower() in ("sqlite://", "sqlite:///:memory:")
+
+def set_sqlite_pragma(dbapi_conn, connection_record):
+    """WAL journaling for file SQLite: readers never block the writer"""
+    cursor = dbapi_conn.cursor()
+    # Takes effect on new databases only (existing ones need one manual VACUUM);
+    # lets the retention job release free pages with incremental_vacuum
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.close()
+
+def set_sqlite_read_only(dbapi_conn, connection_record):
+    """Reader connections refuse writes, so they can never hold the write lock"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+# ===== WRITER ENGINE =====
+# Trading loop: one connection, one writer
+
 if "sqlite" in DATABASE_URL.lower():
     engine = create_engine(
         DATABASE_URL,
-        connect_args={"check_same_thread": False},
+        connect_args={"check_same_thread": False, "timeout": DB_BUSY_TIMEOUT_SECONDS},
         poolclass=StaticPool,
         echo=False,
     )
     
     # Enable WAL mode for better concurrency
     if DB_WAL_MODE:
-        @event.listens_for(engine, "connect")
-        def set_sqlite_pragma(dbapi_conn, connection_record):
-            cursor = dbapi_conn.cursor()
-            cursor.execute("PRAGMA journal_mode=WAL")
-            cursor.execute("PRAGMA synchronous=NORMAL")
-            cursor.execute("PRAGMA cache_size=-64000")
-            cursor.close()
+        event.listen(engine, "connect", set_sqlite_pragma)
 else:
     engine = create_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ===== READ ENGINE =====
+# HTTP and Telegram readers: a pool of their own connections, so dashboard
+# polling never waits on (or delays) the trading loop's connection
+
+def create_read_engine():
+    """
+    Read-only connection pool
+    
+    File SQLite gets DB_READ_POOL_SIZE query_only WAL connections with the
+    configured busy timeout. In-memory SQLite lives on the writer's single
+    connection, so it is shared as-is; server databases get their own pool.
+    """
+    if _is_memory_sqlite(DATABASE_URL):
+        return engine
+    
+    if "sqlite" in DATABASE_URL.lower():
+        reader = create_engine(
+            DATABASE_URL,
+            connect_args={"check_same_thread": False, "timeout": DB_BUSY_TIMEOUT_SECONDS},
+            poolclass=QueuePool,
+            pool_size=DB_READ_POOL_SIZE,
+            max_overflow=DB_READ_POOL_OVERFLOW,
+            pool_timeout=DB_READ_POOL_TIMEOUT_SECONDS,
+            echo=False,
+        )
+        if DB_WAL_MODE:
+            event.listen(reader, "connect", set_sqlite_pragma)
+        event.listen(reader, "connect", set_sqlite_read_only)
+        return reader
+    
+    return create_engine(
+        DATABASE_URL,
+        pool_size=DB_READ_POOL_SIZE,
+        max_overflow=DB_READ_POOL_OVERFLOW,
+        pool_timeout=DB_READ_POOL_TIMEOUT_SECONDS,
+        echo=False,
+        pool_pre_ping=True,
+    )
+
+read_engine = create_read_engine()
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+def create_background_engine():
+    """
+    Engine for background writer threads
+    
+    File-backed SQLite gets its own connection so a background transaction
+    never interleaves with the main session (WAL lets readers continue while
+    it commits). In-memory SQLite and server databases reuse the shared engine.
+    """
+    if "sqlite" not in DATABASE_URL.lower() or _is_memory_sqlite(DATABASE_URL):
+        return engine
+    
+    background = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False, "timeout": DB_BUSY_TIMEOUT_SECONDS},
+        echo=False,
+    )
+    if DB_WAL_MODE:
+        event.listen(background, "connect", set_sqlite_pragma)
+    return background
+
 def get_db() -> Session:
     """Dependency injection for database session"""
     db = SessionLocal()
@@ -44,8 +125,47 @@ def get_db() -> Session:
 def init_db():
     """Initialize database and create all tables"""
     Base.metadata.create_all(bind=engine)
+    migrate_db()
     print("✓ Database initialized successfully")
 
+def migrate_db(bind=None):
+    """
+    Bring an existing database up to the current models
+    
+    create_all() skips tables that already exist, including their columns and
+    indexes, so columns and indexes added to a model later are created here
+    (no-op when present).
+    """
+    bind = bind or engine
+    _add_missing_columns(bind)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+    
+    # Native PostgreSQL enums need new values added explicitly (SQLite stores strings)
+    if bind.dialect.name == "postgresql":
+        with bind.begin() as conn:
+            conn.execute(text("ALTER TYPE timeframeenum ADD VALUE IF NOT EXISTS 'H1'"))
+
+def _add_missing_columns(bind) -> None:
+    """ALTER TABLE ADD COLUMN for model columns an existing table lacks"""
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=bind.dialect)}"
+            if column.server_default is not None:
+                # NOT NULL can only be added together with a default for existing rows
+                ddl += f" DEFAULT '{column.server_default.arg}'"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            with bind.begin() as conn:
+                conn.execute(text(ddl))
+
 def drop_db():
     """Drop all tables (for testing/reset)"""
     Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,157 @@
+"""
+Background DB Writer
+Trade inserts/updates and state changes are queued from the event loop and
+committed by one worker thread, one transaction per loop tick
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from sqlalchemy.orm import sessionmaker, Session
+from config.settings import DB_WRITER_QUEUE_SIZE
+from data.db import create_background_engine
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# Queue marker closing the current tick's transaction
+_COMMIT = object()
+
+class DBWriter:
+    """
+    Single persistence worker with its own session
+
+    Mutations are callables taking the worker's Session. Everything submitted
+    between two commit_tick() calls is applied in one transaction; a failing
+    mutation rolls back its whole tick, and every mutation of that tick that
+    was submitted with on_failure gets it called (on the worker thread).
+    Callers never block on disk.
+    """
+
+    def __init__(self, engine=None, max_queue: int = DB_WRITER_QUEUE_SIZE):
+        self.engine = engine
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.stats = {"submitted": 0, "applied": 0, "commits": 0, "failed_ticks": 0, "dropped": 0,
+                      "last_commit_ms": 0.0, "max_commit_ms": 0.0, "avg_commit_ms": 0.0}
+        self._session_factory = None
+        self._thread = None
+
+    def start(self) -> "DBWriter":
+        if self._thread is not None:
+            return self
+        if self.engine is None:
+            self.engine = create_background_engine()
+        self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Commit what is queued and stop the worker"""
+        if self._thread is None:
+            return
+        self.commit_tick()
+        self.queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, mutation: Callable[[Session], Any], on_failure: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Queue a mutation for the current tick (non-blocking)
+
+        Args:
+            mutation: Callable applied to the writer's session
+            on_failure: Called if the mutation is dropped or its tick is rolled back
+
+        Returns:
+            False if the queue is full and the mutation was dropped
+        """
+        try:
+            self.queue.put_nowait((mutation, on_failure))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            logger.error("DB writer queue full, mutation dropped")
+            if on_failure is not None:
+                on_failure()
+            return False
+        self.stats["submitted"] += 1
+        return True
+
+    def commit_tick(self) -> None:
+        """Close the current tick: everything submitted so far commits together"""
+        try:
+            self.queue.put_nowait(_COMMIT)
+        except queue.Full:
+            pass  # the worker is behind; the next marker commits this tick too
+
+    def wait_idle(self, timeout: float = 10.0) -> bool:
+        """Block until all submitted work is committed (for shutdown and tests)"""
+        self.commit_tick()
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats, pending=self.queue.qsize())
+
+    def _run(self) -> None:
+        session = self._session_factory()
+        batch: List[Tuple[Callable[[Session], Any], Optional[Callable[[], None]]]] = []
+        try:
+            while True:
+                item = self.queue.get()
+                try:
+                    if item is None:
+                        self._commit(session, batch)
+                        return
+                    if item is _COMMIT:
+                        self._commit(session, batch)
+                        batch = []
+                    else:
+                        batch.append(item)
+                finally:
+                    self.queue.task_done()
+        finally:
+            session.close()
+
+    def _commit(self, session: Session, batch: List[Tuple[Callable[[Session], Any], Optional[Callable]]]) -> None:
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            for mutation, _ in batch:
+                mutation(session)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.stats["failed_ticks"] += 1
+            logger.error(f"DB writer transaction failed ({len(batch)} mutations): {str(e)}")
+            for _, on_failure in batch:
+                if on_failure is not None:
+                    try:
+                        on_failure()
+                    except Exception as callback_error:
+                        logger.error(f"DB writer failure callback error: {str(callback_error)}")
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats["applied"] += len(batch)
+        self.stats["commits"] += 1
+        self.stats["last_commit_ms"] = round(elapsed_ms, 2)
+        self.stats["max_commit_ms"] = round(max(self.stats["max_commit_ms"], elapsed_ms), 2)
+        commits = self.stats["commits"]
+        self.stats["avg_commit_ms"] = round(
+            self.stats["avg_commit_ms"] + (elapsed_ms - self.stats["avg_commit_ms"]) / commits, 2
+        )
+        if elapsed_ms > 250:
+            logger.warning(f"Slow DB commit: {elapsed_ms:.0f}ms for {len(batch)} mutations")
+
+# Global writer instance
+db_writer = DBWriter()
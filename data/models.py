@@ -4,13 +4,16 @@ Schemas untuk trades, market data cache, bot state, dan API health
 """
 
 from datetime import datetime
-from sqlalchemy import Column, String, Float, Integer, DateTime, Enum, Boolean, JSON, UniqueConstraint
+from sqlalchemy import Column, String, Float, Integer, BigInteger, DateTime, Enum, Boolean, JSON, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 import enum
 import uuid
 
 Base = declarative_base()
 
+# Trades placed by the live parameter set; shadow variants use their own names
+LIVE_VARIANT = "live"
+
 class TradeStatus(str, enum.Enum):
     OPEN = "OPEN"
     CLOSED_WIN = "CLOSED_WIN"
@@ -29,9 +32,18 @@ class APIStatus(str, enum.Enum):
 class TimeframeEnum(str, enum.Enum):
     M1 = "M1"
     M5 = "M5"
+    H1 = "H1"
 
 class Trade(Base):
     __tablename__ = "trades"
+    __table_args__ = (
+        # Open-position count, /status and daily loss: status equality + created_at range
+        Index("ix_trades_status_created_at", "status", "created_at"),
+        # Trades-today count: created_at range only
+        Index("ix_trades_created_at", "created_at"),
+        # Trade history pages: keyset on (created_at, id) within one ledger
+        Index("ix_trades_variant_created_at_id", "variant", "created_at", "id"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     signal_id = Column(String(36), nullable=False, unique=True)
@@ -49,6 +61,7 @@ class Trade(Base):
     pips_gained = Column(Float, nullable=True)
     virtual_pl_usd = Column(Float, nullable=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    variant = Column(String(32), nullable=False, default=LIVE_VARIANT, server_default=LIVE_VARIANT)
     
     def __repr__(self):
         return f"<Trade {self.signal_id} {self.direction} {self.status}>"
@@ -95,6 +108,18 @@ class BotState(Base):
     def __repr__(self):
         return f"<BotState {self.key}={self.value}>"
 
+class Subscriber(Base):
+    __tablename__ = "subscribers"
+    
+    chat_id = Column(BigInteger, primary_key=True, autoincrement=False)  # Telegram chat id
+    username = Column(String(64), nullable=True)
+    active = Column(Boolean, nullable=False, default=True)
+    subscribed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Subscriber {self.chat_id} active={self.active}>"
+
 class APIHealthLog(Base):
     __tablename__ = "api_health_log"
     
@@ -0,0 +1,241 @@
+"""
+Market Data Retention
+Background job that rolls old M1 bars into M5, old M5 into H1, deletes the
+rolled rows in small batches and compacts SQLite during off-session hours
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Callable
+from sqlalchemy import select, delete, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from config.settings import (
+    RETENTION_M1_DAYS, RETENTION_M5_DAYS, RETENTION_H1_DAYS, RETENTION_DELETE_BATCH,
+    RETENTION_INTERVAL_SECONDS, RETENTION_OFF_SESSION_HOURS, RETENTION_VACUUM_PAGES
+)
+from data.db import create_background_engine
+from data.models import MarketDataCache, TimeframeEnum
+from utils.logger import get_logger
+
+logger = get_logger()
+
+BUCKET_SECONDS = {"M1": 60, "M5": 300, "H1": 3600}
+_EPOCH = datetime(1970, 1, 1)
+
+def floor_timestamp(timestamp: datetime, seconds: int) -> datetime:
+    """Start of the bucket containing a naive UTC timestamp"""
+    elapsed = int((timestamp - _EPOCH).total_seconds())
+    return _EPOCH + timedelta(seconds=elapsed - elapsed % seconds)
+
+def rollup_bars(rows, timeframe: str) -> List[Dict[str, Any]]:
+    """
+    Aggregate MarketDataCache rows (oldest first) into timeframe bars
+
+    Args:
+        rows: Rows of one ticker and timeframe, ordered by timestamp_utc
+        timeframe: Target timeframe (key of BUCKET_SECONDS)
+
+    Returns:
+        MarketDataCache row dicts without indicator values
+    """
+    seconds = BUCKET_SECONDS[timeframe]
+    bars: Dict[datetime, Dict[str, Any]] = {}
+    for row in rows:
+        start = floor_timestamp(row.timestamp_utc, seconds)
+        bar = bars.get(start)
+        if bar is None:
+            bars[start] = {"ticker": row.ticker, "timeframe": TimeframeEnum(timeframe), "timestamp_utc": start,
+                           "open": row.open, "high": row.high, "low": row.low, "close": row.close,
+                           "volume": row.volume or 0, "bid": row.bid, "ask": row.ask}
+            continue
+        bar["high"] = max(bar["high"], row.high)
+        bar["low"] = min(bar["low"], row.low)
+        bar["close"] = row.close
+        bar["volume"] += row.volume or 0
+        bar["bid"], bar["ask"] = row.bid, row.ask
+    return list(bars.values())
+
+class MarketDataRetention:
+    """
+    Age-tiered retention for MarketDataCache
+
+    Each run rolls source bars older than their tier into the next timeframe
+    one day window at a time and deletes them in batches of batch_size, each in
+    its own short transaction, so the bar persister and trade writer only ever
+    wait for one batch. Incremental vacuum and a passive WAL checkpoint run
+    only in off-session hours.
+    """
+
+    def __init__(self, engine=None, m1_days: int = RETENTION_M1_DAYS, m5_days: int = RETENTION_M5_DAYS,
+                 h1_days: int = RETENTION_H1_DAYS, batch_size: int = RETENTION_DELETE_BATCH,
+                 interval: float = RETENTION_INTERVAL_SECONDS,
+                 off_session_hours: Optional[List[int]] = None,
+                 vacuum_pages: int = RETENTION_VACUUM_PAGES,
+                 clock: Callable[[], datetime] = datetime.utcnow):
+        """
+        Args:
+            engine: Engine to use (default: a background engine of its own)
+            m1_days / m5_days: Age after which M1 / M5 bars are rolled up (0 = never)
+            h1_days: Age after which H1 bars are deleted (0 = never)
+            batch_size: Rows deleted per transaction
+            interval: Seconds between runs of the background thread
+            off_session_hours: UTC hours when compaction may run (Saturdays always may)
+            vacuum_pages: Free pages released per incremental vacuum
+            clock: UTC time source, injectable for tests
+        """
+        self.engine = engine
+        self.tiers = [("M1", "M5", m1_days), ("M5", "H1", m5_days)]
+        self.h1_days = h1_days
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.off_session_hours = set(RETENTION_OFF_SESSION_HOURS if off_session_hours is None
+                                     else off_session_hours)
+        self.vacuum_pages = vacuum_pages
+        self.clock = clock
+        self.stats = {"runs": 0, "rolled_up": 0, "deleted": 0, "compactions": 0, "errors": 0,
+                      "last_run_ms": 0.0, "last_run": None}
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    # ===== LIFECYCLE =====
+
+    def start(self) -> "MarketDataRetention":
+        if self._thread is not None:
+            return self
+        if self.engine is None:
+            self.engine = create_background_engine()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="market-retention", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop after the current batch"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Market data retention failed: {str(e)}")
+            self._stop_event.wait(self.interval)
+
+    # ===== JOB =====
+
+    def run_once(self) -> Dict[str, int]:
+        """
+        One retention pass
+
+        Returns:
+            Counts of rows rolled up and deleted, and whether compaction ran
+        """
+        engine = self.engine or create_background_engine()
+        started = time.perf_counter()
+        now = self.clock()
+        result = {"rolled_up": 0, "deleted": 0, "compacted": 0}
+
+        for source, target, days in self.tiers:
+            if days > 0:
+                rolled, deleted = self._roll_tier(engine, source, target, now - timedelta(days=days))
+                result["rolled_up"] += rolled
+                result["deleted"] += deleted
+        if self.h1_days > 0:
+            result["deleted"] += self._expire(engine, "H1", now - timedelta(days=self.h1_days))
+
+        if self.is_off_session(now) and not self._stop_event.is_set():
+            self.compact(engine)
+            result["compacted"] = 1
+
+        self.stats["runs"] += 1
+        self.stats["rolled_up"] += result["rolled_up"]
+        self.stats["deleted"] += result["deleted"]
+        self.stats["last_run_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.stats["last_run"] = now.isoformat()
+        if result["rolled_up"] or result["deleted"]:
+            logger.info(f"Retention: rolled up {result['rolled_up']} bars, deleted {result['deleted']} rows")
+        return result
+
+    def is_off_session(self, now: datetime) -> bool:
+        return now.weekday() == 5 or now.hour in self.off_session_hours
+
+    def _roll_tier(self, engine, source: str, target: str, cutoff: datetime):
+        """Roll source bars before cutoff into target, one day window at a time"""
+        table = MarketDataCache.__table__
+        source_tf = TimeframeEnum(source)
+        # Only whole target buckets are rolled; the partial one waits for the next run
+        cutoff = floor_timestamp(cutoff, BUCKET_SECONDS[target])
+        rolled = deleted = 0
+
+        with engine.connect() as conn:
+            tickers = conn.execute(select(table.c.ticker).distinct().where(
+                table.c.timeframe == source_tf, table.c.timestamp_utc < cutoff)).scalars().all()
+
+        for ticker in tickers:
+            while not self._stop_event.is_set():
+                scope = (table.c.ticker == ticker, table.c.timeframe == source_tf)
+                with engine.connect() as conn:
+                    oldest = conn.execute(select(func.min(table.c.timestamp_utc)).where(
+                        *scope, table.c.timestamp_utc < cutoff)).scalar()
+                if oldest is None:
+                    break
+                window_start = floor_timestamp(oldest, BUCKET_SECONDS[target])
+                window_end = min(window_start + timedelta(days=1), cutoff)
+                window = scope + (table.c.timestamp_utc >= window_start, table.c.timestamp_utc < window_end)
+
+                with engine.connect() as conn:
+                    rows = conn.execute(select(table).where(*window).order_by(table.c.timestamp_utc)).all()
+                bars = rollup_bars(rows, target)
+                with engine.begin() as conn:
+                    conn.execute(self._insert_missing(engine), bars)
+                rolled += len(bars)
+                deleted += self._delete_batched(engine, window)
+        return rolled, deleted
+
+    def _expire(self, engine, timeframe: str, cutoff: datetime) -> int:
+        table = MarketDataCache.__table__
+        return self._delete_batched(engine, (table.c.timeframe == TimeframeEnum(timeframe),
+                                             table.c.timestamp_utc < cutoff))
+
+    def _delete_batched(self, engine, conditions) -> int:
+        """Delete matching rows batch_size at a time, each batch its own transaction"""
+        table = MarketDataCache.__table__
+        total = 0
+        while True:
+            ids = select(table.c.id).where(*conditions).limit(self.batch_size).scalar_subquery()
+            with engine.begin() as conn:
+                count = conn.execute(delete(table).where(table.c.id.in_(ids))).rowcount
+            total += count
+            if count < self.batch_size or self._stop_event.is_set():
+                return total
+
+    def _insert_missing(self, engine):
+        """Insert rolled-up bars, keeping any bar already stored for that bucket"""
+        insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+        return insert(MarketDataCache.__table__).on_conflict_do_nothing(
+            index_elements=["ticker", "timeframe", "timestamp_utc"])
+
+    def compact(self, engine) -> None:
+        """Release free pages and checkpoint the WAL without blocking writers (SQLite only)"""
+        if engine.dialect.name != "sqlite":
+            return
+        with engine.connect() as conn:
+            if conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2:  # INCREMENTAL
+                conn.execute(text(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})")).fetchall()
+            # PASSIVE copies what it can and never waits on readers or the writer
+            conn.execute(text("PRAGMA wal_checkpoint(PASSIVE)")).fetchall()
+            conn.commit()
+        self.stats["compactions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+# Global retention job instance
+market_retention = MarketDataRetention()
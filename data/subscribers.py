@@ -0,0 +1,120 @@
+"""
+Subscriber Registry
+Telegram chats receiving signals: persisted in the subscribers table and
+mirrored in memory so a broadcast never queries the DB
+"""
+
+import threading
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from data.db_writer import db_writer
+from data.models import Subscriber
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# Writes of one change before the in-memory state is reverted
+_PERSIST_ATTEMPTS = 4
+
+class SubscriberRegistry:
+    """
+    Active chat ids in memory; changes are written through the DB writer and
+    commit with the trading loop's next tick
+
+    Safe to call from any thread (handlers, trading loop, HTTP readers).
+    """
+
+    def __init__(self, writer=None):
+        """
+        Args:
+            writer: Optional data.db_writer.DBWriter; without one, changes are
+                    committed on the session passed to load()
+        """
+        self.writer = writer
+        self._lock = threading.Lock()
+        self._active = set()
+        self._db: Optional[Session] = None
+        self.loaded = False
+
+    def load(self, db: Session) -> "SubscriberRegistry":
+        """Add the persisted active subscribers (keeps any made before loading)"""
+        rows = db.query(Subscriber.chat_id).filter(Subscriber.active.is_(True)).all()
+        with self._lock:
+            self._active.update(chat_id for (chat_id,) in rows)
+            self._db = db
+            self.loaded = True
+        return self
+
+    def subscribe(self, chat_id: int, username: Optional[str] = None) -> bool:
+        """
+        Returns:
+            False if the chat was already subscribed
+        """
+        with self._lock:
+            if chat_id in self._active:
+                return False
+            self._active.add(chat_id)
+        self._persist(chat_id, True, username)
+        logger.info(f"Subscriber added: {chat_id}")
+        return True
+
+    def unsubscribe(self, chat_id: int) -> bool:
+        """
+        Returns:
+            False if the chat was not subscribed
+        """
+        with self._lock:
+            if chat_id not in self._active:
+                return False
+            self._active.discard(chat_id)
+        self._persist(chat_id, False)
+        logger.info(f"Subscriber removed: {chat_id}")
+        return True
+
+    def is_active(self, chat_id: int) -> bool:
+        with self._lock:
+            return chat_id in self._active
+
+    def active_ids(self) -> List[int]:
+        """Snapshot of the active chat ids"""
+        with self._lock:
+            return list(self._active)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+    def _persist(self, chat_id: int, active: bool, username: Optional[str] = None, attempt: int = 1) -> None:
+        def mutation(session: Session) -> None:
+            subscriber = session.get(Subscriber, chat_id)
+            if subscriber is None:
+                session.add(Subscriber(chat_id=chat_id, username=username, active=active))
+                return
+            subscriber.active = active
+            subscriber.updated_at = datetime.utcnow()
+            if username:
+                subscriber.username = username
+
+        if self.writer is not None:
+            self.writer.submit(mutation, on_failure=lambda: self._persist_failed(chat_id, active, username, attempt))
+        elif self._db is not None:
+            mutation(self._db)
+            self._db.commit()
+
+    def _persist_failed(self, chat_id: int, active: bool, username: Optional[str], attempt: int) -> None:
+        """The writer dropped or rolled back a change: write it again, or give it up in memory too"""
+        if attempt < _PERSIST_ATTEMPTS:
+            self._persist(chat_id, active, username, attempt + 1)
+            return
+        with self._lock:
+            if (chat_id in self._active) != active:
+                return  # changed again since; that change is being written
+            if active:
+                self._active.discard(chat_id)
+            else:
+                self._active.add(chat_id)
+        logger.error(f"Subscriber {chat_id} change not persisted after {attempt} attempts; reverted")
+
+# Global registry instance
+subscriber_registry = SubscriberRegistry(writer=db_writer)
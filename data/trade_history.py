@@ -0,0 +1,64 @@
+"""
+Trade History Pages
+Keyset pagination over the trades of one ledger, newest first, on the
+(variant, created_at, id) index: every page costs the same however deep it is
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from data.models import Trade, LIVE_VARIANT
+
+Cursor = Tuple[datetime, str]  # (created_at, id) of the last row shown
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def encode_cursor(cursor: Cursor) -> str:
+    """Compact cursor text (fits Telegram's 64-byte callback data with a prefix)"""
+    created_at, trade_id = cursor
+    return f"{(created_at - _EPOCH) // _MICROSECOND}.{trade_id}"
+
+def decode_cursor(text: str) -> Optional[Cursor]:
+    """Inverse of encode_cursor (None for malformed input)"""
+    micros, _, trade_id = text.partition(".")
+    if not micros.isdigit() or not trade_id:
+        return None
+    return _EPOCH + int(micros) * _MICROSECOND, trade_id
+
+def trade_page(db: Session, limit: int = 10, before: Optional[Cursor] = None,
+               variant: str = LIVE_VARIANT) -> Tuple[List[Dict[str, Any]], Optional[Cursor]]:
+    """
+    One page of trades, newest first
+
+    Args:
+        db: Session (a read-only one is enough)
+        limit: Page size
+        before: Cursor of the previous page's last row (None = newest page)
+        variant: Trade ledger
+
+    Returns:
+        (rows as dicts, cursor for the next page or None on the last page)
+    """
+    query = db.query(
+        Trade.id, Trade.created_at, Trade.ticker, Trade.direction, Trade.status,
+        Trade.entry_price, Trade.exit_price, Trade.pips_gained, Trade.virtual_pl_usd,
+    ).filter(Trade.variant == variant)
+    if before is not None:
+        query = query.filter(tuple_(Trade.created_at, Trade.id) < tuple_(*before))
+    # One extra row tells whether an older page exists without a COUNT
+    rows = query.order_by(Trade.created_at.desc(), Trade.id.desc()).limit(limit + 1).all()
+
+    page = [{
+        "id": row.id,
+        "created_at": row.created_at,
+        "symbol": row.ticker,
+        "direction": row.direction.value,
+        "status": row.status.value,
+        "entry_price": row.entry_price,
+        "exit_price": row.exit_price,
+        "pips_gained": row.pips_gained,
+        "virtual_pl_usd": row.virtual_pl_usd,
+    } for row in rows[:limit]]
+    next_cursor = (page[-1]["created_at"], page[-1]["id"]) if len(rows) > limit else None
+    return page, next_cursor
@@ -0,0 +1,242 @@
+"""
+Materialized Trade Statistics
+Running totals updated on every trade close, snapshotted to BotState and
+rebuildable from the trades table
+"""
+
+import copy
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+from config.settings import STATS_DAY_BUCKETS, STATS_WEEK_BUCKETS
+from data.models import Trade, TradeStatus, TradeDirection, BotState, LIVE_VARIANT
+
+def _empty_bucket() -> Dict[str, float]:
+    return {"closed": 0, "wins": 0, "losses": 0, "gross_profit": 0.0, "gross_loss": 0.0,
+            "pips": 0.0, "rr_sum": 0.0, "rr_count": 0}
+
+def week_key(day: str) -> str:
+    """ISO week ("2025-W46") of a "YYYY-MM-DD" day key"""
+    year, week, _ = datetime.strptime(day, "%Y-%m-%d").isocalendar()
+    return f"{year}-W{week:02d}"
+
+def risk_reward(direction, entry: float, sl: float, tp: float) -> Optional[float]:
+    """Planned R/R of a trade's levels (None if undefined)"""
+    if not sl or not tp:
+        return None
+    if TradeDirection(direction) == TradeDirection.BUY:
+        risk, reward = entry - sl, tp - entry
+    else:
+        risk, reward = sl - entry, entry - tp
+    return reward / risk if risk else None
+
+class TradeStatistics:
+    """
+    Trade statistics aggregate
+
+    Totals, per-day and per-ISO-week (by close date, UTC) and per-direction buckets of closed,
+    wins, losses, gross profit/loss, pips and planned R/R, plus the count of
+    trades opened and currently open. Reads cost the same regardless of
+    history size; only the most recent day_buckets days and week_buckets
+    weeks are kept.
+    """
+
+    STATE_KEY = "trade_stats"
+
+    def __init__(self, variant: str = LIVE_VARIANT, day_buckets: int = STATS_DAY_BUCKETS,
+                 week_buckets: int = STATS_WEEK_BUCKETS):
+        """
+        Args:
+            variant: Trade ledger aggregated ("live" or a shadow variant name)
+            day_buckets: Most recent days kept in by_day
+            week_buckets: Most recent ISO weeks kept in by_week
+        """
+        self.variant = variant
+        self.day_buckets = day_buckets
+        self.week_buckets = week_buckets
+        if variant != LIVE_VARIANT:
+            self.STATE_KEY = f"{TradeStatistics.STATE_KEY}:{variant}"
+        self._lock = threading.Lock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self.opened = 0
+        self.open = 0
+        self.totals = _empty_bucket()
+        self.by_day: Dict[str, Dict[str, float]] = {}
+        self.by_week: Dict[str, Dict[str, float]] = {}
+        self.by_direction: Dict[str, Dict[str, float]] = {}
+
+    # ===== EVENTS =====
+
+    def record_open(self) -> None:
+        with self._lock:
+            self.opened += 1
+            self.open += 1
+
+    def record_discard(self) -> None:
+        """Take back record_open for a trade that was never persisted"""
+        with self._lock:
+            self.opened = max(self.opened - 1, 0)
+            self.open = max(self.open - 1, 0)
+
+    def record_close(self, direction, status: TradeStatus, pl_usd: float, pips: float,
+                     closed_at: datetime, rr: Optional[float] = None) -> None:
+        """Add one closed trade to every bucket it belongs to"""
+        direction = TradeDirection(direction).value
+        day = closed_at.strftime("%Y-%m-%d")
+        with self._lock:
+            self.open = max(self.open - 1, 0)
+            for bucket in (self.totals,
+                           self.by_day.setdefault(day, _empty_bucket()),
+                           self.by_week.setdefault(week_key(day), _empty_bucket()),
+                           self.by_direction.setdefault(direction, _empty_bucket())):
+                self._add(bucket, 1, 1 if status == TradeStatus.CLOSED_WIN else 0,
+                          max(pl_usd, 0.0), max(-pl_usd, 0.0), pips, rr or 0.0, 1 if rr is not None else 0)
+            self._prune()
+
+    @staticmethod
+    def _add(bucket, closed, wins, profit, loss, pips, rr_sum, rr_count) -> None:
+        bucket["closed"] += closed
+        bucket["wins"] += wins
+        bucket["losses"] += closed - wins
+        bucket["gross_profit"] += profit
+        bucket["gross_loss"] += loss
+        bucket["pips"] += pips
+        bucket["rr_sum"] += rr_sum
+        bucket["rr_count"] += rr_count
+
+    @staticmethod
+    def _merge(target, bucket) -> None:
+        for field, value in bucket.items():
+            target[field] += value
+
+    def _prune(self) -> None:
+        """Drop the oldest day/week buckets beyond the retention (keys sort chronologically)"""
+        for buckets, keep in ((self.by_day, self.day_buckets), (self.by_week, self.week_buckets)):
+            if len(buckets) > keep:
+                for key in sorted(buckets)[:len(buckets) - keep]:
+                    del buckets[key]
+
+    # ===== READS =====
+
+    def summary(self, bucket: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Derived figures for one bucket (default: all-time totals)"""
+        with self._lock:
+            b = dict(bucket if bucket is not None else self.totals)
+        return {
+            "closed": b["closed"],
+            "wins": b["wins"],
+            "losses": b["losses"],
+            "win_rate": b["wins"] / b["closed"] * 100 if b["closed"] else 0,
+            "total_pl_usd": b["gross_profit"] - b["gross_loss"],
+            "gross_profit": b["gross_profit"],
+            "gross_loss": b["gross_loss"],
+            "profit_factor": b["gross_profit"] / b["gross_loss"] if b["gross_loss"] > 0 else 0,
+            "total_pips": b["pips"],
+            "avg_rr": b["rr_sum"] / b["rr_count"] if b["rr_count"] else 0,
+        }
+
+    def periods(self, kind: str = "day", limit: int = 7) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Most recent per-day or per-week summaries, newest first
+
+        Args:
+            kind: "day" or "week"
+            limit: Number of periods (only periods with closed trades exist)
+        """
+        buckets = self.by_day if kind == "day" else self.by_week
+        with self._lock:
+            recent = [(key, dict(buckets[key])) for key in sorted(buckets, reverse=True)[:limit]]
+        return [(key, self.summary(bucket)) for key, bucket in recent]
+
+    def direction_summaries(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            buckets = {direction: dict(bucket) for direction, bucket in self.by_direction.items()}
+        return {direction: self.summary(bucket) for direction, bucket in buckets.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy({"opened": self.opened, "open": self.open, "totals": self.totals,
+                                  "by_day": self.by_day, "by_week": self.by_week,
+                                  "by_direction": self.by_direction})
+
+    # ===== PERSISTENCE =====
+
+    def snapshot_mutation(self):
+        """Session callable writing the aggregate to BotState"""
+        value = self.to_dict()
+        return lambda session: session.merge(BotState(key=self.STATE_KEY, value=value))
+
+    def load(self, db: Session) -> "TradeStatistics":
+        """Restore from the BotState snapshot, or rebuild when there is none"""
+        row = db.get(BotState, self.STATE_KEY)
+        if row is None or not row.value:
+            return self.rebuild(db)
+        value = row.value
+        with self._lock:
+            self._reset()
+            self.opened = value.get("opened", 0)
+            self.open = value.get("open", 0)
+            self.totals.update(value.get("totals", {}))
+            self.by_day = {day: dict(_empty_bucket(), **bucket) for day, bucket in value.get("by_day", {}).items()}
+            if "by_week" in value:
+                self.by_week = {week: dict(_empty_bucket(), **bucket) for week, bucket in value["by_week"].items()}
+            else:
+                # Snapshot from before weekly buckets: derive them from the daily ones
+                for day, bucket in self.by_day.items():
+                    self._merge(self.by_week.setdefault(week_key(day), _empty_bucket()), bucket)
+            self.by_direction = {d: dict(_empty_bucket(), **bucket)
+                                 for d, bucket in value.get("by_direction", {}).items()}
+            self._prune()
+            self.loaded = True
+        return self
+
+    def rebuild(self, db: Session) -> "TradeStatistics":
+        """Recompute everything from the trades table with one grouped query"""
+        rr = case(
+            (Trade.direction == TradeDirection.BUY,
+             (Trade.tp_price - Trade.entry_price) / func.nullif(Trade.entry_price - Trade.sl_price, 0)),
+            else_=(Trade.entry_price - Trade.tp_price) / func.nullif(Trade.sl_price - Trade.entry_price, 0),
+        )
+        pl = func.coalesce(Trade.virtual_pl_usd, 0.0)
+        day = func.date(func.coalesce(Trade.exit_timestamp_utc, Trade.created_at))
+        rows = db.query(
+            Trade.direction, Trade.status, day,
+            func.count(Trade.id),
+            func.sum(case((pl > 0, pl), else_=0.0)),
+            func.sum(case((pl < 0, -pl), else_=0.0)),
+            func.sum(func.coalesce(Trade.pips_gained, 0.0)),
+            func.sum(func.coalesce(rr, 0.0)),
+            func.count(rr),
+        ).filter(
+            Trade.status.in_([TradeStatus.CLOSED_LOSE, TradeStatus.CLOSED_WIN]),
+            Trade.variant == self.variant
+        ).group_by(Trade.direction, Trade.status, day).all()
+        opened = db.query(func.count(Trade.id)).filter(Trade.variant == self.variant).scalar() or 0
+        open_count = db.query(func.count(Trade.id)).filter(
+            Trade.status == TradeStatus.OPEN, Trade.variant == self.variant
+        ).scalar() or 0
+
+        with self._lock:
+            self._reset()
+            self.opened = opened
+            self.open = open_count
+            for direction, status, close_day, count, profit, loss, pips, rr_sum, rr_count in rows:
+                wins = count if status == TradeStatus.CLOSED_WIN else 0
+                day_key = str(close_day)
+                for bucket in (self.totals,
+                               self.by_day.setdefault(day_key, _empty_bucket()),
+                               self.by_week.setdefault(week_key(day_key), _empty_bucket()),
+                               self.by_direction.setdefault(TradeDirection(direction).value, _empty_bucket())):
+                    self._add(bucket, count, wins, profit or 0.0, loss or 0.0,
+                              pips or 0.0, rr_sum or 0.0, rr_count or 0)
+            self._prune()
+            self.loaded = True
+        return self
+
+# Global trade statistics instance
+trade_stats = TradeStatistics()
@@ -5,33 +5,173 @@ Main Entry Point - Bot Initialization & Event Loop
 import asyncio
 import os
 import sys
+import time
+import uuid
 from datetime import datetime
-from flask import Flask, jsonify
 
 # Import all modules
 from config.settings import (
-    TELEGRAM_BOT_TOKEN, APP_PORT, APP_HOST, print_config, EVALUATION_MODE
+    TELEGRAM_BOT_TOKEN, TELEGRAM_API_BASE, print_config, EVALUATION_MODE, WS_ENABLED,
+    BAR_PERSIST_ENABLED, WARM_START_BARS, RETENTION_ENABLED,
+    PIPELINE_BAR_QUEUE_SIZE, PIPELINE_PERSIST_QUEUE_SIZE, PIPELINE_NOTIFY_QUEUE_SIZE, SYMBOLS,
+    ADMIN_USER_IDS, RIWAYAT_PAGE_SIZE, RIWAYAT_MAX_PAGE_SIZE, PERFORMA_DAYS, PERFORMA_WEEKS, COMMAND_CACHE_SECONDS,
+    CHART_ENABLED, CHART_TIMEFRAME, CHART_BARS
 )
-from data.db import init_db, SessionLocal
+from data.db import init_db, SessionLocal, ReadSessionLocal
+from data.bar_persister import bar_persister, load_recent_bars
+from data.db_writer import db_writer
+from data.retention import market_retention
+from data.trade_stats import trade_stats, risk_reward
+from data.models import TradeStatus
+from data.subscribers import subscriber_registry
+from data.trade_history import trade_page, encode_cursor, decode_cursor
 from utils.logger import get_logger, log_info, log_error
-from config.strategy import StrategyEngine, RiskManager
+from config.strategy import StrategyEngine, RiskManager, RiskState
+from utils.position_book import OpenPositionBook
 from services.rest_poller import rest_poller
+from services.ws_stream import WebSocketStream
+from services.scheduler import bar_scheduler
+from services.rate_limiter import RateLimiter, PRIORITY_LOW
+from services.pipeline import Pipeline, Stage, BLOCK, COALESCE, DROP_OLDEST
+from services.symbol_workers import SymbolWorkerPool, shard_symbols, worker_count
+from services.shadow import ShadowRunner
+from services.broadcast import broadcaster
+from services.chart_generator import chart_service, signal_overlays
+from services.http_server import AsyncHTTPServer, JSONSnapshot, Response
+from utils.indicators import SharedIndicatorCache
+from utils.price import DEFAULT_SYMBOL
+from utils.render_cache import RenderCache
+from utils.data_mapper import format_trade_history, format_performance
 
 logger = get_logger()
 
-# Flask app for health checks
-app = Flask(__name__)
-
 # Global state
 bot_start_time = datetime.utcnow()
 bot_status = "INITIALIZING"
 api_health = {}
+risk_state = RiskState()
+trading_pipeline = None
+symbol_workers = None
+shadow_runner = None
+signal_listeners = []  # callables(signal) run by the notify stage
+command_latency = {}  # Telegram command -> handler latency metrics
+command_cache = RenderCache(COMMAND_CACHE_SECONDS)  # rendered /riwayat and /performa replies
+
+def merge_wakeups(pending, incoming):
+    """Coalesce scheduler wake-ups: a bar close absorbs quotes and unions timeframes"""
+    if pending["kind"] == "bar" and incoming["kind"] == "bar":
+        return dict(incoming, timeframes=sorted(set(pending["timeframes"]) | set(incoming["timeframes"])))
+    return pending if pending["kind"] == "bar" else incoming
 
-@app.route("/health", methods=["GET"])
-def health_check():
-    """Health check endpoint for Koyeb"""
-    global api_health, bot_status
+def strategy_inputs(symbols, local_feed: bool, evaluated: dict):
+    """
+    Pipeline item for the signal stage from the bar caches
     
+    Args:
+        symbols: Symbols of this shard
+        local_feed: Bars of DEFAULT_SYMBOL come from streamed ticks
+        evaluated: symbol -> last closed streamed M1 bar already evaluated (updated here)
+    
+    Returns:
+        Analysis item (plus tick prices for symbols without a new closed bar), a quote item, or None
+    """
+    analyses = {}
+    prices = {}
+    for symbol in symbols:
+        local = local_feed and symbol == DEFAULT_SYMBOL
+        # Indicators only ever see completed bars; the forming bar just supplies the live price
+        live_bar = local and (rest_poller.get_local_bars("M1", include_current=True) or [None])[-1]
+        m1_data = (local and rest_poller.get_local_bars("M1")) or rest_poller.get_cached_data("M1", symbol)
+        m5_data = (local and rest_poller.get_local_bars("M5")) or rest_poller.get_cached_data("M5", symbol)
+        if not (m1_data and m5_data):
+            continue
+        latest = live_bar or m1_data[-1]
+        if local:
+            closed_at = m1_data[-1].get("timestamp_utc")
+            if evaluated.get(symbol) == closed_at:
+                # No bar closed since the last evaluation: exit checks on the tick only
+                prices[symbol] = latest.get("close", 0)
+                continue
+            evaluated[symbol] = closed_at
+        analyses[symbol] = {
+            "m1_closes": [d.get("close", 0) for d in m1_data],
+            "m1_highs": [d.get("high", 0) for d in m1_data],
+            "m1_lows": [d.get("low", 0) for d in m1_data],
+            "m1_volumes": [d.get("volume", 0) for d in m1_data],
+            "m5_closes": [d.get("close", 0) for d in m5_data],
+            "m5_highs": [d.get("high", 0) for d in m5_data],
+            "m5_lows": [d.get("low", 0) for d in m5_data],
+            "current_price": latest.get("close", 0),
+            "bid": latest.get("bid"),
+            "ask": latest.get("ask"),
+            "timestamp": datetime.utcnow()
+        }
+    if analyses:
+        return {"kind": "analysis", "analyses": analyses, "prices": prices}
+    if prices:
+        return {"kind": "quote", "prices": prices, "timestamp": datetime.utcnow()}
+    return None
+
+# ===== CHARTS =====
+# Rendered off-process after the text went out; the photo follows as its own message
+
+def chart_bars(symbol: str) -> list:
+    """Bars a chart of symbol shows (empty when charts are off)"""
+    return rest_poller.get_cached_data(CHART_TIMEFRAME, symbol)[-CHART_BARS:] if CHART_ENABLED else []
+
+def attach_chart(item, caption: str, bars=None) -> None:
+    """Queue the chart of a signal / closed trade (no-op until chart_service is started)"""
+    bars = chart_bars(item["symbol"]) if bars is None else bars
+    chart_service.schedule(item["symbol"], CHART_TIMEFRAME, bars, overlays=signal_overlays(item),
+                           on_ready=lambda path: broadcaster.publish_photo(path, caption))
+
+def publish_signal_chart(signal, bars=None) -> None:
+    attach_chart(signal, f"{signal['symbol']} {signal['direction']} @ {signal['entry_price']}", bars)
+
+def publish_trade_result(trade, bars=None) -> None:
+    broadcaster.publish_trade_result(trade)
+    attach_chart(trade, f"{trade['symbol']} {trade['direction']} {trade['status']} @ {trade['exit_price']}", bars)
+
+def relay_shard_event(event) -> None:
+    """
+    Broadcast a signal / close forwarded by a symbol worker (runs on the pool's relay thread)
+    
+    Only this process broadcasts, so /monitor and /stopmonitor apply to every shard at once.
+    Its trade_stats count every shard's trades, so /status and /performa cover all symbols.
+    """
+    kind, item, bars = event
+    if kind == "signal":
+        trade_stats.record_open()
+        broadcaster.publish_signal(item)
+        publish_signal_chart(item, bars)
+    elif kind == "trade":
+        trade_stats.record_close(item["direction"], TradeStatus(item["status"]), item["virtual_pl_usd"],
+                                 item["pips_gained"], item.get("closed_at") or datetime.utcnow(),
+                                 risk_reward(item["direction"], item["entry_price"], item.get("sl_price"),
+                                             item.get("tp_price")))
+        publish_trade_result(item, bars)
+    else:
+        return
+    # Snapshot commits with this process's next tick
+    db_writer.submit(trade_stats.snapshot_mutation())
+
+def merge_analysis(pending, incoming):
+    """Coalesce strategy inputs: newest bar snapshot per symbol wins, a quote never replaces one"""
+    if incoming["kind"] == "quote" and pending["kind"] == "analysis":
+        return pending
+    if incoming["kind"] == "analysis" and pending["kind"] == "analysis":
+        # A streamed tick may carry fewer symbols: keep the pending closed-bar snapshots of the others
+        return dict(incoming, analyses={**pending["analyses"], **incoming["analyses"]},
+                    prices={symbol: price for symbol, price in
+                            {**pending.get("prices", {}), **incoming.get("prices", {})}.items()
+                            if symbol not in incoming["analyses"]})
+    return incoming
+
+# ===== HTTP ENDPOINTS =====
+# Served from the trading loop: handlers only read in-memory state
+
+def health_check() -> Response:
+    """Health check endpoint for Koyeb (never touches the DB)"""
     uptime = (datetime.utcnow() - bot_start_time).total_seconds()
     
     response = {
@@ -40,201 +180,517 @@ def health_check():
         "timestamp": datetime.utcnow().isoformat(),
         "evaluation_mode": EVALUATION_MODE,
         "telegram_configured": bool(TELEGRAM_BOT_TOKEN),
+        "scheduler": bar_scheduler.get_metrics(),
+        "rate_limits": rest_poller.rate_limiter.get_status(),
+        "bar_persister": bar_persister.get_stats(),
+        "db_writer": db_writer.get_stats(),
+        "retention": market_retention.get_stats(),
+        "broadcast": broadcaster.get_stats(),
+        "charts": chart_service.get_stats(),
+        "telegram_commands": dict(command_latency),
+        "command_cache": command_cache.get_stats(),
+        "http": http_server.get_stats(),
+        "pipeline": trading_pipeline.get_metrics() if trading_pipeline else {},
+        "symbols": symbol_workers.get_status() if symbol_workers else {"shards": [SYMBOLS], "workers": []},
+        "risk": risk_state.to_dict(),
+        "shadow_variants": list(shadow_runner.variants) if shadow_runner else [],
     }
     
     is_healthy = bot_status in ["RUNNING", "HEALTHY"]
     status_code = 200 if is_healthy else 503
     
-    return jsonify(response), status_code
+    return Response.json(response, status_code)
 
-@app.route("/status", methods=["GET"])
-def get_status():
-    """Get detailed bot status"""
+def build_status() -> dict:
+    """Detailed bot status from the materialized aggregates"""
     uptime = (datetime.utcnow() - bot_start_time).total_seconds()
+    summary = trade_stats.summary()
+    return {
+        "status": bot_status,
+        "uptime_hours": round(uptime / 3600, 2),
+        "evaluation_mode": EVALUATION_MODE,
+        "trades": {
+            "open": trade_stats.open,
+            "total": trade_stats.opened,
+            "win_rate": round(summary["win_rate"], 2),
+            "total_pl_usd": round(summary["total_pl_usd"], 2)
+        },
+        # Live and shadow ledgers side by side
+        "variants": shadow_runner.compare(live=trade_stats) if shadow_runner else {},
+    }
+
+def refresh_status() -> None:
+    """Re-serialize /status (called by the pipeline after each tick)"""
+    status_snapshot.update(build_status())
+
+def get_status() -> Response:
+    """Get detailed bot status (pre-serialized snapshot with ETag)"""
+    return status_snapshot.response()
+
+status_snapshot = JSONSnapshot()
+http_server = AsyncHTTPServer({"/health": health_check, "/status": get_status})
+
+def timed_command(name: str, handler):
+    """Wrap a command handler to record its latency in command_latency"""
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        try:
+            await handler(update, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            metrics = command_latency.setdefault(name, {"count": 0, "last_ms": 0.0, "avg_ms": 0.0, "max_ms": 0.0})
+            metrics["count"] += 1
+            metrics["last_ms"] = round(elapsed_ms, 2)
+            metrics["max_ms"] = round(max(metrics["max_ms"], elapsed_ms), 2)
+            metrics["avg_ms"] = round(metrics["avg_ms"] + (elapsed_ms - metrics["avg_ms"]) / metrics["count"], 2)
+    return wrapper
+
+def render_history(limit: int, cursor_text: str = "", page: int = 1):
+    """
+    /riwayat page text and its "older" button, read on a read-only connection
+    
+    Returns:
+        (text, InlineKeyboardMarkup or None)
+    """
+    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     
+    db = ReadSessionLocal()
     try:
-        db = SessionLocal()
-        from data.models import Trade, TradeStatus
-        
-        open_trades = db.query(Trade).filter(Trade.status == TradeStatus.OPEN).count()
-        total_trades = db.query(Trade).count()
-        
-        # Calculate win rate
-        closed_trades = db.query(Trade).filter(
-            Trade.status.in_([TradeStatus.CLOSED_LOSE, TradeStatus.CLOSED_WIN])
-        ).all()
-        win_count = sum(1 for t in closed_trades if t.status == TradeStatus.CLOSED_WIN)
-        win_rate = (win_count / len(closed_trades) * 100) if closed_trades else 0
-        
-        # Calculate total P/L
-        total_pl = sum(t.virtual_pl_usd or 0 for t in closed_trades)
-        
+        trades, next_cursor = trade_page(db, limit, decode_cursor(cursor_text) if cursor_text else None)
+    finally:
         db.close()
-        
-        return jsonify({
-            "status": bot_status,
-            "uptime_hours": round(uptime / 3600, 2),
-            "evaluation_mode": EVALUATION_MODE,
-            "trades": {
-                "open": open_trades,
-                "total": total_trades,
-                "win_rate": round(win_rate, 2),
-                "total_pl_usd": round(total_pl, 2)
-            }
-        }), 200
-    except Exception as e:
-        logger.error(f"Status endpoint error: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    markup = None
+    if next_cursor is not None:
+        # callback data is capped at 64 bytes: "rw:<limit>:<page>:<cursor>"
+        markup = InlineKeyboardMarkup([[InlineKeyboardButton(
+            "⬅️ Older", callback_data=f"rw:{limit}:{page + 1}:{encode_cursor(next_cursor)}")]])
+    return format_trade_history(trades, page), markup
 
-def run_telegram_bot():
-    """Run Telegram bot (blocking, should be in separate thread)"""
-    try:
-        from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-        from telegram import Update
-        
-        if not TELEGRAM_BOT_TOKEN:
-            logger.warning("TELEGRAM_BOT_TOKEN not set. Bot disabled.")
+def render_performance() -> str:
+    """/performa text from the in-memory aggregates (no DB access)"""
+    return format_performance(
+        trade_stats.summary(),
+        trade_stats.periods("day", PERFORMA_DAYS),
+        trade_stats.periods("week", PERFORMA_WEEKS),
+        trade_stats.direction_summaries(),
+    )
+
+def build_telegram_app():
+    """
+    Telegram Application with the command handlers
+    
+    Handlers run on the trading event loop, so they read live state
+    (risk_state, trade_stats, subscriber_registry) directly.
+    
+    Returns:
+        Application, or None when no token is configured
+    """
+    from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
+    from telegram import Update
+    
+    if not TELEGRAM_BOT_TOKEN:
+        logger.warning("TELEGRAM_BOT_TOKEN not set. Bot disabled.")
+        return None
+    
+    # Create application
+    app_tg = Application.builder().token(TELEGRAM_BOT_TOKEN).base_url(f"{TELEGRAM_API_BASE}/bot").build()
+    
+    # Add command handlers
+    async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.message.reply_text(
+            "👋 Welcome to XauScalp Sentinel!\n\n"
+            "🤖 XAUUSD Trading Signal Bot (Evaluation Mode)\n\n"
+            "Commands:\n"
+            "/help - Show all commands\n"
+            "/monitor - Subscribe to signals\n"
+            "/status - Bot status\n"
+        )
+    
+    async def help_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.message.reply_text(
+            "📚 Available Commands:\n\n"
+            "/start - Welcome message\n"
+            "/monitor - Subscribe to trading signals\n"
+            "/status - View bot status\n"
+            "/riwayat - View recent trades (default 10)\n"
+            "/health - API health status\n\n"
+            "Admin Commands (if authorized):\n"
+            "/performa - Performance report\n"
+            "/settings - Modify parameters\n"
+        )
+    
+    async def monitor_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user = update.effective_user
+        subscriber_registry.subscribe(update.effective_chat.id, user.username if user else None)
+        await update.message.reply_text(
+            f"✅ Monitoring {', '.join(SYMBOLS)} signals activated!\n\n"
+            "You will receive notifications for:\n"
+            "📈 BUY signals\n"
+            "📉 SELL signals\n"
+            "🎯 Trade closures\n\n"
+            "Use /stopmonitor to unsubscribe."
+        )
+    
+    async def stopmonitor_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if subscriber_registry.unsubscribe(update.effective_chat.id):
+            await update.message.reply_text("🔕 Monitoring stopped. Use /monitor to subscribe again.")
+        else:
+            await update.message.reply_text("You are not subscribed. Use /monitor to subscribe.")
+    
+    async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        uptime = (datetime.utcnow() - bot_start_time).total_seconds() / 3600
+        summary = trade_stats.summary()
+        await update.message.reply_text(
+            f"🤖 Bot Status Report\n\n"
+            f"Status: {bot_status}\n"
+            f"Uptime: {uptime:.1f}h\n"
+            f"Eval Mode: {EVALUATION_MODE}\n"
+            f"Mode: {'Evaluation' if EVALUATION_MODE else 'Production'}\n\n"
+            f"Open trades: {trade_stats.open}\n"
+            f"Trades today: {risk_state.get_trades_today()}\n"
+            f"Win rate: {summary['win_rate']:.1f}% ({summary['closed']} closed)\n"
+            f"P/L: ${summary['total_pl_usd']:.2f}\n"
+            f"Subscribers: {subscriber_registry.count()}\n"
+        )
+    
+    async def riwayat_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        limit = RIWAYAT_PAGE_SIZE
+        if context.args and context.args[0].isdigit():
+            limit = max(1, min(int(context.args[0]), RIWAYAT_MAX_PAGE_SIZE))
+        # Query off the loop; identical requests within the TTL share one render
+        text, markup = await command_cache.get(
+            ("riwayat", limit, ""), lambda: asyncio.to_thread(render_history, limit))
+        await update.message.reply_text(text, reply_markup=markup)
+    
+    async def riwayat_page_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        await query.answer()
+        _, limit, page, cursor_text = query.data.split(":", 3)
+        limit = max(1, min(int(limit), RIWAYAT_MAX_PAGE_SIZE))
+        page = int(page)
+        text, markup = await command_cache.get(
+            ("riwayat", limit, cursor_text), lambda: asyncio.to_thread(render_history, limit, cursor_text, page))
+        await query.edit_message_text(text, reply_markup=markup)
+    
+    async def performa_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if ADMIN_USER_IDS and update.effective_user.id not in ADMIN_USER_IDS:
+            await update.message.reply_text("⛔ /performa is for admins only.")
             return
         
-        # Create application
-        app_tg = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
-        
-        # Add command handlers
-        async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-            await update.message.reply_text(
-                "👋 Welcome to XauScalp Sentinel!\n\n"
-                "🤖 XAUUSD Trading Signal Bot (Evaluation Mode)\n\n"
-                "Commands:\n"
-                "/help - Show all commands\n"
-                "/monitor - Subscribe to signals\n"
-                "/status - Bot status\n"
-            )
-        
-        async def help_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-            await update.message.reply_text(
-                "📚 Available Commands:\n\n"
-                "/start - Welcome message\n"
-                "/monitor - Subscribe to XAUUSD signals\n"
-                "/status - View bot status\n"
-                "/riwayat - View recent trades (default 10)\n"
-                "/health - API health status\n\n"
-                "Admin Commands (if authorized):\n"
-                "/performa - Performance report\n"
-                "/settings - Modify parameters\n"
-            )
-        
-        async def monitor_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-            await update.message.reply_text(
-                "✅ Monitoring XAUUSD signals activated!\n\n"
-                "You will receive notifications for:\n"
-                "📈 BUY signals\n"
-                "📉 SELL signals\n"
-                "🎯 Trade closures\n\n"
-                "Use /stopmonitor to unsubscribe."
-            )
-        
-        async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-            uptime = (datetime.utcnow() - bot_start_time).total_seconds() / 3600
-            await update.message.reply_text(
-                f"🤖 Bot Status Report\n\n"
-                f"Status: {bot_status}\n"
-                f"Uptime: {uptime:.1f}h\n"
-                f"Eval Mode: {EVALUATION_MODE}\n"
-                f"Mode: {'Evaluation' if EVALUATION_MODE else 'Production'}\n"
-            )
-        
-        # Register handlers
-        app_tg.add_handler(CommandHandler("start", start_handler))
-        app_tg.add_handler(CommandHandler("help", help_handler))
-        app_tg.add_handler(CommandHandler("monitor", monitor_handler))
-        app_tg.add_handler(CommandHandler("status", status_handler))
-        
-        # Start polling
-        logger.info("Starting Telegram bot polling...")
-        app_tg.run_polling()
-        
+        async def render():
+            return render_performance()
+        await update.message.reply_text(await command_cache.get(("performa",), render))
+    
+    # Register handlers
+    handlers = {
+        "start": start_handler,
+        "help": help_handler,
+        "monitor": monitor_handler,
+        "stopmonitor": stopmonitor_handler,
+        "status": status_handler,
+        "riwayat": riwayat_handler,
+        "performa": performa_handler,
+    }
+    for name, handler in handlers.items():
+        app_tg.add_handler(CommandHandler(name, timed_command(name, handler)))
+    app_tg.add_handler(CallbackQueryHandler(timed_command("riwayat_page", riwayat_page_handler), pattern=r"^rw:"))
+    return app_tg
+
+async def start_telegram_bot():
+    """
+    Initialize the Application and start polling as tasks of the running loop
+    
+    Returns:
+        The running Application, or None if disabled or it failed to start
+    """
+    try:
+        app_tg = build_telegram_app()
+        if app_tg is None:
+            return None
+        await app_tg.initialize()
+        await app_tg.start()
+        await app_tg.updater.start_polling()
+        logger.info("Telegram bot polling started")
+        return app_tg
     except Exception as e:
         logger.error(f"Telegram bot error: {str(e)}")
+        return None
+
+async def stop_telegram_bot(app_tg) -> None:
+    if app_tg is None:
+        return
+    try:
+        if app_tg.updater.running:
+            await app_tg.updater.stop()
+        if app_tg.running:
+            await app_tg.stop()
+        await app_tg.shutdown()
+    except Exception as e:
+        logger.error(f"Telegram bot shutdown error: {str(e)}")
 
-async def main_loop():
-    """Main async loop for signal generation and trade management"""
-    global bot_status
+async def main_loop(symbols=None, worker_index: int = 0, shard_count: int = 1, events=None):
+    """
+    Main async loop for signal generation and trade management
+    
+    Args:
+        symbols: Instruments this process trades (default SYMBOLS)
+        worker_index: Shard index when symbols are split across processes
+        shard_count: Number of shards (risk limits are checked on all of them together)
+        events: Queue to the parent process (symbol workers forward signals and closes instead of broadcasting)
+    """
+    global bot_status, shadow_runner
     
-    logger.info("Starting main trading loop...")
+    symbols = list(symbols or SYMBOLS)
+    logger.info(f"Starting main trading loop for {', '.join(symbols)}...")
     bot_status = "RUNNING"
     
+    if worker_index:
+        # Each shard keeps its own counters so processes never overwrite each other
+        risk_state.STATE_KEY = RiskState.shard_key(worker_index)
+        trade_stats.STATE_KEY = f"{trade_stats.STATE_KEY}:{worker_index}"
+    # ...and the daily trade/loss and open-position limits add up every shard's rows
+    risk_state.peer_keys = [RiskState.shard_key(index) for index in range(shard_count) if index != worker_index]
+    if shard_count > 1:
+        # Every shard polls with the same API keys: each gets its share of the provider plans
+        rest_poller.rate_limiter = RateLimiter(rest_poller.rate_limiter.limits, shares=shard_count)
+    
+    # Reads use this session; trade inserts/updates go through the writer thread
     db = SessionLocal()
-    strategy = StrategyEngine(db)
-    risk_manager = RiskManager(db)
+    db_writer.start()
+    
+    # Risk checks read in-memory counters restored from the last BotState snapshot
+    risk_state.load(db, symbols=symbols if shard_count > 1 else None)
+    trade_stats.load(db)
+    if events is None:
+        subscriber_registry.load(db)
     
-    while True:
+    # Health/status endpoints share this loop (one process only)
+    if not worker_index:
+        refresh_status()
         try:
-            # Fetch market data
-            market_data_m1 = await rest_poller.get_market_data(timeframe="M1")
-            market_data_m5 = await rest_poller.get_market_data(timeframe="M5")
-            
-            if market_data_m1:
-                rest_poller.add_to_cache(market_data_m1, "M1")
-            if market_data_m5:
-                rest_poller.add_to_cache(market_data_m5, "M5")
-            
-            # Get cached data for analysis
-            m1_data = rest_poller.get_cached_data("M1")
-            m5_data = rest_poller.get_cached_data("M5")
-            
-            if m1_data and m5_data:
-                # Prepare data for strategy
-                analysis_data = {
-                    "m1_closes": [d.get("close", 0) for d in m1_data],
-                    "m1_highs": [d.get("high", 0) for d in m1_data],
-                    "m1_lows": [d.get("low", 0) for d in m1_data],
-                    "m1_volumes": [d.get("volume", 0) for d in m1_data],
-                    "m5_closes": [d.get("close", 0) for d in m5_data],
-                    "m5_highs": [d.get("high", 0) for d in m5_data],
-                    "m5_lows": [d.get("low", 0) for d in m5_data],
-                    "current_price": m1_data[-1].get("close", 0),
-                    "bid": m1_data[-1].get("bid"),
-                    "ask": m1_data[-1].get("ask"),
-                    "timestamp": datetime.utcnow()
-                }
-                
-                # Check risk conditions
-                can_trade, reason = risk_manager.can_generate_signal()
-                if not can_trade:
-                    logger.warning(f"Trading paused: {reason}")
-                else:
-                    # Generate signal
-                    signal = strategy.generate_signal(analysis_data)
-                    if signal:
-                        # Save signal to database
-                        from data.models import Trade, TradeDirection
-                        trade = Trade(
-                            signal_id=signal["signal_id"],
-                            direction=TradeDirection[signal["direction"]],
-                            entry_price=signal["entry_price"],
-                            sl_price=signal["sl_price"],
-                            tp_price=signal["tp_price"],
-                            signal_timestamp_utc=datetime.utcnow(),
-                            confidence_score=signal["confidence_score"],
-                        )
-                        db.add(trade)
-                        db.commit()
-                        logger.info(f"Signal saved: {signal['signal_id']}")
-                
-                # Update open trades
-                strategy.update_trades(analysis_data)
-            
-            # Sleep before next iteration (polling interval)
-            await asyncio.sleep(10)
+            await http_server.start()
+        except OSError as e:
+            logger.error(f"HTTP server failed to start: {str(e)}")
+    
+    # Signals and closures fan out to subscribers from a task of their own (parent
+    # process only: workers hand theirs over with the bars for the chart)
+    on_close = publish_trade_result
+    if events is not None:
+        on_close = lambda trade: events.put(("trade", trade, chart_bars(trade["symbol"])))
+        signal_listeners.append(lambda signal: events.put(("signal", signal, chart_bars(signal["symbol"]))))
+    elif TELEGRAM_BOT_TOKEN:
+        broadcaster.start()
+        if broadcaster.publish_signal not in signal_listeners:
+            signal_listeners.append(broadcaster.publish_signal)
+        if CHART_ENABLED:
+            chart_service.start()
+            if publish_signal_chart not in signal_listeners:
+                signal_listeners.append(publish_signal_chart)
+    
+    # Per-symbol open positions (in memory) and strategy state (cooldowns, levels)
+    position_books = {symbol: OpenPositionBook(symbol=symbol).load(db) for symbol in symbols}
+    # One memoizing calculator: shadow variants reuse the live engines' indicator series
+    indicator_cache = SharedIndicatorCache()
+    strategies = {
+        symbol: StrategyEngine(db, writer=db_writer, risk_state=risk_state, position_book=position_books[symbol],
+                               stats=trade_stats, symbol=symbol, calc=indicator_cache,
+                               on_close=on_close)
+        for symbol in symbols
+    }
+    risk_manager = RiskManager(db, state=risk_state)
+    
+    # Paper-traded parameter sets fed from the same snapshots (SHADOW_VARIANTS)
+    shadow_runner = ShadowRunner(db, symbols, writer=db_writer, calc=indicator_cache,
+                                 key_suffix=f":{worker_index}" if worker_index else "").load(db)
+    
+    # Resume from persisted history so indicators continue where they stopped
+    if WARM_START_BARS:
+        for symbol in symbols:
+            for timeframe in ("M1", "M5"):
+                try:
+                    bars = load_recent_bars(timeframe, WARM_START_BARS, ticker=symbol)
+                    rest_poller.warm_start(bars, timeframe, symbol)
+                    logger.info(f"Warm start: {len(bars)} {symbol} {timeframe} bars loaded")
+                except Exception as e:
+                    logger.warning(f"Warm start failed for {symbol} {timeframe}: {str(e)}")
+    
+    # Completed bars are written to MarketDataCache off the event loop
+    if BAR_PERSIST_ENABLED:
+        bar_persister.start()
+        rest_poller.bar_listeners.append(bar_persister.enqueue)
+    
+    # Roll up and expire old bars in small batches on its own connection (one process only)
+    if RETENTION_ENABLED and not worker_index:
+        market_retention.start()
+    
+    # Optional push feed for the default symbol; REST polling stays as fallback while it is stale
+    stream = None
+    last_local_bar = {}  # symbol -> last closed streamed M1 bar the strategy has evaluated
+    if WS_ENABLED and DEFAULT_SYMBOL in symbols:
+        stream = WebSocketStream(
+            on_quote=rest_poller.add_quote,
+            on_bar=lambda bar: rest_poller.add_to_cache(bar, bar.get("timeframe", "M1")),
+        )
+        stream.start()
+    
+    # ===== PIPELINE STAGES =====
+    # ingest -> bars -> signal -> persist -> notify (-> shadow), each its own
+    # task, so a slow fetch no longer holds up trade management or DB commits
+    
+    async def ingest(wakeup):
+        """Fetch what the wake-up calls for, for every symbol"""
+        if wakeup["kind"] == "stream":
+            # Bars built locally from pushed ticks (pushed bars land in the REST cache)
+            return {"kind": "bars", "fetched": {}, "local": True}
+        if wakeup["kind"] == "quote":
+            # Between bar closes only manage open trades from a spot quote
+            quotes = await asyncio.gather(*[rest_poller.get_quote(symbol, priority=PRIORITY_LOW)
+                                            for symbol in symbols])
+            prices = {symbol: quote["price"] for symbol, quote in zip(symbols, quotes)
+                      if quote and quote.get("price")}
+            if prices:
+                return {"kind": "quote", "prices": prices, "timestamp": datetime.utcnow()}
+            return None
+        
+        # Fetch only the timeframes whose bar just closed (batched across symbols)
+        fetched = {}
+        if "M1" in wakeup["timeframes"]:
+            fetched["M1"] = await rest_poller.get_market_data_batch(symbols, "M1")
+            if wakeup["bar_close"]:
+                bar_scheduler.observe_bar(fetched["M1"].get(symbols[0]), wakeup["bar_close"])
+        if "M5" in wakeup["timeframes"] or not all(rest_poller.get_cached_data("M5", symbol) for symbol in symbols):
+            fetched["M5"] = await rest_poller.get_market_data_batch(symbols, "M5")
+        return {"kind": "bars", "fetched": fetched}
+    
+    def build_bars(item):
+        """Update the bar caches and assemble the strategy input per symbol"""
+        if item["kind"] == "quote":
+            return item
+        for timeframe, bars in item["fetched"].items():
+            for symbol, bar in bars.items():
+                if bar:
+                    rest_poller.add_to_cache(bar, timeframe, symbol)
+        
+        return strategy_inputs(symbols, item.get("local"), last_local_bar)
+    
+    def evaluate(item):
+        """Indicators, risk checks, signal generation and exit checks"""
+        # End the previous read snapshot so commits from the writer are visible
+        db.rollback()
+        
+        if item["kind"] == "quote":
+            for symbol, price in item["prices"].items():
+                strategies[symbol].update_trades({"current_price": price, "timestamp": item["timestamp"]})
+            return dict(item, signals=[])
+        
+        for symbol, price in item.get("prices", {}).items():
+            strategies[symbol].update_trades({"current_price": price, "timestamp": datetime.utcnow()})
+        
+        signals = []
+        for symbol, analysis_data in item["analyses"].items():
+            strategy = strategies[symbol]
+            can_trade, reason = risk_manager.can_generate_signal()
+            if not can_trade:
+                logger.warning(f"Trading paused: {reason}")
+            else:
+                signal = strategy.generate_signal(analysis_data)
+                if signal:
+                    from data.models import Trade, TradeDirection
+                    trade = Trade(
+                        id=str(uuid.uuid4()),
+                        signal_id=signal["signal_id"],
+                        ticker=symbol,
+                        direction=TradeDirection[signal["direction"]],
+                        entry_price=signal["entry_price"],
+                        sl_price=signal["sl_price"],
+                        tp_price=signal["tp_price"],
+                        signal_timestamp_utc=datetime.utcnow(),
+                        confidence_score=signal["confidence_score"],
+                    )
+                    strategy.open_trade(trade)
+                    signals.append(signal)
             
-        except Exception as e:
-            logger.error(f"Main loop error: {str(e)}")
-            await asyncio.sleep(5)
+            # Update open trades
+            strategy.update_trades(analysis_data)
+        return dict(item, signals=signals)
+    
+    def persist(item):
+        """Everything this tick changed commits in one transaction"""
+        if item["signals"]:
+            db_writer.submit(risk_state.snapshot_mutation())
+            db_writer.submit(trade_stats.snapshot_mutation())
+        db_writer.commit_tick()
+        refresh_status()
+        return item if item["signals"] or shadow_runner else None
     
-    db.close()
+    def notify(item):
+        for signal in item["signals"]:
+            logger.info(f"Signal queued: {signal['symbol']} {signal['signal_id']}")
+            for listener in signal_listeners:
+                try:
+                    listener(signal)
+                except Exception as e:
+                    logger.error(f"Signal listener error: {str(e)}")
+        # Shadows run after live signals are out, on the very same snapshot
+        return item if shadow_runner else None
+    
+    def shadow(item):
+        for signal in shadow_runner.process(item):
+            logger.info(f"Shadow signal: {signal['variant']} {signal['symbol']} {signal['direction']}")
+        # Shadow trades commit with the next tick's persist stage
+        refresh_status()
+    
+    stages = [
+        # Only the latest wake-up matters, but a pending bar close keeps its timeframes
+        Stage("ingest", ingest, maxsize=1, policy=COALESCE, merge=merge_wakeups),
+        # Fetched bars must all reach the cache
+        Stage("bars", build_bars, maxsize=PIPELINE_BAR_QUEUE_SIZE, policy=BLOCK),
+        # Strategy input is a full snapshot: evaluate only the newest one
+        Stage("signal", evaluate, maxsize=1, policy=COALESCE, merge=merge_analysis),
+        Stage("persist", persist, maxsize=PIPELINE_PERSIST_QUEUE_SIZE, policy=BLOCK),
+        Stage("notify", notify, maxsize=PIPELINE_NOTIFY_QUEUE_SIZE, policy=DROP_OLDEST),
+    ]
+    if shadow_runner:
+        # Shadows never hold up the live path: a backlog collapses to the newest snapshot
+        stages.append(Stage("shadow", shadow, maxsize=1, policy=COALESCE, merge=merge_analysis))
+    
+    global trading_pipeline
+    trading_pipeline = Pipeline(stages).start()
+    
+    # Telegram commands share this loop with the pipeline (one process only)
+    telegram_app = None if worker_index else await start_telegram_bot()
+    
+    # First pass fetches every timeframe, later passes follow the scheduler
+    wakeup = {"kind": "bar", "bar_close": None, "timeframes": ["M1", "M5"]}
+    
+    try:
+        while True:
+            streaming = stream is not None and stream.check_health()
+            await trading_pipeline.submit({"kind": "stream"} if streaming else wakeup)
+            
+            # Wake on the next pushed tick, or at the next scheduled bar close / quote poll
+            if streaming:
+                await stream.wait_for_update(timeout=10)
+            else:
+                wakeup = await bar_scheduler.wait_next()
+    finally:
+        await stop_telegram_bot(telegram_app)
+        await http_server.stop()
+        await trading_pipeline.stop()
+        # Flush the last tick's trade writes and queued bars, also when cancelled (Ctrl+C)
+        if stream is not None:
+            stream.stop()
+        market_retention.stop()
+        bar_persister.stop()
+        db_writer.stop()
+        db.close()
+        await chart_service.stop()
+        await broadcaster.stop()
 
 def main():
     """Main entry point"""
+    global symbol_workers
+    
     try:
         print("\n" + "="*60)
         print("🤖 XauScalp Sentinel - XAUUSD Trading Signal Bot")
@@ -245,25 +701,18 @@ def main():
         init_db()
         log_info("Bot initialization complete")
         
-        # Run health check endpoint in Flask (non-blocking)
-        import threading
-        flask_thread = threading.Thread(
-            target=lambda: app.run(host=APP_HOST, port=APP_PORT, debug=False, use_reloader=False),
-            daemon=True
-        )
-        flask_thread.start()
-        log_info(f"Health check endpoint started on {APP_HOST}:{APP_PORT}")
-        
-        # Run Telegram bot in separate thread
-        tg_thread = threading.Thread(target=run_telegram_bot, daemon=True)
-        tg_thread.start()
-        log_info("Telegram bot thread started")
+        # Shard symbols across processes when one event loop is not enough
+        shards = shard_symbols(SYMBOLS, worker_count(SYMBOLS))
+        if len(shards) > 1:
+            symbol_workers = SymbolWorkerPool(shards, on_event=relay_shard_event).start()
         
-        # Run main trading loop
-        asyncio.run(main_loop())
+        # Run main trading loop (shard 0 in this process)
+        asyncio.run(main_loop(shards[0], shard_count=len(shards)))
         
     except KeyboardInterrupt:
         logger.info("Bot shutdown requested")
+        if symbol_workers is not None:
+            symbol_workers.stop()
         sys.exit(0)
     except Exception as e:
         log_error(f"Fatal error: {str(e)}", e)
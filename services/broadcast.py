@@ -0,0 +1,295 @@
+"""
+Telegram Broadcast Dispatcher
+Fans each signal / trade result out to every subscriber through the Bot API,
+within Telegram's global and per-chat rate limits, off the trading path
+"""
+
+import asyncio
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import httpx
+from config.settings import (
+    TELEGRAM_BOT_TOKEN, TELEGRAM_API_BASE, BROADCAST_GLOBAL_RATE, BROADCAST_PER_CHAT_INTERVAL_SECONDS,
+    BROADCAST_CONCURRENCY, BROADCAST_QUEUE_SIZE, BROADCAST_MAX_RETRIES
+)
+from data.subscribers import SubscriberRegistry, subscriber_registry
+from services.rate_limiter import TokenBucket
+from utils.data_mapper import format_signal_message, format_trade_result
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# Bot API answers meaning the chat is gone for good (bot blocked, chat deleted)
+_GONE_STATUSES = (403,)
+_GONE_DESCRIPTIONS = ("chat not found", "user is deactivated", "bot was kicked")
+
+class Broadcaster:
+    """
+    Async queue of pre-rendered messages, delivered by one dispatcher task
+
+    publish() only renders the text (once, whatever the subscriber count) and
+    enqueues it, so the caller never waits on the network. The dispatcher
+    sends each message to a snapshot of the registry with up to concurrency
+    requests in flight, taking a global token per request and spacing
+    messages to the same chat. A 429 pauses every sender for its retry_after;
+    chats that blocked the bot are unsubscribed.
+
+    Photos (charts) follow on a queue and dispatcher of their own: each is
+    uploaded once and re-sent by file_id, and photo senders only take a turn
+    while no text message is waiting, so a chart never delays a signal.
+    """
+
+    def __init__(self, registry: Optional[SubscriberRegistry] = None, token: str = TELEGRAM_BOT_TOKEN,
+                 api_base: str = TELEGRAM_API_BASE, rate: float = BROADCAST_GLOBAL_RATE,
+                 per_chat_interval: float = BROADCAST_PER_CHAT_INTERVAL_SECONDS,
+                 concurrency: int = BROADCAST_CONCURRENCY, max_queue: int = BROADCAST_QUEUE_SIZE,
+                 max_retries: int = BROADCAST_MAX_RETRIES):
+        """
+        Args:
+            registry: Subscriber registry (default: the global one)
+            token: Bot token
+            api_base: Bot API base URL (a local stand-in in tests)
+            rate: Messages per second across all chats
+            per_chat_interval: Minimum seconds between two messages to one chat
+            concurrency: Requests in flight
+            max_queue: Pending messages kept; the oldest is dropped when full
+            max_retries: Attempts after the first for flood waits and transient errors
+        """
+        self.registry = registry or subscriber_registry
+        self.api = f"{api_base.rstrip('/')}/bot{token}"
+        self.bucket = TokenBucket(burst=max(1, int(rate)), per_minute=int(rate * 60), low_priority_reserve=0,
+                                  clock=time.monotonic)
+        self.per_chat_interval = per_chat_interval
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(1, max_queue)
+        self.max_retries = max_retries
+        self.stats = {"published": 0, "dropped": 0, "sent": 0, "failed": 0, "retried": 0,
+                      "flood_waits": 0, "unsubscribed": 0, "last_broadcast_ms": 0.0, "last_recipients": 0,
+                      "photos_published": 0, "photos_dropped": 0, "photo_uploads": 0}
+        self._queue: Optional[asyncio.Queue] = None
+        self._photos: Optional[asyncio.Queue] = None
+        self._text_idle: Optional[asyncio.Event] = None  # set while no text message is pending
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._photo_task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._next_send: Dict[int, float] = {}  # chat_id -> earliest monotonic time for its next message
+        self._paused_until = 0.0
+
+    # ===== LIFECYCLE =====
+
+    def start(self) -> "Broadcaster":
+        """Start the dispatcher on the running event loop"""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            self._photos = asyncio.Queue()
+            self._text_idle = asyncio.Event()
+            self._text_idle.set()
+            self._client = httpx.AsyncClient(timeout=30,
+                                             limits=httpx.Limits(max_connections=self.concurrency))
+            self._task = asyncio.create_task(self._run(), name="telegram-broadcast")
+            self._photo_task = asyncio.create_task(self._run_photos(), name="telegram-broadcast-photos")
+        return self
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._photo_task.cancel()
+        await asyncio.gather(self._task, self._photo_task, return_exceptions=True)
+        await self._client.aclose()
+        self._task = None
+        self._photo_task = None
+        self._client = None
+
+    async def join(self, timeout: float = 30.0) -> bool:
+        """Wait until every queued message and photo has been delivered (for tests and shutdown)"""
+        try:
+            await asyncio.wait_for(asyncio.gather(self._queue.join(), self._photos.join()), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # ===== PUBLISHING =====
+
+    def publish(self, text: str) -> None:
+        """Queue a message for every subscriber (non-blocking, any thread)"""
+        if self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._enqueue(text)
+        else:
+            self._loop.call_soon_threadsafe(self._enqueue, text)
+
+    def publish_photo(self, path: str, caption: str = "") -> None:
+        """Queue an image file for every subscriber, behind any pending text (non-blocking, any thread)"""
+        if self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._enqueue_photo(path, caption)
+        else:
+            self._loop.call_soon_threadsafe(self._enqueue_photo, path, caption)
+
+    def publish_signal(self, signal: Dict[str, Any]) -> None:
+        self.publish(format_signal_message(signal))
+
+    def publish_trade_result(self, trade: Dict[str, Any]) -> None:
+        self.publish(format_trade_result(trade))
+
+    def _enqueue(self, text: str) -> None:
+        if self._queue.qsize() >= self.max_queue:
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self.stats["dropped"] += 1
+            logger.warning("Broadcast queue full, oldest message dropped")
+        self._queue.put_nowait(text)
+        self._text_idle.clear()
+        self.stats["published"] += 1
+
+    def _enqueue_photo(self, path: str, caption: str) -> None:
+        # A full queue drops the new photo: charts never displace anything already queued
+        if self._photos.qsize() >= self.max_queue:
+            self.stats["photos_dropped"] += 1
+            logger.warning("Broadcast photo queue full, chart dropped")
+            return
+        self._photos.put_nowait((path, caption))
+        self.stats["photos_published"] += 1
+
+    # ===== DISPATCH =====
+
+    async def _run(self) -> None:
+        while True:
+            text = await self._queue.get()
+            try:
+                await self.broadcast(text, self.registry.active_ids())
+            except Exception as e:
+                logger.error(f"Broadcast failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+                if self._queue.empty():
+                    self._text_idle.set()
+
+    async def _run_photos(self) -> None:
+        while True:
+            path, caption = await self._photos.get()
+            try:
+                await self.broadcast_photo(path, caption, self.registry.active_ids())
+            except Exception as e:
+                logger.error(f"Photo broadcast failed: {str(e)}")
+            finally:
+                self._photos.task_done()
+
+    async def broadcast(self, text: str, chat_ids: List[int]) -> None:
+        """Deliver one message to chat_ids"""
+        started = time.perf_counter()
+        await self._fan_out(deque(chat_ids), "sendMessage", {"text": text})
+        self.stats["last_broadcast_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.stats["last_recipients"] = len(chat_ids)
+
+    async def broadcast_photo(self, path: str, caption: str, chat_ids: List[int]) -> None:
+        """Deliver one image to chat_ids: uploaded to the first chat that accepts it, then sent by file_id"""
+        pending = deque(chat_ids)
+        if not pending:
+            return
+        content = await asyncio.to_thread(Path(path).read_bytes)
+        file_id = None
+        while pending and file_id is None:
+            result = await self._send(pending.popleft(), "sendPhoto", {"caption": caption},
+                                      files={"photo": (Path(path).name, content, "image/png")}, low_priority=True)
+            if result is not None:
+                self.stats["photo_uploads"] += 1
+                sizes = result.get("photo") or [{}]
+                file_id = sizes[-1].get("file_id")
+        if file_id is not None:
+            await self._fan_out(pending, "sendPhoto", {"photo": file_id, "caption": caption}, low_priority=True)
+
+    async def _fan_out(self, pending: deque, method: str, payload: Dict[str, Any],
+                       low_priority: bool = False) -> None:
+        now = time.monotonic()
+        self._next_send = {chat: at for chat, at in self._next_send.items() if at > now}
+
+        async def sender():
+            while pending:
+                await self._send(pending.popleft(), method, payload, low_priority=low_priority)
+
+        await asyncio.gather(*[sender() for _ in range(min(self.concurrency, len(pending)))])
+
+    async def _send(self, chat_id: int, method: str, payload: Dict[str, Any], files: Optional[dict] = None,
+                    low_priority: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        One Bot API call for one chat, with retries
+
+        Returns:
+            The call's result object, or None if it was not delivered
+        """
+        url = f"{self.api}/{method}"
+        for attempt in range(self.max_retries + 1):
+            await self._wait_turn(chat_id, low_priority)
+            try:
+                if files:
+                    response = await self._client.post(url, data=dict(payload, chat_id=str(chat_id)), files=files)
+                else:
+                    response = await self._client.post(url, json=dict(payload, chat_id=chat_id))
+                body = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                logger.debug(f"Broadcast to {chat_id} failed: {str(e)}")
+                await asyncio.sleep(min(2 ** attempt, 10))
+                self.stats["retried"] += 1
+                continue
+
+            if body.get("ok"):
+                self.stats["sent"] += 1
+                return body.get("result", {})
+            if response.status_code == 429:
+                # Flood wait applies to the whole bot: hold every sender
+                retry_after = float(body.get("parameters", {}).get("retry_after", 1))
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                self.stats["flood_waits"] += 1
+                self.stats["retried"] += 1
+                continue
+            description = str(body.get("description", "")).lower()
+            if response.status_code in _GONE_STATUSES or any(d in description for d in _GONE_DESCRIPTIONS):
+                if self.registry.unsubscribe(chat_id):
+                    self.stats["unsubscribed"] += 1
+                return None
+            if response.status_code < 500:
+                break
+            await asyncio.sleep(min(2 ** attempt, 10))
+            self.stats["retried"] += 1
+
+        self.stats["failed"] += 1
+        logger.warning(f"Broadcast to {chat_id} gave up")
+        return None
+
+    async def _wait_turn(self, chat_id: int, low_priority: bool = False) -> None:
+        """Sleep through any flood wait, the chat's spacing and the global rate (and pending text, for photos)"""
+        while True:
+            if low_priority:
+                await self._text_idle.wait()
+            now = time.monotonic()
+            wait = max(self._paused_until, self._next_send.get(chat_id, 0.0)) - now
+            if wait <= 0:
+                wait = self.bucket.try_acquire()
+                if wait == 0:
+                    self._next_send[chat_id] = now + self.per_chat_interval
+                    return
+            await asyncio.sleep(wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats, subscribers=self.registry.count(),
+                    pending=self._queue.qsize() if self._queue is not None else 0,
+                    pending_photos=self._photos.qsize() if self._photos is not None else 0)
+
+# Global broadcaster instance
+broadcaster = Broadcaster()
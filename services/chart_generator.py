@@ -0,0 +1,321 @@
+"""
+Chart Generator
+Signal and trade charts rendered in a process pool and cached on disk, so
+matplotlib never runs on the trading event loop
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Set
+from config.settings import (
+    CHART_CACHE_DIR, CHART_TTL_HOURS, CHART_DPI, CHART_WORKERS, CHART_CACHE_MAX_MB,
+    CHART_RENDER_TIMEOUT_SECONDS, CHART_EVICT_GRACE_SECONDS, EMA_PERIODS_FAST, EMA_PERIODS_MED, EMA_PERIODS_SLOW
+)
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# 1920x1080 at any DPI
+_WIDTH_PX, _HEIGHT_PX = 1920, 1080
+_LEVEL_COLORS = {"entry": "blue", "sl": "red", "tp": "green", "exit": "black"}
+
+# ===== RENDERING (runs in the worker processes) =====
+
+def render_chart(spec: Dict[str, Any], path: str) -> None:
+    """
+    Draw one candlestick chart to path (PNG)
+
+    Imports happen here so only the workers load matplotlib/mplfinance.
+
+    Args:
+        spec: {"bars", "overlays", "title", "dpi"} as built by ChartService
+        path: Output file
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import mplfinance as mpf
+    import pandas as pd
+
+    frame = pd.DataFrame(spec["bars"])
+    frame.index = pd.to_datetime(frame.pop("timestamp"))
+    frame = frame.rename(columns=str.capitalize)
+    overlays = spec["overlays"]
+    levels = overlays.get("levels", {})
+
+    extra = {}
+    ribbon = [mpf.make_addplot(frame["Close"].ewm(span=period, adjust=False).mean(), width=0.8)
+              for period in overlays.get("ema", ()) if period < len(frame)]
+    if ribbon:
+        extra["addplot"] = ribbon
+    if levels:
+        extra["hlines"] = dict(hlines=list(levels.values()), linestyle="--", linewidths=1,
+                               colors=[_LEVEL_COLORS.get(name, "gray") for name in levels])
+
+    dpi = spec["dpi"]
+    mpf.plot(frame, type="candle", style="charles", title=spec["title"], volume=bool(frame["Volume"].any()),
+             figsize=(_WIDTH_PX / dpi, _HEIGHT_PX / dpi), savefig=dict(fname=path, format="png", dpi=dpi),
+             **extra)
+
+def _render_file(renderer: Callable[[Dict[str, Any], str], None], spec: Dict[str, Any], path: str) -> int:
+    """Worker entry point: render to a temp file, then move it into place"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        renderer(spec, tmp)
+        os.replace(tmp, path)  # readers never see a half-written PNG
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return os.path.getsize(path)
+
+# ===== CACHE KEYS =====
+
+def _bar_time(bar: Dict[str, Any]) -> str:
+    return str(bar.get("timestamp_utc") or bar.get("datetime") or bar.get("timestamp") or "")
+
+def chart_key(symbol: str, timeframe: str, bars: List[Dict[str, Any]], overlays: Dict[str, Any], dpi: int) -> str:
+    """
+    Cache key for one chart
+
+    Args:
+        symbol / timeframe: Instrument and bar size
+        bars: Bars drawn (identified by their first/last timestamp and count)
+        overlays: EMA periods and price levels
+        dpi: Output resolution
+
+    Returns:
+        Hex digest used as the file name
+    """
+    bar_range = [_bar_time(bars[0]), _bar_time(bars[-1]), len(bars)] if bars else []
+    # The last bar may still be forming: its close is part of the range
+    if bars:
+        bar_range.append(bars[-1].get("close"))
+    raw = json.dumps([symbol, timeframe, bar_range, overlays, dpi], sort_keys=True, default=str)
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+def signal_overlays(item: Dict[str, Any]) -> Dict[str, Any]:
+    """EMA ribbon plus the entry/SL/TP (and exit, for results) levels of a signal or trade"""
+    levels = {name: item[field] for name, field in
+              (("entry", "entry_price"), ("sl", "sl_price"), ("tp", "tp_price"), ("exit", "exit_price"))
+              if item.get(field) is not None}
+    return {"ema": [EMA_PERIODS_FAST, EMA_PERIODS_MED, EMA_PERIODS_SLOW], "levels": levels}
+
+# ===== SERVICE =====
+
+class ChartService:
+    """
+    Disk-cached chart renderer backed by a process pool (event-loop only)
+
+    Charts are keyed by (symbol, timeframe, bar range, overlays, DPI): a hit
+    is a stat() away, identical requests in flight share one render, and
+    files older than ttl_hours or beyond max_mb (least recently used first)
+    are deleted after each render, except those used within evict_grace
+    seconds: their paths may still wait in the broadcaster's photo queue.
+    """
+
+    def __init__(self, cache_dir: str = CHART_CACHE_DIR, ttl_hours: float = CHART_TTL_HOURS,
+                 max_mb: float = CHART_CACHE_MAX_MB, workers: int = CHART_WORKERS, dpi: int = CHART_DPI,
+                 timeout: float = CHART_RENDER_TIMEOUT_SECONDS, evict_grace: float = CHART_EVICT_GRACE_SECONDS,
+                 renderer: Callable[[Dict[str, Any], str], None] = render_chart,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            cache_dir: Directory holding the PNG files
+            ttl_hours: Age after which a chart is re-rendered and its file deleted
+            max_mb: Total cache size kept
+            workers: Render processes
+            dpi: Output resolution
+            timeout: Seconds a caller waits for one render
+            evict_grace: Seconds after its last use during which a chart is never deleted
+            renderer: Module-level callable(spec, path), picklable for the workers
+            clock: Wall-clock source (file mtimes), injectable for tests
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.workers = max(1, workers)
+        self.dpi = dpi
+        self.timeout = timeout
+        self.evict_grace = evict_grace
+        self.renderer = renderer
+        self.clock = clock
+        self.stats = {"hits": 0, "renders": 0, "deduplicated": 0, "failed": 0, "evicted": 0,
+                      "last_render_ms": 0.0}
+        self._index: Dict[str, list] = {}  # key -> [created, size, last_used]
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._scanned = False
+
+    # ===== LIFECYCLE =====
+
+    def start(self) -> "ChartService":
+        """Bind to the running loop and index the files left by earlier runs"""
+        self._loop = asyncio.get_running_loop()
+        if not self._scanned:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for file in self.cache_dir.glob("*.png"):
+                stat = file.stat()
+                self._index[file.stem] = [stat.st_mtime, stat.st_size, stat.st_mtime]
+            self._scanned = True
+        return self
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: workers never inherit the parent's threads, sockets or DB connections
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    # ===== RENDERING =====
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.png"
+
+    async def get(self, symbol: str, timeframe: str, bars: List[Dict[str, Any]],
+                  overlays: Optional[Dict[str, Any]] = None, title: str = "") -> Optional[str]:
+        """
+        Path of the chart for these bars, rendering it when not cached
+
+        Returns:
+            PNG path, or None when there is nothing to draw or the render failed
+        """
+        if not bars:
+            return None
+        if self._loop is None:
+            self.start()
+        overlays = overlays or {}
+        key = chart_key(symbol, timeframe, bars, overlays, self.dpi)
+        now = self.clock()
+
+        entry = self._index.get(key)
+        if entry is not None and not self.path_for(key).exists():
+            del self._index[key]  # deleted behind our back: render it again
+            entry = None
+        if entry is not None and now - entry[0] < self.ttl:
+            entry[2] = now
+            self.stats["hits"] += 1
+            return str(self.path_for(key))
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["deduplicated"] += 1
+            return await asyncio.shield(future)
+
+        future = self._loop.create_future()
+        self._inflight[key] = future
+        try:
+            spec = {
+                "bars": [{"timestamp": _bar_time(bar), "open": bar.get("open"), "high": bar.get("high"),
+                          "low": bar.get("low"), "close": bar.get("close"), "volume": bar.get("volume", 0)}
+                         for bar in bars],
+                "overlays": overlays,
+                "title": title or f"{symbol} {timeframe}",
+                "dpi": self.dpi,
+            }
+            path = await self._render(key, spec)
+        except BaseException:
+            future.cancel()  # cancelled at shutdown: release the waiters too
+            raise
+        finally:
+            del self._inflight[key]
+        future.set_result(path)
+        if path is not None:
+            await self._evict()
+        return path
+
+    async def _render(self, key: str, spec: Dict[str, Any]) -> Optional[str]:
+        path = self.path_for(key)
+        started = time.perf_counter()
+        self.stats["renders"] += 1
+        try:
+            size = await asyncio.wait_for(
+                self._loop.run_in_executor(self._executor(), _render_file, self.renderer, spec, str(path)),
+                self.timeout)
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"Chart render failed: {type(e).__name__}: {str(e)}")
+            if isinstance(e, BrokenProcessPool):
+                # A crashed worker poisons the pool: the next render starts a fresh one
+                self._pool = None
+            return None
+        now = self.clock()
+        self._index[key] = [now, size, now]
+        self.stats["last_render_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return str(path)
+
+    def schedule(self, symbol: str, timeframe: str, bars: List[Dict[str, Any]],
+                 on_ready: Callable[[str], None], overlays: Optional[Dict[str, Any]] = None,
+                 title: str = "") -> None:
+        """
+        Render in the background and call on_ready(path) when done (non-blocking, any thread)
+
+        Failed renders are logged and on_ready is not called.
+        """
+        if self._loop is None:
+            return
+        bars = list(bars)
+
+        async def run():
+            path = await self.get(symbol, timeframe, bars, overlays, title)
+            if path is not None:
+                on_ready(path)
+
+        def spawn():
+            task = self._loop.create_task(run())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            spawn()
+        else:
+            self._loop.call_soon_threadsafe(spawn)
+
+    # ===== EVICTION =====
+
+    async def _evict(self) -> None:
+        """Drop expired charts, then the least recently used ones beyond max_bytes (outside the grace period)"""
+        now = self.clock()
+        victims = [key for key, (created, _, used) in self._index.items()
+                   if now - created >= self.ttl and now - used >= self.evict_grace]
+        total = sum(size for key, (_, size, _) in self._index.items() if key not in victims)
+        if total > self.max_bytes:
+            for key, (_, size, used) in sorted(self._index.items(), key=lambda item: item[1][2]):
+                if total <= self.max_bytes or now - used < self.evict_grace:
+                    break  # sorted by last use: everything after is in its grace period too
+                if key not in victims:
+                    victims.append(key)
+                    total -= size
+        if not victims:
+            return
+        for key in victims:
+            del self._index[key]
+        self.stats["evicted"] += len(victims)
+        paths = [self.path_for(key) for key in victims]
+        await asyncio.to_thread(lambda: [path.unlink(missing_ok=True) for path in paths])
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats, cached=len(self._index), cache_bytes=sum(e[1] for e in self._index.values()),
+                    in_flight=len(self._inflight))
+
+# Global chart service instance
+chart_service = ChartService()
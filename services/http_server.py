@@ -0,0 +1,184 @@
+"""
+Async HTTP Server
+Minimal HTTP/1.1 server (GET/HEAD, keep-alive, ETag) running on the trading
+event loop for the health and status endpoints
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Dict, Any, Callable, Optional
+from config.settings import APP_HOST, APP_PORT, HTTP_KEEPALIVE_SECONDS, HTTP_MAX_HEADER_BYTES
+from utils.logger import get_logger
+
+logger = get_logger()
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+class Response:
+    """Status, body and optional entity tag of one reply"""
+
+    __slots__ = ("status", "body", "etag")
+
+    def __init__(self, status: int, body: bytes, etag: Optional[str] = None):
+        self.status = status
+        self.body = body
+        self.etag = etag
+
+    @classmethod
+    def json(cls, payload: Any, status: int = 200) -> "Response":
+        return cls(status, json.dumps(payload, default=str).encode())
+
+class JSONSnapshot:
+    """
+    Pre-serialized JSON document with a content-derived ETag
+
+    The producer calls update() when the data changes; every request then
+    serves the same bytes, and clients holding the current ETag get a 304.
+    """
+
+    def __init__(self, payload: Optional[Dict[str, Any]] = None):
+        self.body = b"{}"
+        self.etag = None
+        self.version = 0
+        self.update(payload or {})
+
+    def update(self, payload: Dict[str, Any]) -> bool:
+        """
+        Returns:
+            True if the document changed
+        """
+        body = json.dumps(payload, default=str, sort_keys=True).encode()
+        if body == self.body and self.etag is not None:
+            return False
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.version += 1
+        return True
+
+    def response(self, status: int = 200) -> Response:
+        return Response(status, self.body, self.etag)
+
+class AsyncHTTPServer:
+    """
+    asyncio.start_server based server for a few fixed routes
+
+    Handlers are plain callables returning a Response; they run on the event
+    loop, so they must only read in-memory state (no DB, no blocking I/O).
+    """
+
+    def __init__(self, routes: Dict[str, Callable[[], Response]], host: str = APP_HOST, port: int = APP_PORT,
+                 keepalive: float = HTTP_KEEPALIVE_SECONDS, max_header_bytes: int = HTTP_MAX_HEADER_BYTES):
+        """
+        Args:
+            routes: Path -> handler
+            host / port: Listen address (port 0 picks a free port)
+            keepalive: Idle seconds before a keep-alive connection is closed
+            max_header_bytes: Largest accepted request head
+        """
+        self.routes = routes
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.max_header_bytes = max_header_bytes
+        self.stats = {"requests": 0, "not_modified": 0, "errors": 0, "connections": 0, "open_connections": 0}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> "AsyncHTTPServer":
+        if self._server is None:
+            self._server = await asyncio.start_server(self._serve, self.host, self.port,
+                                                      limit=self.max_header_bytes, reuse_address=True)
+            self.port = self._server.sockets[0].getsockname()[1]
+            logger.info(f"HTTP server listening on {self.host}:{self.port}")
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+        self.stats["open_connections"] += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        ConnectionError):
+                    return
+                keep_alive = await self._respond(head, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client went away, possibly mid-body
+        finally:
+            self.stats["open_connections"] -= 1
+            writer.close()
+
+    async def _respond(self, head: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Answer one request; returns whether the connection stays open"""
+        lines = head.decode("latin-1").split("\r\n")
+        parts = lines[0].split()
+        if len(parts) != 3:
+            self._write(writer, Response.json({"error": "bad request"}, 400), False, False)
+            return False
+        method, target, version = parts
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        # Bodies are never used; drain one so the next request parses
+        length = headers.get("content-length", "0")
+        if headers.get("transfer-encoding", "identity").lower() != "identity" or not length.isdigit():
+            # A chunked (or unsized) body cannot be skipped reliably: refuse it and drop the connection
+            self._write(writer, Response.json({"error": "bad request"}, 400), False, False)
+            return False
+        if int(length):
+            await reader.readexactly(int(length))
+
+        self.stats["requests"] += 1
+        handler = self.routes.get(target.split("?", 1)[0])
+        if method not in ("GET", "HEAD"):
+            response = Response.json({"error": "method not allowed"}, 405)
+        elif handler is None:
+            response = Response.json({"error": "not found"}, 404)
+        else:
+            try:
+                response = handler()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"HTTP handler error for {target}: {str(e)}")
+                response = Response.json({"error": str(e)}, 500)
+
+        if response.etag is not None and response.status == 200 and \
+                response.etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+            self.stats["not_modified"] += 1
+            response = Response(304, b"", response.etag)
+        self._write(writer, response, method == "HEAD", keep_alive)
+        return keep_alive
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, response: Response, head_only: bool, keep_alive: bool) -> None:
+        lines = [
+            f"HTTP/1.1 {response.status} {_REASONS.get(response.status, 'Unknown')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(response.body) if response.status != 304 else 0}",
+            "Cache-Control: no-cache",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if response.etag is not None:
+            lines.append(f"ETag: {response.etag}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if not head_only and response.status != 304:
+            writer.write(response.body)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
@@ -0,0 +1,193 @@
+"""
+Staged Async Pipeline
+Stages run as concurrent asyncio tasks connected by bounded queues, each with
+an explicit policy for what happens when it falls behind
+"""
+
+import asyncio
+import inspect
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable
+from utils.logger import get_logger
+
+logger = get_logger()
+
+# Full-queue policies
+BLOCK = "block"              # producer waits (backpressure); nothing is lost
+DROP_NEWEST = "drop_newest"  # incoming item is discarded
+DROP_OLDEST = "drop_oldest"  # oldest pending item is discarded to make room
+COALESCE = "coalesce"        # incoming item is merged into the newest pending one
+
+POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST, COALESCE)
+
+class _Envelope:
+    """Pipeline item plus the time it entered the first stage"""
+
+    __slots__ = ("payload", "created")
+
+    def __init__(self, payload: Any, created: float):
+        self.payload = payload
+        self.created = created
+
+class Stage:
+    """
+    One pipeline stage: an input queue and a handler
+
+    The handler receives an item and returns the item for the next stage, or
+    None to end processing of that item here. It may be sync or async.
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Any], maxsize: int = 64,
+                 policy: str = BLOCK, merge: Optional[Callable[[Any, Any], Any]] = None):
+        """
+        Args:
+            name: Stage name used in metrics and logs
+            handler: Callable(item) -> next item or None
+            maxsize: Queue bound (>= 1)
+            policy: What put() does when the queue is full (see POLICIES)
+            merge: COALESCE only; merge(pending, incoming) -> item (default: incoming)
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.name = name
+        self.handler = handler
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.merge = merge or (lambda pending, incoming: incoming)
+        self._items: deque = deque()
+        self._changed = asyncio.Condition()
+        self.metrics = {
+            "processed": 0, "dropped": 0, "coalesced": 0, "errors": 0,
+            "queue_depth": 0, "max_queue_depth": 0,
+            "last_ms": 0.0, "avg_ms": 0.0, "max_ms": 0.0,
+            "last_age_ms": 0.0, "max_age_ms": 0.0,
+        }
+
+    async def put(self, envelope: _Envelope) -> bool:
+        """
+        Enqueue according to the stage policy
+
+        Returns:
+            False if the item was dropped or merged into a pending one
+        """
+        async with self._changed:
+            if len(self._items) >= self.maxsize:
+                if self.policy == BLOCK:
+                    await self._changed.wait_for(lambda: len(self._items) < self.maxsize)
+                elif self.policy == DROP_NEWEST:
+                    self.metrics["dropped"] += 1
+                    return False
+                elif self.policy == DROP_OLDEST:
+                    self._items.popleft()
+                    self.metrics["dropped"] += 1
+                else:
+                    pending = self._items[-1]
+                    # Keep the older start time so latency covers the whole wait
+                    pending.payload = self.merge(pending.payload, envelope.payload)
+                    self.metrics["coalesced"] += 1
+                    return False
+            self._items.append(envelope)
+            self._record_depth()
+            self._changed.notify_all()
+        return True
+
+    async def get(self) -> _Envelope:
+        async with self._changed:
+            await self._changed.wait_for(lambda: len(self._items) > 0)
+            envelope = self._items.popleft()
+            self._record_depth()
+            self._changed.notify_all()
+        return envelope
+
+    async def process(self, envelope: _Envelope) -> Optional[_Envelope]:
+        """Run the handler on one item and record its latency"""
+        started = time.perf_counter()
+        try:
+            result = self.handler(envelope.payload)
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            self.metrics["errors"] += 1
+            logger.error(f"Pipeline stage {self.name} error: {str(e)}")
+            result = None
+        finished = time.perf_counter()
+
+        elapsed_ms = (finished - started) * 1000
+        age_ms = (finished - envelope.created) * 1000
+        metrics = self.metrics
+        metrics["processed"] += 1
+        metrics["last_ms"] = round(elapsed_ms, 3)
+        metrics["max_ms"] = round(max(metrics["max_ms"], elapsed_ms), 3)
+        metrics["avg_ms"] = round(elapsed_ms if metrics["processed"] == 1
+                                  else metrics["avg_ms"] * 0.9 + elapsed_ms * 0.1, 3)
+        metrics["last_age_ms"] = round(age_ms, 3)
+        metrics["max_age_ms"] = round(max(metrics["max_age_ms"], age_ms), 3)
+
+        if result is None:
+            return None
+        return _Envelope(result, envelope.created)
+
+    def _record_depth(self) -> None:
+        depth = len(self._items)
+        self.metrics["queue_depth"] = depth
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], depth)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return dict(self.metrics, policy=self.policy, maxsize=self.maxsize)
+
+class Pipeline:
+    """
+    Linear chain of stages, each running as its own task
+
+    submit() feeds the first stage; every stage forwards its handler's result
+    to the next one. A stage's age_ms metrics measure time since the item
+    entered the pipeline, so the signal stage's age is tick-to-signal latency.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self._tasks: List[asyncio.Task] = []
+        self._busy = set()  # names of stages currently running their handler
+
+    def start(self) -> "Pipeline":
+        if not self._tasks:
+            for index, stage in enumerate(self.stages):
+                next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+                self._tasks.append(asyncio.create_task(self._worker(stage, next_stage), name=f"stage-{stage.name}"))
+        return self
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, item: Any) -> bool:
+        """Feed an item into the first stage (subject to its policy)"""
+        return await self.stages[0].put(_Envelope(item, time.perf_counter()))
+
+    async def join(self, timeout: float = 10.0) -> bool:
+        """Wait until every queue is empty and no stage is mid-item (for tests and shutdown)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self._busy and all(not stage._items for stage in self.stages):
+                return True
+            await asyncio.sleep(0.005)
+        return False
+
+    async def _worker(self, stage: Stage, next_stage: Optional[Stage]) -> None:
+        while True:
+            envelope = await stage.get()
+            self._busy.add(stage.name)
+            try:
+                forwarded = await stage.process(envelope)
+                if forwarded is not None and next_stage is not None:
+                    await next_stage.put(forwarded)
+            finally:
+                self._busy.discard(stage.name)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {stage.name: stage.get_metrics() for stage in self.stages}
@@ -0,0 +1,189 @@
+"""
+Provider Rate Limiting
+Quota-aware token buckets (burst, per-minute, per-day) with priority deferral
+"""
+
+import asyncio
+import math
+import time
+from typing import Dict, Any, Optional, Callable
+from datetime import datetime
+import pytz
+from utils.logger import get_logger
+from config.settings import (
+    PROVIDER_RATE_LIMITS, RATE_LIMIT_MAX_WAIT_SECONDS, RATE_LIMIT_LOW_PRIORITY_RESERVE
+)
+
+logger = get_logger()
+
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+
+class TokenBucket:
+    """
+    Token bucket for one provider plan
+
+    Refill rate is the per-minute limit, lowered when needed so the remaining
+    daily budget lasts until the UTC day boundary. Low-priority requests only
+    get a token while the bucket is above the reserve level.
+    """
+
+    def __init__(self, burst: int, per_minute: float, per_day: int = 0,
+                 low_priority_reserve: float = RATE_LIMIT_LOW_PRIORITY_RESERVE,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            burst: Maximum tokens (requests that may be sent back-to-back)
+            per_minute: Sustained requests per minute
+            per_day: Requests per UTC day (0 = unlimited)
+            low_priority_reserve: Fraction of burst kept back from low priority callers
+            clock: Time source (epoch seconds), injectable for tests
+        """
+        self.burst = max(1, burst)
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.reserve = self.burst * low_priority_reserve
+        self.clock = clock
+
+        now = clock()
+        self.tokens = float(self.burst)
+        self.rate = per_minute / 60.0
+        self.last_refill = now
+        self.day = self._utc_day(now)
+        self.used_today = 0
+        self.sent = 0
+        self.deferred = 0
+        self.throttled = 0
+
+    def try_acquire(self, priority: str = PRIORITY_NORMAL) -> float:
+        """
+        Take a token if available
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one could be
+            (math.inf when the daily budget is exhausted)
+        """
+        self._refill()
+
+        if self.per_day and self.used_today >= self.per_day:
+            return math.inf
+
+        needed = 1.0 + (self.reserve if priority == PRIORITY_LOW else 0.0)
+        if self.tokens >= needed:
+            self.tokens -= 1.0
+            self.used_today += 1
+            self.sent += 1
+            return 0.0
+
+        if self.rate <= 0:
+            return math.inf
+        return (needed - self.tokens) / self.rate
+
+    def penalize(self) -> None:
+        """Provider answered 429: drain the bucket so callers back off"""
+        self._refill()
+        self.tokens = 0.0
+        self.throttled += 1
+
+    def get_status(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "tokens": round(self.tokens, 2),
+            "rate_per_minute": round(self.rate * 60, 2),
+            "used_today": self.used_today,
+            "per_day": self.per_day,
+            "sent": self.sent,
+            "deferred": self.deferred,
+            "throttled": self.throttled,
+        }
+
+    def _refill(self) -> None:
+        now = self.clock()
+        day = self._utc_day(now)
+        if day != self.day:
+            self.day = day
+            self.used_today = 0
+
+        rate = self.per_minute / 60.0
+        if self.per_day:
+            # Spread what is left of today's budget over the rest of the day
+            seconds_left = 86400 - now % 86400
+            remaining = max(self.per_day - self.used_today, 0)
+            rate = min(rate, remaining / max(seconds_left, 1.0))
+        self.rate = rate
+
+        elapsed = max(now - self.last_refill, 0.0)
+        self.tokens = min(float(self.burst), self.tokens + elapsed * rate)
+        self.last_refill = now
+
+    @staticmethod
+    def _utc_day(timestamp: float) -> str:
+        return datetime.fromtimestamp(timestamp, tz=pytz.UTC).strftime("%Y-%m-%d")
+
+class RateLimiter:
+    """Per-provider token buckets built from PROVIDER_RATE_LIMITS"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, int]]] = None,
+                 max_wait: float = RATE_LIMIT_MAX_WAIT_SECONDS,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], Any] = asyncio.sleep,
+                 shares: int = 1):
+        """
+        Args:
+            limits: provider -> {"burst", "per_minute", "per_day"} (default PROVIDER_RATE_LIMITS)
+            max_wait: Default longest wait in acquire()
+            clock / sleep: Time source and sleep, injectable for tests
+            shares: Processes polling with the same API keys; each gets 1/shares of every plan
+        """
+        self.limits = PROVIDER_RATE_LIMITS if limits is None else limits
+        self.shares = max(1, shares)
+        self.buckets = {
+            name: TokenBucket(max(1, cfg["burst"] // self.shares), cfg["per_minute"] / self.shares,
+                              max(1, cfg.get("per_day", 0) // self.shares) if cfg.get("per_day") else 0,
+                              clock=clock)
+            for name, cfg in self.limits.items()
+        }
+        self.max_wait = max_wait
+        self.clock = clock
+        self.sleep = sleep
+
+    async def acquire(self, provider: str, priority: str = PRIORITY_NORMAL,
+                      max_wait: Optional[float] = None) -> bool:
+        """
+        Wait for a token for provider
+
+        Args:
+            provider: Provider name (unknown providers are not limited)
+            priority: "normal" or "low" (low is deferred while budget is tight)
+            max_wait: Longest acceptable wait; default RATE_LIMIT_MAX_WAIT_SECONDS
+
+        Returns:
+            True if the request may be sent, False if it should be skipped
+        """
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return True
+
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = self.clock() + max_wait
+
+        while True:
+            wait = bucket.try_acquire(priority)
+            if wait == 0:
+                return True
+            if self.clock() + wait > deadline:
+                bucket.deferred += 1
+                logger.debug(f"Rate limit: {provider} {priority} request deferred (next token in {wait:.1f}s)")
+                return False
+            await self.sleep(wait)
+
+    def penalize(self, provider: str) -> None:
+        """Record a provider 429 response"""
+        bucket = self.buckets.get(provider)
+        if bucket is not None:
+            bucket.penalize()
+            logger.warning(f"Rate limit: {provider} returned 429, backing off")
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """Budget status per provider"""
+        return {name: bucket.get_status() for name, bucket in self.buckets.items()}
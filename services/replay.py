@@ -0,0 +1,206 @@
+"""
+Provider Record & Replay
+Capture real provider responses to disk and serve them back from a local
+HTTP stand-in with configurable latency, error injection and replay speed
+
+Usage:
+    DATA_PROVIDER_MODE=record python main.py          # capture
+    python -m services.replay --port 8765             # serve
+    DATA_PROVIDER_MODE=replay python main.py          # run against the stand-in
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl
+from utils.logger import get_logger
+from config.settings import (
+    RECORDINGS_DIR, REPLAY_LATENCY_MS, REPLAY_JITTER_MS,
+    REPLAY_ERROR_RATE, REPLAY_ERROR_STATUS, REPLAY_SPEED
+)
+
+logger = get_logger()
+
+# Query params that never take part in matching (secrets and moving dates)
+IGNORED_PARAMS = {"apiKey", "apikey", "token", "from", "to"}
+
+def _match_key(provider: str, path: str, params: Dict[str, Any]) -> Tuple[str, str, Tuple]:
+    kept = tuple(sorted((k, str(v)) for k, v in params.items() if k not in IGNORED_PARAMS))
+    return provider, path, kept
+
+class ResponseRecorder:
+    """Append provider responses to <recordings_dir>/<provider>.jsonl"""
+
+    def __init__(self, recordings_dir: str = RECORDINGS_DIR):
+        self.dir = Path(recordings_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, path: str, params: Dict[str, Any],
+               status: int, body: str, latency_ms: float) -> None:
+        entry = {
+            "provider": provider,
+            "path": path,
+            "params": {k: v for k, v in params.items() if k not in ("apiKey", "apikey", "token")},
+            "status": status,
+            "body": body,
+            "latency_ms": round(latency_ms, 2),
+            "recorded_at": time.time(),
+        }
+        with self._lock:
+            with open(self.dir / f"{provider}.jsonl", "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+def load_recordings(recordings_dir: str = RECORDINGS_DIR) -> Dict[Tuple, List[Dict[str, Any]]]:
+    """Load recordings grouped by match key, each group ordered by recorded_at"""
+    groups = defaultdict(list)
+    for file in sorted(Path(recordings_dir).glob("*.jsonl")):
+        with open(file) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                groups[_match_key(entry["provider"], entry["path"], entry.get("params", {}))].append(entry)
+    for entries in groups.values():
+        entries.sort(key=lambda e: e.get("recorded_at", 0))
+    return dict(groups)
+
+class ReplayServer:
+    """
+    Local HTTP stand-in serving recorded responses at /<provider><path>
+
+    With speed == 0 every request advances to the next recorded response
+    (wrapping around), which is what throughput benchmarks want. With
+    speed > 0 the recording is replayed against wall time, speed times faster
+    than it was captured.
+    """
+
+    def __init__(self, recordings_dir: str = RECORDINGS_DIR, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = REPLAY_LATENCY_MS, jitter_ms: float = REPLAY_JITTER_MS,
+                 error_rate: float = REPLAY_ERROR_RATE, error_status: int = REPLAY_ERROR_STATUS,
+                 speed: float = REPLAY_SPEED, seed: Optional[int] = None):
+        self.recordings = load_recordings(recordings_dir)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.speed = speed
+        self.random = random.Random(seed)
+        self.stats = {"served": 0, "errors_injected": 0, "not_found": 0}
+
+        self._cursor = defaultdict(int)
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self.url = f"http://{self.host}:{self.port}"
+        self._thread = None
+
+    def start(self) -> "ReplayServer":
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Replay server on {self.url} ({sum(len(v) for v in self.recordings.values())} responses)")
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def respond(self, raw_path: str) -> Tuple[int, str]:
+        """Pick the response for a request path (also used directly by tests)"""
+        parts = urlsplit(raw_path)
+        provider, _, path = parts.path.lstrip("/").partition("/")
+        key = _match_key(provider, "/" + path, dict(parse_qsl(parts.query)))
+
+        delay = self.latency_ms + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        with self._lock:
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.stats["errors_injected"] += 1
+                return self.error_status, json.dumps({"error": "injected"})
+
+            entries = self.recordings.get(key)
+            if not entries:
+                self.stats["not_found"] += 1
+                return 404, json.dumps({"error": "no recording", "path": parts.path})
+
+            entry = entries[self._next_index(key, entries)]
+            self.stats["served"] += 1
+        return entry["status"], entry["body"]
+
+    def _next_index(self, key: Tuple, entries: List[Dict[str, Any]]) -> int:
+        if self.speed <= 0:
+            index = self._cursor[key] % len(entries)
+            self._cursor[key] += 1
+            return index
+
+        # Latest response captured before the replayed instant
+        replay_offset = (time.time() - self._started_at) * self.speed
+        first = entries[0].get("recorded_at", 0)
+        span = entries[-1].get("recorded_at", 0) - first
+        if span > 0:
+            replay_offset %= span
+        index = 0
+        for i, entry in enumerate(entries):
+            if entry.get("recorded_at", 0) - first <= replay_offset:
+                index = i
+            else:
+                break
+        return index
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, body = server.respond(self.path)
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def main():
+    """Run the replay stand-in from the command line"""
+    parser = argparse.ArgumentParser(description="Serve recorded provider responses")
+    parser.add_argument("--dir", default=RECORDINGS_DIR, help="Recordings directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=REPLAY_LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=REPLAY_JITTER_MS)
+    parser.add_argument("--error-rate", type=float, default=REPLAY_ERROR_RATE)
+    parser.add_argument("--error-status", type=int, default=REPLAY_ERROR_STATUS)
+    parser.add_argument("--speed", type=float, default=REPLAY_SPEED)
+    args = parser.parse_args()
+
+    server = ReplayServer(args.dir, host=args.host, port=args.port, latency_ms=args.latency_ms,
+                          jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                          error_status=args.error_status, speed=args.speed)
+    print(f"Replaying {args.dir} on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
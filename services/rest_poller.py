@@ -5,14 +5,20 @@ Fetch market data from REST endpoints with caching and rate limiting
 
 import requests
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
 from datetime import datetime, timedelta
 from collections import deque
 import time
 from utils.logger import get_logger
-from utils.data_mapper import normalize_market_data
+from utils.data_mapper import normalize_market_data, normalize_quote
+from utils.tick_aggregator import TickAggregator
+from utils.price import snap_price, DEFAULT_SYMBOL
+from utils.indicators import indicator_calc
+from services.rate_limiter import RateLimiter, PRIORITY_NORMAL
+from services.replay import ResponseRecorder
 from config.settings import (
-    POLYGON_API_KEY, FINNHUB_API_KEY, TWELVEDATA_API_KEY, GOLDAPI_API_KEY
+    POLYGON_API_KEY, FINNHUB_API_KEY, TWELVEDATA_API_KEY, GOLDAPI_API_KEY,
+    DATA_PROVIDER_MODE, PROVIDER_BASE_URLS, REPLAY_BASE_URL, FIXED_POINT_PRICES
 )
 
 logger = get_logger()
@@ -22,30 +28,165 @@ class RESTPoller:
     Poll market data from REST APIs with fallback mechanism
     """
     
-    def __init__(self, max_retries: int = 3):
+    def __init__(self, max_retries: int = 3, mode: str = DATA_PROVIDER_MODE,
+                 replay_base_url: str = REPLAY_BASE_URL):
+        """
+        Args:
+            max_retries: Retries per provider
+            mode: "live", "record" (live + save responses) or "replay" (local stand-in)
+            replay_base_url: Base URL of services.replay.ReplayServer in replay mode
+        """
         self.max_retries = max_retries
-        self.last_request_time = {}
-        self.rate_limit_delay = 0.5  # seconds between requests per provider
         
-        # Data cache (deque for memory efficiency)
-        self.m1_cache = deque(maxlen=500)
-        self.m5_cache = deque(maxlen=500)
+        # Per-provider quota budgets (the replay stand-in has no quota)
+        self.rate_limiter = RateLimiter({} if mode == "replay" else None)
+        
+        # Provider endpoints (pluggable: live APIs or the local replay stand-in)
+        self.mode = mode
+        self.api_keys = {
+            "polygon": POLYGON_API_KEY,
+            "finnhub": FINNHUB_API_KEY,
+            "twelvedata": TWELVEDATA_API_KEY,
+        }
+        if mode == "replay":
+            self.base_urls = {name: f"{replay_base_url}/{name}" for name in PROVIDER_BASE_URLS}
+            self.api_keys = {name: key or "replay" for name, key in self.api_keys.items()}
+        else:
+            self.base_urls = dict(PROVIDER_BASE_URLS)
+        self.recorder = ResponseRecorder() if mode == "record" else None
+        
+        # Per-symbol bar caches: (symbol, timeframe) -> deque (deque for memory efficiency)
+        self.bar_caches: Dict[Tuple[str, str], deque] = {}
+        
+        # Shared TTL cache + single-flight: key -> value / fetch time / in-flight future
         self.quote_cache = {}
-        self.quote_cache_time = None
+        self.quote_cache_time = {}
         self.quote_cache_ttl = 5  # seconds
+        self._inflight: Dict[Tuple[str, ...], asyncio.Future] = {}
+        self.cache_stats = {"hits": 0, "coalesced": 0, "fetches": 0}
+        
+        # Local bars built from quote ticks (any source), one aggregator per symbol
+        self.tick_aggregators: Dict[str, TickAggregator] = {}
+        self.tick_aggregator = self._aggregator(DEFAULT_SYMBOL)
+        
+        # Called with (bar, timeframe, symbol) whenever a bar is complete (e.g. persistence)
+        self.bar_listeners: List[Callable[[Dict[str, Any], str, str], Any]] = []
+    
+    @property
+    def m1_cache(self) -> deque:
+        return self._cache(DEFAULT_SYMBOL, "M1")
+    
+    @property
+    def m5_cache(self) -> deque:
+        return self._cache(DEFAULT_SYMBOL, "M5")
     
-    async def get_market_data(self, symbol: str = "XAUUSD", timeframe: str = "M1") -> Optional[Dict[str, Any]]:
+    def _cache(self, symbol: str, timeframe: str) -> deque:
+        cache = self.bar_caches.get((symbol, timeframe))
+        if cache is None:
+            cache = self.bar_caches[(symbol, timeframe)] = deque(maxlen=500)
+        return cache
+    
+    def _aggregator(self, symbol: str) -> TickAggregator:
+        aggregator = self.tick_aggregators.get(symbol)
+        if aggregator is None:
+            aggregator = self.tick_aggregators[symbol] = TickAggregator(timeframes=("M1", "M5"), max_bars=500)
+        return aggregator
+    
+    async def get_market_data(self, symbol: str = "XAUUSD", timeframe: str = "M1",
+                              priority: str = PRIORITY_NORMAL) -> Optional[Dict[str, Any]]:
         """
         Get market data from primary provider, fallback to secondary
         
+        Served from the shared cache while fresh; concurrent callers for the
+        same symbol/timeframe/priority share one in-flight provider request.
+        
         Args:
             symbol: Trading symbol (default XAUUSD)
             timeframe: Timeframe (M1 or M5)
+            priority: "normal" or "low" (low is deferred while provider budgets are tight)
         
         Returns:
             Normalized market data dict or None if all providers fail
         """
+        return await self._single_flight(
+            ("bar", symbol, timeframe),
+            lambda: self._fetch_market_data(symbol, timeframe, priority),
+            priority,
+        )
+    
+    async def get_quote(self, symbol: str = "XAUUSD", priority: str = PRIORITY_NORMAL) -> Optional[Dict[str, Any]]:
+        """
+        Get a spot quote and feed it into the local tick aggregator
+        
+        Served from the shared cache while fresh (see get_market_data).
+        
+        Args:
+            symbol: Trading symbol (default XAUUSD)
+            priority: "normal" or "low" (see get_market_data)
+        
+        Returns:
+            Normalized quote dict (see normalize_quote) or None on failure
+        """
+        return await self._single_flight(("quote", symbol), lambda: self._fetch_quote(symbol, priority), priority)
+    
+    def add_quote(self, quote: Dict[str, Any], symbol: str = DEFAULT_SYMBOL) -> None:
+        """
+        Feed a pushed quote to the tick aggregator and publish the bars it completes
+        
+        Used while streaming, when local bars are the primary bar source. Sparse
+        polled quotes go to the aggregator directly and are not published.
+        """
+        aggregator = self._aggregator(symbol)
+        for timeframe, bar in aggregator.add_quote(quote):
+            self._notify_bar_closed(bar, timeframe, aggregator.get_bars(timeframe), symbol)
+    
+    def get_local_bars(self, timeframe: str = "M1", include_current: bool = False,
+                       symbol: str = DEFAULT_SYMBOL) -> List[Dict[str, Any]]:
+        """
+        Get bars built locally from quote ticks
+        
+        Args:
+            timeframe: M1 or M5
+            include_current: Include the bar still being built
+            symbol: Trading symbol
+        
+        Returns:
+            List of bars in standard normalized format
+        """
+        return self._aggregator(symbol).get_bars(timeframe, include_current=include_current)
+    
+    async def get_market_data_batch(self, symbols: List[str], timeframe: str = "M1",
+                                    priority: str = PRIORITY_NORMAL) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Latest bar for several symbols, batched where the provider allows it
+        
+        TwelveData's time_series takes a comma-separated symbol list, so all
+        symbols cost one request there; symbols it does not return fall back to
+        get_market_data (polled concurrently).
+        
+        Returns:
+            symbol -> normalized market data dict or None
+        """
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        if len(symbols) > 1:
+            try:
+                batch = await self._fetch_twelvedata_batch(symbols, timeframe, priority)
+            except Exception as e:
+                logger.warning(f"Provider twelvedata batch failed: {str(e)}")
+                batch = {}
+            for symbol, data in batch.items():
+                results[symbol] = normalize_market_data(data, "twelvedata")
+                # Later single-symbol callers are served from the shared cache
+                self.quote_cache[("bar", symbol, timeframe)] = results[symbol]
+                self.quote_cache_time[("bar", symbol, timeframe)] = time.monotonic()
         
+        missing = [symbol for symbol in symbols if results.get(symbol) is None]
+        fetched = await asyncio.gather(*[self.get_market_data(symbol, timeframe, priority) for symbol in missing])
+        results.update(zip(missing, fetched))
+        return results
+    
+    async def _fetch_market_data(self, symbol: str, timeframe: str, priority: str) -> Optional[Dict[str, Any]]:
+        """Walk the provider chain until one returns data"""
         providers = [
             ("polygon", self._fetch_from_polygon),
             ("finnhub", self._fetch_from_finnhub),
@@ -54,7 +195,7 @@ class RESTPoller:
         
         for provider_name, fetch_func in providers:
             try:
-                data = await fetch_func(symbol, timeframe)
+                data = await fetch_func(symbol, timeframe, priority)
                 if data:
                     normalized = normalize_market_data(data, provider_name)
                     return normalized
@@ -65,27 +206,93 @@ class RESTPoller:
         logger.error(f"All providers failed for {symbol} {timeframe}")
         return None
     
-    async def _fetch_from_polygon(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
+    async def _fetch_quote(self, symbol: str, priority: str) -> Optional[Dict[str, Any]]:
+        """Fetch a spot quote and feed the tick aggregator"""
+        try:
+            data = await self._fetch_finnhub_quote(symbol, priority)
+        except Exception as e:
+            logger.warning(f"Provider finnhub quote failed: {str(e)}")
+            return None
+        
+        if not data:
+            return None
+        
+        quote = normalize_quote(data, "finnhub")
+        self._aggregator(symbol).add_quote(quote)
+        return quote
+    
+    async def _single_flight(self, key: Tuple[str, ...],
+                             fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+                             priority: str = PRIORITY_NORMAL) -> Optional[Dict[str, Any]]:
+        """
+        Serve key from cache if fresh, else join or start the in-flight fetch
+        
+        Failed fetches (None) are not cached, so the next caller retries. Only
+        fetches of the same priority are joined: a normal caller never waits on
+        a low-priority request deferred by the rate limiter.
+        """
+        fetched_at = self.quote_cache_time.get(key)
+        if fetched_at is not None and time.monotonic() - fetched_at < self.quote_cache_ttl:
+            self.cache_stats["hits"] += 1
+            return self.quote_cache[key]
+        
+        flight = key + (priority,)
+        inflight = self._inflight.get(flight)
+        if inflight is not None:
+            self.cache_stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight] = future
+        self.cache_stats["fetches"] += 1
+        result = None
+        try:
+            result = await fetch()
+            if result is not None:
+                self.quote_cache[key] = result
+                self.quote_cache_time[key] = time.monotonic()
+            return result
+        finally:
+            # Followers get None if the leader failed or was cancelled
+            future.set_result(result)
+            del self._inflight[flight]
+    
+    async def _http_get(self, provider: str, path: str, params: Dict[str, Any]) -> requests.Response:
+        """Blocking HTTP GET run in a worker thread so the event loop stays free"""
+        started = time.perf_counter()
+        response = await asyncio.to_thread(
+            requests.get, self.base_urls[provider] + path, params=params, timeout=5
+        )
+        if self.recorder is not None:
+            self.recorder.record(provider, path, params, response.status_code, response.text,
+                                 (time.perf_counter() - started) * 1000)
+        if response.status_code == 429:
+            self.rate_limiter.penalize(provider)
+        return response
+    
+    async def _fetch_from_polygon(self, symbol: str, timeframe: str,
+                                  priority: str = PRIORITY_NORMAL) -> Optional[Dict[str, Any]]:
         """Fetch from Polygon.io REST API"""
-        if not POLYGON_API_KEY:
+        if not self.api_keys["polygon"]:
             return None
         
-        await self._rate_limit("polygon")
+        if not await self.rate_limiter.acquire("polygon", priority):
+            return None
         
-        # Convert XAUUSD to proper format for Polygon
-        endpoint_symbol = "C:XAUUSD"
+        # Polygon prefixes currency and metal pairs with C:
+        endpoint_symbol = f"C:{symbol}"
         multiplier = {"M1": 1, "M5": 5}.get(timeframe, 1)
         
-        url = f"https://api.polygon.io/v2/aggs/ticker/{endpoint_symbol}/range/{multiplier}/minute"
+        path = f"/v2/aggs/ticker/{endpoint_symbol}/range/{multiplier}/minute"
         params = {
             "from": (datetime.utcnow() - timedelta(minutes=5)).strftime("%Y-%m-%d"),
             "to": datetime.utcnow().strftime("%Y-%m-%d"),
-            "apiKey": POLYGON_API_KEY,
+            "apiKey": self.api_keys["polygon"],
             "limit": 1
         }
         
         try:
-            response = requests.get(url, params=params, timeout=5)
+            response = await self._http_get("polygon", path, params)
             response.raise_for_status()
             data = response.json()
             
@@ -97,107 +304,172 @@ class RESTPoller:
         
         return None
     
-    async def _fetch_from_finnhub(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
-        """Fetch from Finnhub REST API"""
-        if not FINNHUB_API_KEY:
+    async def _fetch_finnhub_quote(self, symbol: str, priority: str = PRIORITY_NORMAL) -> Optional[Dict[str, Any]]:
+        """Fetch raw spot quote from Finnhub REST API"""
+        if not self.api_keys["finnhub"]:
             return None
         
-        await self._rate_limit("finnhub")
+        if not await self.rate_limiter.acquire("finnhub", priority):
+            return None
         
-        # Finnhub uses different symbol format
-        # For real-time: use quote endpoint
-        url = "https://finnhub.io/api/v1/quote"
+        path = "/api/v1/quote"
         params = {
-            "symbol": "XAUUSD",
-            "token": FINNHUB_API_KEY
+            "symbol": symbol,
+            "token": self.api_keys["finnhub"]
         }
         
         try:
-            response = requests.get(url, params=params, timeout=5)
+            response = await self._http_get("finnhub", path, params)
             response.raise_for_status()
             data = response.json()
             
-            # Extract OHLC from Finnhub quote
             if "c" in data:  # current price
-                return {
-                    "c": data["c"],
-                    "h": data.get("h", data["c"]),
-                    "l": data.get("l", data["c"]),
-                    "o": data.get("o", data["c"]),
-                    "t": int(time.time()),
-                    "v": data.get("v", 0),
-                    "bid": data.get("bid"),
-                    "ask": data.get("ask"),
-                }
+                return data
         except Exception as e:
             logger.error(f"Finnhub API error: {str(e)}")
         
         return None
     
-    async def _fetch_from_twelvedata(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
+    async def _fetch_from_finnhub(self, symbol: str, timeframe: str,
+                                  priority: str = PRIORITY_NORMAL) -> Optional[Dict[str, Any]]:
+        """Fetch from Finnhub REST API"""
+        # Finnhub only offers a spot quote here, not a candle
+        data = await self._fetch_finnhub_quote(symbol, priority)
+        if not data:
+            return None
+        
+        self._aggregator(symbol).add_quote(normalize_quote(data, "finnhub"))
+        
+        # Extract OHLC from Finnhub quote
+        return {
+            "c": data["c"],
+            "h": data.get("h", data["c"]),
+            "l": data.get("l", data["c"]),
+            "o": data.get("o", data["c"]),
+            "t": int(time.time()),
+            "v": data.get("v", 0),
+            "bid": data.get("bid"),
+            "ask": data.get("ask"),
+        }
+    
+    async def _fetch_from_twelvedata(self, symbol: str, timeframe: str,
+                                     priority: str = PRIORITY_NORMAL) -> Optional[Dict[str, Any]]:
         """Fetch from TwelveData REST API"""
-        if not TWELVEDATA_API_KEY:
+        if not self.api_keys["twelvedata"]:
             return None
         
-        await self._rate_limit("twelvedata")
+        if not await self.rate_limiter.acquire("twelvedata", priority):
+            return None
         
         interval = {"M1": "1min", "M5": "5min"}.get(timeframe, "1min")
         
-        url = "https://api.twelvedata.com/time_series"
+        path = "/time_series"
         params = {
-            "symbol": "XAUUSD",
+            "symbol": symbol,
             "interval": interval,
-            "apikey": TWELVEDATA_API_KEY,
+            "apikey": self.api_keys["twelvedata"],
             "outputsize": 1
         }
         
         try:
-            response = requests.get(url, params=params, timeout=5)
+            response = await self._http_get("twelvedata", path, params)
             response.raise_for_status()
-            data = response.json()
-            
-            if data.get("status") == "ok" and data.get("values"):
-                latest = data["values"][0]
-                return {
-                    "open": float(latest["open"]),
-                    "high": float(latest["high"]),
-                    "low": float(latest["low"]),
-                    "close": float(latest["close"]),
-                    "volume": int(latest.get("volume", 0)),
-                    "datetime": latest["datetime"]
-                }
+            return self._twelvedata_bar(response.json())
         except Exception as e:
             logger.error(f"TwelveData API error: {str(e)}")
         
         return None
     
-    async def _rate_limit(self, provider: str) -> None:
-        """Enforce rate limiting per provider"""
-        last_time = self.last_request_time.get(provider, 0)
-        elapsed = time.time() - last_time
+    async def _fetch_twelvedata_batch(self, symbols: List[str], timeframe: str,
+                                      priority: str = PRIORITY_NORMAL) -> Dict[str, Dict[str, Any]]:
+        """One TwelveData time_series request for several symbols (response keyed by symbol)"""
+        if not self.api_keys["twelvedata"]:
+            return {}
+        
+        if not await self.rate_limiter.acquire("twelvedata", priority):
+            return {}
         
-        if elapsed < self.rate_limit_delay:
-            await asyncio.sleep(self.rate_limit_delay - elapsed)
+        params = {
+            "symbol": ",".join(symbols),
+            "interval": {"M1": "1min", "M5": "5min"}.get(timeframe, "1min"),
+            "apikey": self.api_keys["twelvedata"],
+            "outputsize": 1
+        }
+        response = await self._http_get("twelvedata", "/time_series", params)
+        response.raise_for_status()
+        payload = response.json()
         
-        self.last_request_time[provider] = time.time()
+        bars = {}
+        for symbol in symbols:
+            bar = self._twelvedata_bar(payload.get(symbol) or {})
+            if bar:
+                bars[symbol] = bar
+        return bars
+    
+    @staticmethod
+    def _twelvedata_bar(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Latest value of a TwelveData time_series payload"""
+        if data.get("status") == "ok" and data.get("values"):
+            latest = data["values"][0]
+            return {
+                "open": float(latest["open"]),
+                "high": float(latest["high"]),
+                "low": float(latest["low"]),
+                "close": float(latest["close"]),
+                "volume": int(latest.get("volume", 0)),
+                "datetime": latest["datetime"]
+            }
+        return None
     
-    def get_cached_data(self, timeframe: str = "M1") -> List[Dict[str, Any]]:
+    def get_cached_data(self, timeframe: str = "M1", symbol: str = DEFAULT_SYMBOL) -> List[Dict[str, Any]]:
         """
         Get cached market data
         
         Args:
             timeframe: M1 or M5
+            symbol: Trading symbol
         
         Returns:
             List of cached candles
         """
-        cache = self.m1_cache if timeframe == "M1" else self.m5_cache
-        return list(cache)
+        return list(self._cache(symbol, timeframe))
     
-    def add_to_cache(self, data: Dict[str, Any], timeframe: str = "M1") -> None:
-        """Add data to cache"""
-        cache = self.m1_cache if timeframe == "M1" else self.m5_cache
-        cache.append(data)
+    def add_to_cache(self, data: Dict[str, Any], timeframe: str = "M1", symbol: str = DEFAULT_SYMBOL) -> None:
+        """Add data to cache (a re-fetched bar replaces the cached copy)"""
+        cache = self._cache(symbol, timeframe)
+        if FIXED_POINT_PRICES:
+            # Keep cached prices on the tick grid so later comparisons are exact
+            data = dict(data)
+            for field in ("open", "high", "low", "close", "bid", "ask"):
+                if data.get(field) is not None:
+                    data[field] = snap_price(data[field], symbol)
+        if cache and data.get("timestamp_utc") and cache[-1].get("timestamp_utc") == data.get("timestamp_utc"):
+            cache[-1] = data
+        else:
+            # A bar with a new timestamp means the previous one is final
+            if cache:
+                self._notify_bar_closed(cache[-1], timeframe, list(cache), symbol)
+            cache.append(data)
+    
+    def warm_start(self, bars: List[Dict[str, Any]], timeframe: str = "M1", symbol: str = DEFAULT_SYMBOL) -> None:
+        """Seed a bar cache with history (e.g. from MarketDataCache) without publishing it"""
+        self._cache(symbol, timeframe).extend(bars)
+    
+    def _notify_bar_closed(self, bar: Dict[str, Any], timeframe: str,
+                           history: List[Dict[str, Any]], symbol: str = DEFAULT_SYMBOL) -> None:
+        """Attach indicator values (computed over history ending at bar) and call listeners"""
+        if not self.bar_listeners:
+            return
+        
+        bar = dict(bar)
+        bar.update(indicator_calc.snapshot(
+            [b["high"] for b in history], [b["low"] for b in history], [b["close"] for b in history]
+        ))
+        for listener in self.bar_listeners:
+            try:
+                listener(bar, timeframe, symbol)
+            except Exception as e:
+                logger.error(f"Bar listener error: {str(e)}")
 
 # Global poller instance
 rest_poller = RESTPoller()
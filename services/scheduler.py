@@ -0,0 +1,154 @@
+"""
+Bar-Close Aligned Scheduler
+Wake the trading loop just after each expected bar close, with a lighter
+quote-only cadence in between for trade management
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Callable
+from datetime import datetime
+import pytz
+from utils.logger import get_logger
+from utils.tick_aggregator import TIMEFRAME_SECONDS
+from config.settings import (
+    SCHEDULER_CLOSE_OFFSET_SECONDS, SCHEDULER_MAX_PROVIDER_DELAY_SECONDS,
+    SCHEDULER_LATE_TOLERANCE_SECONDS, QUOTE_POLL_INTERVAL_SECONDS
+)
+
+logger = get_logger()
+
+def bar_open_timestamp(bar: Dict[str, Any]) -> Optional[float]:
+    """Epoch seconds of a normalized bar's open time (naive timestamps are UTC)"""
+    value = bar.get("timestamp_utc")
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=pytz.UTC)
+    return dt.timestamp()
+
+class BarCloseScheduler:
+    """
+    Compute wake-ups aligned to bar closes
+
+    Bar wake-ups happen at close + offset + provider delay. The provider
+    delay is learned: it grows when a fetch right after the close still
+    returns the previous bar and decays slowly while fetches are fresh.
+    """
+
+    def __init__(self, bar_seconds: int = TIMEFRAME_SECONDS["M1"],
+                 close_offset: float = SCHEDULER_CLOSE_OFFSET_SECONDS,
+                 quote_interval: float = QUOTE_POLL_INTERVAL_SECONDS,
+                 max_provider_delay: float = SCHEDULER_MAX_PROVIDER_DELAY_SECONDS,
+                 late_tolerance: float = SCHEDULER_LATE_TOLERANCE_SECONDS,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], Any] = asyncio.sleep):
+        """
+        Args:
+            bar_seconds: Base bar length (M1)
+            close_offset: Fixed wait after each close before fetching
+            quote_interval: Quote-only cadence between closes (0 disables)
+            max_provider_delay: Upper bound for the learned provider delay
+            late_tolerance: Wake-ups later than this count as missed deadlines
+            clock: Time source (epoch seconds), injectable for tests
+            sleep: Async sleep function, injectable for tests
+        """
+        self.bar_seconds = bar_seconds
+        self.close_offset = close_offset
+        self.quote_interval = quote_interval
+        self.max_provider_delay = max_provider_delay
+        self.late_tolerance = late_tolerance
+        self.clock = clock
+        self.sleep = sleep
+
+        self.provider_delay = 0.0
+        self._next_close: Optional[float] = None
+
+        self.metrics = {
+            "bar_wakeups": 0,
+            "quote_wakeups": 0,
+            "missed_deadlines": 0,
+            "last_lateness_ms": 0.0,
+            "max_lateness_ms": 0.0,
+            "stale_fetches": 0,
+        }
+
+    def next_bar_deadline(self) -> float:
+        """Epoch time of the next bar-processing wake-up"""
+        if self._next_close is None:
+            now = self.clock()
+            self._next_close = now - now % self.bar_seconds + self.bar_seconds
+        return self._next_close + self.close_offset + self.provider_delay
+
+    async def wait_next(self) -> Dict[str, Any]:
+        """
+        Sleep until the next wake-up
+
+        Returns:
+            {"kind": "bar"|"quote", "bar_close": epoch, "timeframes": [...]}
+            where timeframes lists the timeframes whose bar just closed
+        """
+        deadline = self.next_bar_deadline()
+        now = self.clock()
+
+        if 0 < self.quote_interval and now + self.quote_interval < deadline:
+            await self.sleep(self.quote_interval)
+            self.metrics["quote_wakeups"] += 1
+            return {"kind": "quote", "bar_close": self._next_close, "timeframes": []}
+
+        if deadline > now:
+            await self.sleep(deadline - now)
+
+        lateness = self.clock() - deadline
+        self._record_lateness(lateness)
+
+        bar_close = self._next_close
+        timeframes = [tf for tf, seconds in TIMEFRAME_SECONDS.items() if int(bar_close) % seconds == 0]
+
+        # Skip closes we slept through so the schedule never runs behind
+        now = self.clock()
+        self._next_close = now - now % self.bar_seconds + self.bar_seconds
+        if self._next_close <= bar_close:
+            self._next_close = bar_close + self.bar_seconds
+
+        self.metrics["bar_wakeups"] += 1
+        return {"kind": "bar", "bar_close": bar_close, "timeframes": timeframes}
+
+    def observe_bar(self, bar: Optional[Dict[str, Any]], bar_close: float) -> bool:
+        """
+        Learn the provider delay from a bar fetched after bar_close
+
+        Returns:
+            True if the fetched bar is the one that just closed (or newer)
+        """
+        opened = bar_open_timestamp(bar) if bar else None
+        if opened is None:
+            return False
+
+        fresh = opened + self.bar_seconds >= bar_close
+        if fresh:
+            self.provider_delay *= 0.9
+        else:
+            self.metrics["stale_fetches"] += 1
+            self.provider_delay = min(self.provider_delay + 1.0, self.max_provider_delay)
+            logger.debug(f"Provider returned stale bar, delay now {self.provider_delay:.1f}s")
+        return fresh
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Scheduler metrics snapshot"""
+        return dict(self.metrics, provider_delay_s=round(self.provider_delay, 2))
+
+    def _record_lateness(self, lateness: float) -> None:
+        lateness_ms = max(lateness, 0.0) * 1000
+        self.metrics["last_lateness_ms"] = round(lateness_ms, 1)
+        self.metrics["max_lateness_ms"] = round(max(self.metrics["max_lateness_ms"], lateness_ms), 1)
+        if lateness > self.late_tolerance:
+            self.metrics["missed_deadlines"] += 1
+            logger.warning(f"Missed bar deadline by {lateness:.2f}s")
+
+# Global scheduler instance
+bar_scheduler = BarCloseScheduler()
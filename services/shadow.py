@@ -0,0 +1,162 @@
+"""
+Shadow Strategy Variants
+Paper-trade alternative parameter sets on the live bar stream, each with its
+own trade ledger, so configurations can be compared side by side without a
+second deployment or extra API quota
+"""
+
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from sqlalchemy.orm import Session
+from config.settings import SHADOW_VARIANTS
+from config.strategy import StrategyEngine, RiskManager, RiskState, strategy_params
+from data.models import Trade, TradeDirection, LIVE_VARIANT
+from data.trade_stats import TradeStatistics
+from utils.indicators import SharedIndicatorCache
+from utils.position_book import OpenPositionBook
+from utils.logger import get_logger
+
+logger = get_logger()
+
+MAX_VARIANT_NAME = 32  # Trade.variant column length
+
+class ShadowVariant:
+    """One parameter set: engines per symbol plus its own risk state, book and statistics"""
+
+    def __init__(self, name: str, params: Dict[str, Any], symbols: List[str], db: Session,
+                 writer=None, calc=None, key_suffix: str = ""):
+        self.name = name
+        self.params = strategy_params(params)
+        self.risk_state = RiskState(variant=name)
+        self.stats = TradeStatistics(variant=name)
+        if key_suffix:
+            self.risk_state.STATE_KEY += key_suffix
+            self.stats.STATE_KEY += key_suffix
+        self.books = {symbol: OpenPositionBook(symbol=symbol, variant=name) for symbol in symbols}
+        self.engines = {
+            symbol: StrategyEngine(db, writer=writer, risk_state=self.risk_state, position_book=self.books[symbol],
+                                   stats=self.stats, symbol=symbol, params=params, variant=name, calc=calc)
+            for symbol in symbols
+        }
+        self.risk_manager = RiskManager(db, state=self.risk_state, variant=name)
+
+    def load(self, db: Session) -> "ShadowVariant":
+        self.risk_state.load(db)
+        self.stats.load(db)
+        for book in self.books.values():
+            book.load(db)
+        return self
+
+class ShadowRunner:
+    """
+    Evaluates every shadow variant on the snapshots the live strategy just used
+
+    Variants read the same bar lists as the live engines through one
+    SharedIndicatorCache, so an indicator shared with the live parameters (or
+    another variant) is computed once per snapshot; a variant only adds its
+    own scoring, levels and exit checks. Trades are written through the same
+    DB writer, tagged with the variant name.
+    """
+
+    def __init__(self, db: Session, symbols: List[str], variants: Optional[Dict[str, Dict[str, Any]]] = None,
+                 writer=None, calc=None, key_suffix: str = ""):
+        """
+        Args:
+            db: Session for reads (state restore, query fallbacks)
+            symbols: Instruments traded by this process
+            variants: Variant name -> STRATEGY_PARAMS overrides (default SHADOW_VARIANTS)
+            writer: Optional data.db_writer.DBWriter for trade inserts and updates
+            calc: Indicator calculator shared with the live engines
+            key_suffix: Appended to the BotState keys (per-shard state)
+        """
+        variants = SHADOW_VARIANTS if variants is None else variants
+        for name in variants:
+            if name == LIVE_VARIANT or not name or len(name) > MAX_VARIANT_NAME:
+                raise ValueError(f"Invalid shadow variant name: {name!r}")
+        self.db = db
+        self.writer = writer
+        self.calc = calc or SharedIndicatorCache()
+        self.variants = {
+            name: ShadowVariant(name, params, symbols, db, writer=writer, calc=self.calc, key_suffix=key_suffix)
+            for name, params in variants.items()
+        }
+
+    def __bool__(self) -> bool:
+        return bool(self.variants)
+
+    def load(self, db: Optional[Session] = None) -> "ShadowRunner":
+        """Restore each variant's counters and open positions"""
+        for variant in self.variants.values():
+            variant.load(db or self.db)
+        if self.variants:
+            logger.info(f"Shadow variants: {', '.join(self.variants)}")
+        return self
+
+    def process(self, item: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Run every variant on one live pipeline item
+
+        Args:
+            item: {"kind": "analysis", "analyses": {symbol: data}, "prices": {symbol: price}} or
+                  {"kind": "quote", "prices": {symbol: price}, "timestamp": ...}
+
+        Returns:
+            Shadow signals generated (each tagged with "variant")
+        """
+        # Exit checks for symbols that only have a price this time
+        for variant in self.variants.values():
+            for symbol, price in item.get("prices", {}).items():
+                engine = variant.engines.get(symbol)
+                if engine is not None:
+                    engine.update_trades({"current_price": price, "timestamp": item.get("timestamp")
+                                          or datetime.utcnow()})
+        if item["kind"] == "quote":
+            return []
+
+        signals = []
+        for variant in self.variants.values():
+            for symbol, analysis_data in item["analyses"].items():
+                engine = variant.engines.get(symbol)
+                if engine is None:
+                    continue
+                can_trade, _ = variant.risk_manager.can_generate_signal()
+                signal = engine.generate_signal(analysis_data) if can_trade else None
+                if signal:
+                    self._open(variant, symbol, signal)
+                    signals.append(dict(signal, variant=variant.name))
+                engine.update_trades(analysis_data)
+        if signals and self.writer is not None:
+            for name in {signal["variant"] for signal in signals}:
+                self.writer.submit(self.variants[name].risk_state.snapshot_mutation())
+                self.writer.submit(self.variants[name].stats.snapshot_mutation())
+        return signals
+
+    def _open(self, variant: ShadowVariant, symbol: str, signal: Dict[str, Any]) -> None:
+        trade = Trade(
+            id=str(uuid.uuid4()),
+            signal_id=signal["signal_id"],
+            ticker=symbol,
+            variant=variant.name,
+            direction=TradeDirection[signal["direction"]],
+            entry_price=signal["entry_price"],
+            sl_price=signal["sl_price"],
+            tp_price=signal["tp_price"],
+            signal_timestamp_utc=datetime.utcnow(),
+            confidence_score=signal["confidence_score"],
+        )
+        variant.engines[symbol].open_trade(trade)
+
+    def compare(self, live: Optional[TradeStatistics] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Side-by-side metrics per variant (and the live ledger when given)
+
+        Returns:
+            {variant: summary()} plus opened/open counts
+        """
+        ledgers = {LIVE_VARIANT: live} if live is not None else {}
+        ledgers.update({name: variant.stats for name, variant in self.variants.items()})
+        return {
+            name: dict(stats.summary(), opened=stats.opened, open=stats.open)
+            for name, stats in ledgers.items()
+        }
@@ -0,0 +1,109 @@
+"""
+Symbol Worker Processes
+Shard the configured symbols across processes once one event loop (one
+core) can no longer keep up with all of them
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+from typing import Dict, Any, List, Callable, Optional
+from config.settings import SYMBOLS, SYMBOL_WORKERS, SYMBOLS_PER_WORKER
+from utils.logger import get_logger
+
+logger = get_logger()
+
+def worker_count(symbols: List[str] = None, workers: int = SYMBOL_WORKERS,
+                 per_worker: int = SYMBOLS_PER_WORKER) -> int:
+    """
+    Number of processes to run
+
+    Args:
+        symbols: Symbols to trade (default SYMBOLS)
+        workers: Explicit process count; 0 sizes it from per_worker, capped at the core count
+        per_worker: Symbols one event loop handles comfortably
+    """
+    symbols = SYMBOLS if symbols is None else symbols
+    if workers <= 0:
+        workers = min(os.cpu_count() or 1, math.ceil(len(symbols) / max(1, per_worker)))
+    return max(1, min(workers, len(symbols)))
+
+def shard_symbols(symbols: List[str], workers: int) -> List[List[str]]:
+    """Round-robin symbols into workers non-empty shards (order kept within a shard)"""
+    workers = max(1, min(workers, len(symbols)))
+    return [symbols[index::workers] for index in range(workers)]
+
+def _run_shard(symbols: List[str], worker_index: int, shard_count: int, events=None) -> None:
+    """Process entry point: run the trading loop for one shard"""
+    import main
+    try:
+        asyncio.run(main.main_loop(symbols, worker_index=worker_index, shard_count=shard_count, events=events))
+    except KeyboardInterrupt:
+        pass
+
+class SymbolWorkerPool:
+    """
+    Child processes for every shard but the first
+
+    The parent process keeps shard 0 (plus the HTTP server and Telegram bot); each
+    other shard runs its own event loop, bar caches, strategies and DB writer.
+    Workers do not talk to Telegram: they put their events on a queue that a
+    relay thread in the parent hands to on_event.
+    """
+
+    def __init__(self, shards: List[List[str]], on_event: Optional[Callable[[Any], None]] = None):
+        """
+        Args:
+            shards: Symbols per shard (shard 0 stays in this process)
+            on_event: Called in the parent for every event a worker forwards
+        """
+        self.shards = shards
+        self.on_event = on_event
+        self.processes: List[multiprocessing.Process] = []
+        self.events = None
+        self._relay: Optional[threading.Thread] = None
+
+    def start(self) -> "SymbolWorkerPool":
+        # spawn: children must not inherit the parent's threads, locks or DB connections
+        context = multiprocessing.get_context("spawn")
+        if self.on_event is not None:
+            self.events = context.Queue()
+            self._relay = threading.Thread(target=self._run_relay, name="symbol-events", daemon=True)
+            self._relay.start()
+        for index, shard in enumerate(self.shards[1:], start=1):
+            process = context.Process(target=_run_shard, args=(shard, index, len(self.shards), self.events),
+                                      name=f"symbols-{index}", daemon=True)
+            process.start()
+            self.processes.append(process)
+            logger.info(f"Symbol worker {index} started for {', '.join(shard)} (pid {process.pid})")
+        return self
+
+    def stop(self, timeout: float = 10.0) -> None:
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join(timeout)
+        self.processes = []
+        if self._relay is not None:
+            self.events.put(None)
+            self._relay.join(timeout)
+            self._relay = None
+
+    def _run_relay(self) -> None:
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            try:
+                self.on_event(event)
+            except Exception as e:
+                logger.error(f"Symbol worker event failed: {str(e)}")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "shards": self.shards,
+            "workers": [{"name": p.name, "pid": p.pid, "alive": p.is_alive()} for p in self.processes],
+        }
@@ -0,0 +1,245 @@
+"""
+WebSocket Market Data Stream
+Consume pushed ticks/bars with reconnect, stale-feed detection and REST fallback
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import websocket
+from utils.logger import get_logger
+from config.settings import (
+    WS_URL, WS_SYMBOL, WS_DISCONNECT_ALERT_SECONDS,
+    WS_RECONNECT_MIN_SECONDS, WS_RECONNECT_MAX_SECONDS
+)
+
+logger = get_logger()
+
+def parse_stream_message(raw: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Parse a pushed WebSocket message into events
+
+    Supported formats:
+        Finnhub trades: {"type": "trade", "data": [{"p": 2035.5, "t": 1700055000123, "v": 1}]}
+        Quote:          {"type": "quote", "price": 2035.5, "bid": ..., "ask": ..., "timestamp": ...}
+        Bar:            {"type": "bar", "timeframe": "M1", "timestamp_utc": ..., "open": ..., ...}
+
+    Returns:
+        List of ("quote", quote) or ("bar", bar) events; empty for pings/unknown
+    """
+    try:
+        message = json.loads(raw)
+    except (TypeError, ValueError):
+        return []
+
+    if not isinstance(message, dict):
+        return []
+
+    msg_type = message.get("type")
+    events = []
+
+    if msg_type == "trade":
+        for trade in message.get("data") or []:
+            if trade.get("p") is None:
+                continue
+            timestamp = trade.get("t")
+            events.append(("quote", {
+                "timestamp": timestamp / 1000 if timestamp else None,
+                "price": float(trade["p"]),
+                "bid": None,
+                "ask": None,
+                "volume": int(trade.get("v") or 0),
+            }))
+    elif msg_type == "quote" and message.get("price") is not None:
+        events.append(("quote", {
+            "timestamp": message.get("timestamp"),
+            "price": float(message["price"]),
+            "bid": message.get("bid"),
+            "ask": message.get("ask"),
+            "volume": int(message.get("volume") or 0),
+        }))
+    elif msg_type == "bar" and message.get("close") is not None:
+        bar = {k: v for k, v in message.items() if k != "type"}
+        bar.setdefault("timeframe", "M1")
+        events.append(("bar", bar))
+
+    return events
+
+class WebSocketStream:
+    """
+    Streaming market data client
+
+    The socket is read on a daemon thread (websocket-client is blocking);
+    events are handed to the asyncio loop with call_soon_threadsafe so the
+    tick aggregator and caches are only ever touched from the loop thread.
+    """
+
+    def __init__(self, url: str = WS_URL, symbol: str = WS_SYMBOL,
+                 on_quote: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_bar: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 stale_seconds: float = WS_DISCONNECT_ALERT_SECONDS,
+                 reconnect_min: float = WS_RECONNECT_MIN_SECONDS,
+                 reconnect_max: float = WS_RECONNECT_MAX_SECONDS):
+        """
+        Args:
+            url: WebSocket endpoint
+            symbol: Provider symbol to subscribe to
+            on_quote: Called on the loop thread for every pushed tick/quote
+            on_bar: Called on the loop thread for every pushed bar
+            stale_seconds: Feed is stale after this long without messages
+            reconnect_min: Initial reconnect backoff (seconds)
+            reconnect_max: Maximum reconnect backoff (seconds)
+        """
+        self.url = url
+        self.symbol = symbol
+        self.on_quote = on_quote
+        self.on_bar = on_bar
+        self.stale_seconds = stale_seconds
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+
+        self.connected = False
+        self.reconnects = 0
+        self.messages_received = 0
+        self.last_message_time = None
+        self.fallback_active = True  # REST until the stream proves healthy
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._update_event: Optional[asyncio.Event] = None
+        self._ws = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Start the reader thread (call from inside the running event loop)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._update_event = asyncio.Event()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ws-stream", daemon=True)
+        self._thread.start()
+        logger.info(f"WebSocket stream started: {self.symbol}")
+
+    def stop(self) -> None:
+        """Stop the reader thread and close the socket"""
+        self._stop_event.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.connected = False
+
+    def is_stale(self) -> bool:
+        """True if no message arrived within stale_seconds"""
+        if self.last_message_time is None:
+            return True
+        return time.time() - self.last_message_time > self.stale_seconds
+
+    def check_health(self) -> bool:
+        """
+        Update REST fallback state from feed staleness
+
+        Returns:
+            True if the stream is healthy and REST polling can be skipped
+        """
+        stale = not self.connected or self.is_stale()
+        if stale and not self.fallback_active:
+            logger.warning(f"WebSocket feed stale for >{self.stale_seconds}s, falling back to REST polling")
+            self.fallback_active = True
+        elif not stale and self.fallback_active:
+            logger.info("WebSocket feed healthy, REST polling fallback disabled")
+            self.fallback_active = False
+        return not self.fallback_active
+
+    async def wait_for_update(self, timeout: float) -> bool:
+        """
+        Wait until the next pushed event or timeout
+
+        Returns:
+            True if an event arrived, False on timeout
+        """
+        if self._update_event is None:
+            await asyncio.sleep(timeout)
+            return False
+        try:
+            await asyncio.wait_for(self._update_event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._update_event.clear()
+
+    # ===== READER THREAD =====
+    def _run(self) -> None:
+        """Connect, subscribe and read until stopped; reconnect with backoff"""
+        backoff = self.reconnect_min
+
+        while not self._stop_event.is_set():
+            try:
+                self._ws = websocket.create_connection(self.url, timeout=10)
+                self._ws.settimeout(1.0)
+                self._ws.send(json.dumps({"type": "subscribe", "symbol": self.symbol}))
+                self.connected = True
+                backoff = self.reconnect_min
+                logger.info("WebSocket connected")
+
+                while not self._stop_event.is_set():
+                    try:
+                        raw = self._ws.recv()
+                    except websocket.WebSocketTimeoutException:
+                        continue
+                    if raw == "" or raw is None:
+                        raise ConnectionError("connection closed by server")
+                    self._on_message(raw)
+
+            except Exception as e:
+                if not self._stop_event.is_set():
+                    logger.warning(f"WebSocket error: {str(e)}")
+            finally:
+                self.connected = False
+                if self._ws is not None:
+                    try:
+                        self._ws.close()
+                    except Exception:
+                        pass
+                    self._ws = None
+
+            if self._stop_event.is_set():
+                break
+
+            # Exponential backoff with jitter
+            delay = backoff * (0.5 + random.random() / 2)
+            self.reconnects += 1
+            logger.info(f"WebSocket reconnecting in {delay:.1f}s")
+            self._stop_event.wait(delay)
+            backoff = min(backoff * 2, self.reconnect_max)
+
+    def _on_message(self, raw: str) -> None:
+        """Record liveness and dispatch parsed events to the event loop"""
+        self.last_message_time = time.time()
+        self.messages_received += 1
+
+        events = parse_stream_message(raw)
+        if events and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._dispatch, events)
+
+    def _dispatch(self, events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Run handlers on the event loop thread"""
+        for kind, payload in events:
+            try:
+                if kind == "quote" and self.on_quote:
+                    self.on_quote(payload)
+                elif kind == "bar" and self.on_bar:
+                    self.on_bar(payload)
+            except Exception as e:
+                logger.error(f"WebSocket handler error: {str(e)}")
+        if self._update_event is not None:
+            self._update_event.set()
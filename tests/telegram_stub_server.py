@@ -0,0 +1,142 @@
+"""
+Local Stand-in Telegram Bot API
+Minimal getMe/getUpdates/sendMessage/sendPhoto endpoints for exercising
+services.broadcast and the bot's command handlers offline
+"""
+
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Set, Tuple
+
+class StubBotAPIServer:
+    """
+    Answers POST /bot<token>/<method> like the Bot API: records deliveries,
+    can simulate flood waits (429) and chats that blocked the bot (403), and
+    serves pushed commands to a polling client
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.sent: List[Tuple[float, int, str]] = []  # (monotonic time, chat_id, text or photo caption)
+        self.photos: List[Tuple[int, str]] = []  # (chat_id, "upload" or the file_id re-sent)
+        self.flood_waits: Dict[int, int] = {}  # chat_id -> 429 answers still to give
+        self.retry_after = 1
+        self.blocked: Set[int] = set()
+        self.requests = 0
+        self.updates: List[dict] = []
+        self._update_id = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = stub._parse(self.rfile.read(length), self.headers.get("Content-Type", ""))
+                status, body = stub._answer(self.path, payload)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self.url = f"http://{self.host}:{self.port}"
+
+    def start(self) -> "StubBotAPIServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def push_command(self, chat_id: int, text: str) -> None:
+        """Queue a private-chat command message for getUpdates"""
+        with self._lock:
+            self._update_id += 1
+            command = text.split()[0]
+            self.updates.append({
+                "update_id": self._update_id,
+                "message": {
+                    "message_id": self._update_id, "date": int(time.time()), "text": text,
+                    "chat": {"id": chat_id, "type": "private"},
+                    "from": {"id": chat_id, "is_bot": False, "first_name": "Test", "username": f"user{chat_id}"},
+                    "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+                },
+            })
+
+    @staticmethod
+    def _parse(raw: bytes, content_type: str) -> dict:
+        if "json" in content_type:
+            return json.loads(raw or b"{}")
+        if content_type.startswith("multipart/"):
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + raw)
+            payload = {}
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                if part.get_filename():
+                    payload[name] = part.get_payload(decode=True)
+                else:
+                    value = part.get_payload(decode=True).decode()
+                    payload[name] = int(value) if value.lstrip("-").isdigit() else value
+            return payload
+        payload = {}
+        for key, values in parse_qs(raw.decode()).items():
+            try:
+                payload[key] = json.loads(values[0])
+            except ValueError:
+                payload[key] = values[0]
+        return payload
+
+    def _answer(self, path: str, payload: dict):
+        method = path.rsplit("/", 1)[-1]
+        if method == "getMe":
+            return 200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Stub",
+                                                "username": "stub_bot"}}
+        if method == "deleteWebhook":
+            return 200, {"ok": True, "result": True}
+        if method == "getUpdates":
+            offset = payload.get("offset") or 0
+            with self._lock:
+                self.updates = [u for u in self.updates if u["update_id"] >= offset]
+                pending = list(self.updates)
+            if not pending:
+                time.sleep(0.05)  # short stand-in for long polling
+            return 200, {"ok": True, "result": pending}
+        if method not in ("sendMessage", "sendPhoto"):
+            return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+        chat_id = payload.get("chat_id")
+        with self._lock:
+            self.requests += 1
+            if chat_id in self.blocked:
+                return 403, {"ok": False, "error_code": 403,
+                             "description": "Forbidden: bot was blocked by the user"}
+            if self.flood_waits.get(chat_id):
+                self.flood_waits[chat_id] -= 1
+                return 429, {"ok": False, "error_code": 429,
+                             "description": f"Too Many Requests: retry after {self.retry_after}",
+                             "parameters": {"retry_after": self.retry_after}}
+            if method == "sendPhoto":
+                photo = payload.get("photo")
+                self.photos.append((chat_id, "upload" if isinstance(photo, bytes) else photo))
+                self.sent.append((time.monotonic(), chat_id, payload.get("caption")))
+                return 200, {"ok": True, "result": {"message_id": len(self.sent), "chat": {"id": chat_id},
+                                                    "photo": [{"file_id": "stub-photo-small"},
+                                                              {"file_id": "stub-photo"}]}}
+            self.sent.append((time.monotonic(), chat_id, payload.get("text")))
+        return 200, {"ok": True, "result": {"message_id": len(self.sent), "chat": {"id": chat_id},
+                                            "text": payload.get("text")}}
@@ -0,0 +1,145 @@
+"""
+Unit Tests for Write-Behind Bar Persistence
+"""
+
+import os
+import tempfile
+import time
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, select, func
+from data.models import Base, MarketDataCache
+from data.bar_persister import BarPersister, load_recent_bars, load_bar_range
+from datetime import datetime
+from services.rest_poller import RESTPoller
+
+def make_bar(minute: int, close: float = 2035.5):
+    return {"timestamp_utc": f"2023-11-15T13:{minute:02d}:00+00:00", "open": 2035.0, "high": 2036.0,
+            "low": 2034.5, "close": close, "volume": 100, "bid": None, "ask": None}
+
+class TestBarPersister(unittest.TestCase):
+    """Test batching, flush triggers and idempotent upserts"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.engine = create_engine(f"sqlite:///{self.path}")
+        Base.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def _rows(self):
+        with self.engine.connect() as conn:
+            return conn.execute(select(MarketDataCache.timestamp_utc, MarketDataCache.close)
+                                .order_by(MarketDataCache.timestamp_utc)).all()
+
+    def test_batch_size_trigger(self):
+        """Test a full batch is written without waiting for the interval"""
+        persister = BarPersister(self.engine, batch_size=3, flush_interval=60).start()
+        try:
+            for minute in range(3):
+                persister.enqueue(make_bar(minute), "M1")
+            self.assertTrue(persister.flush(timeout=5))
+            self.assertEqual(len(self._rows()), 3)
+            self.assertEqual(persister.stats["batches"], 1)
+        finally:
+            persister.stop()
+
+    def test_time_trigger(self):
+        """Test a partial batch is written after the flush interval"""
+        persister = BarPersister(self.engine, batch_size=100, flush_interval=0.1).start()
+        try:
+            persister.enqueue(make_bar(0), "M1")
+            deadline = time.monotonic() + 5
+            while persister.stats["written"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(len(self._rows()), 1)
+        finally:
+            persister.stop()
+
+    def test_duplicates_are_idempotent(self):
+        """Test a re-sent bar updates the stored row instead of failing"""
+        persister = BarPersister(self.engine, batch_size=1, flush_interval=60).start()
+        try:
+            persister.enqueue(make_bar(0, close=2035.5), "M1")
+            persister.flush()
+            persister.enqueue(make_bar(0, close=2035.9), "M1")
+            persister.enqueue(make_bar(0, close=2035.9), "M5")
+            persister.flush()
+        finally:
+            persister.stop()
+
+        with self.engine.connect() as conn:
+            count = conn.execute(select(func.count()).select_from(MarketDataCache)).scalar()
+        self.assertEqual(count, 2)  # one per timeframe
+        self.assertEqual(self._rows()[0].close, 2035.9)
+        self.assertEqual(persister.stats["errors"], 0)
+
+    def test_stop_drains_queue(self):
+        persister = BarPersister(self.engine, batch_size=100, flush_interval=60).start()
+        for minute in range(5):
+            persister.enqueue(make_bar(minute), "M1")
+        persister.stop()
+        self.assertEqual(len(self._rows()), 5)
+
+    def test_indicators_round_trip(self):
+        """Test indicator values survive a restart and are kept on indicator-less re-sends"""
+        persister = BarPersister(self.engine, batch_size=1, flush_interval=60).start()
+        try:
+            bar = dict(make_bar(0), ema_5=2035.1, rsi=55.5, atr=None)
+            persister.enqueue(bar, "M1")
+            persister.enqueue(make_bar(1), "M1")
+            persister.flush()
+            persister.enqueue(make_bar(0, close=2035.7), "M1")  # no indicators
+            persister.flush()
+        finally:
+            persister.stop()
+
+        bars = load_recent_bars("M1", limit=10, engine=self.engine)
+        self.assertEqual([b["timestamp_utc"] for b in bars],
+                         ["2023-11-15T13:00:00+00:00", "2023-11-15T13:01:00+00:00"])
+        self.assertEqual(bars[0]["close"], 2035.7)
+        self.assertEqual(bars[0]["ema_5"], 2035.1)
+        self.assertEqual(bars[0]["rsi"], 55.5)
+        self.assertIsNone(bars[0]["atr"])
+
+        self.assertEqual(len(load_recent_bars("M1", limit=1, engine=self.engine)), 1)
+        in_range = load_bar_range("M1", datetime(2023, 11, 15, 13, 1), datetime(2023, 11, 15, 14, 0),
+                                  engine=self.engine)
+        self.assertEqual(len(in_range), 1)
+
+class TestBarListeners(unittest.TestCase):
+    """Test the poller publishes bars once they are final"""
+
+    def test_previous_bar_published_on_new_timestamp(self):
+        poller = RESTPoller()
+        closed = []
+        poller.bar_listeners.append(lambda bar, tf, symbol: closed.append((tf, bar["close"])))
+
+        poller.add_to_cache(make_bar(0, close=1.0), "M1")
+        poller.add_to_cache(make_bar(0, close=2.0), "M1")  # same bar re-fetched
+        self.assertEqual(closed, [])
+        poller.add_to_cache(make_bar(1, close=3.0), "M1")
+        self.assertEqual(closed, [("M1", 2.0)])
+
+    def test_published_bar_carries_indicators(self):
+        """Test indicators are computed over the history ending at the closed bar"""
+        poller = RESTPoller()
+        published = []
+        poller.bar_listeners.append(lambda bar, tf, symbol: published.append(bar))
+        poller.warm_start([make_bar(m, close=2035.0 + m * 0.1) for m in range(30)], "M1")
+        self.assertEqual(published, [])
+
+        poller.add_to_cache(make_bar(30), "M1")
+        self.assertEqual(published[0]["timestamp_utc"], make_bar(29)["timestamp_utc"])
+        self.assertIsNotNone(published[0]["ema_20"])
+        self.assertIsNotNone(published[0]["rsi"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Unit Tests for Telegram Broadcast Fan-out
+"""
+
+import asyncio
+import tempfile
+import time
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.db import SessionLocal, init_db
+from data.models import Subscriber
+from data.subscribers import SubscriberRegistry
+from services.broadcast import Broadcaster
+from tests.telegram_stub_server import StubBotAPIServer
+
+class TestSubscriberRegistry(unittest.TestCase):
+    """Test subscriptions persist and reload"""
+
+    def setUp(self):
+        self.db = SessionLocal()
+        init_db()
+        self.db.query(Subscriber).delete()
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.query(Subscriber).delete()
+        self.db.commit()
+        self.db.close()
+
+    def test_subscribe_round_trip(self):
+        registry = SubscriberRegistry().load(self.db)
+        self.assertTrue(registry.subscribe(101, "alice"))
+        self.assertFalse(registry.subscribe(101))
+        registry.subscribe(102)
+        self.assertTrue(registry.unsubscribe(102))
+
+        restored = SubscriberRegistry().load(self.db)
+        self.assertEqual(restored.active_ids(), [101])
+        self.assertEqual(self.db.get(Subscriber, 101).username, "alice")
+        self.assertFalse(self.db.get(Subscriber, 102).active)
+
+    def test_failed_write_is_retried_then_reverted(self):
+        """Test a change whose writer tick rolls back is re-submitted, and reverted if it never lands"""
+        class FlakyWriter:
+            def __init__(self, failures):
+                self.failures = failures
+                self.applied = []
+
+            def submit(self, mutation, on_failure=None):
+                if self.failures:
+                    self.failures -= 1
+                    on_failure()
+                else:
+                    self.applied.append(mutation)
+
+        writer = FlakyWriter(failures=1)
+        registry = SubscriberRegistry(writer=writer)
+        registry.subscribe(101)
+        self.assertEqual((registry.active_ids(), len(writer.applied)), ([101], 1))
+
+        registry = SubscriberRegistry(writer=FlakyWriter(failures=10))
+        registry.subscribe(101)
+        self.assertEqual(registry.active_ids(), [])
+
+class TestBroadcaster(unittest.TestCase):
+    """Test fan-out against a local stand-in Bot API"""
+
+    def setUp(self):
+        self.server = StubBotAPIServer().start()
+        self.registry = SubscriberRegistry()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _run(self, subscribers, texts, **kwargs):
+        for chat_id in subscribers:
+            self.registry.subscribe(chat_id)
+
+        async def scenario():
+            broadcaster = Broadcaster(self.registry, token="TEST", api_base=self.server.url, **kwargs).start()
+            started = time.monotonic()
+            for text in texts:
+                broadcaster.publish(text)
+            self.assertTrue(await broadcaster.join(timeout=20))
+            elapsed = time.monotonic() - started
+            await broadcaster.stop()
+            return broadcaster, elapsed
+
+        return asyncio.run(scenario())
+
+    def test_fan_out_to_many(self):
+        broadcaster, elapsed = self._run(range(1, 301), ["signal"], rate=1000, concurrency=50)
+        self.assertEqual(sorted(chat for _, chat, _ in self.server.sent), list(range(1, 301)))
+        self.assertEqual(broadcaster.get_stats()["sent"], 300)
+        self.assertLess(elapsed, 10)
+
+    def test_global_rate_limit(self):
+        _, elapsed = self._run(range(1, 61), ["signal"], rate=20, concurrency=20)
+        self.assertEqual(len(self.server.sent), 60)
+        # 20 burst tokens, then 20/s for the other 40
+        self.assertGreaterEqual(elapsed, 1.8)
+
+    def test_per_chat_spacing(self):
+        self._run([7], ["first", "second"], rate=100, per_chat_interval=0.5)
+        (first_at, _, first), (second_at, _, second) = self.server.sent
+        self.assertEqual((first, second), ("first", "second"))
+        self.assertGreaterEqual(second_at - first_at, 0.45)
+
+    def test_flood_wait_retried_and_blocked_removed(self):
+        self.server.flood_waits[1] = 1
+        self.server.blocked.add(2)
+        broadcaster, elapsed = self._run([1, 2, 3], ["signal"], rate=100)
+
+        self.assertEqual(sorted(chat for _, chat, _ in self.server.sent), [1, 3])
+        self.assertGreaterEqual(elapsed, 1.0)  # retry_after honoured
+        stats = broadcaster.get_stats()
+        self.assertEqual((stats["flood_waits"], stats["unsubscribed"], stats["failed"]), (1, 1, 0))
+        self.assertEqual(sorted(self.registry.active_ids()), [1, 3])
+
+    def test_photo_uploaded_once_after_text(self):
+        self.server.blocked.add(1)
+        for chat_id in range(1, 21):
+            self.registry.subscribe(chat_id)
+
+        async def scenario():
+            broadcaster = Broadcaster(self.registry, token="TEST", api_base=self.server.url, rate=1000).start()
+            with tempfile.NamedTemporaryFile(suffix=".png") as chart:
+                chart.write(b"\x89PNG chart")
+                chart.flush()
+                # The chart is queued first but must not delay the signal text
+                broadcaster.publish_photo(chart.name, "chart")
+                broadcaster.publish("signal")
+                self.assertTrue(await broadcaster.join(timeout=20))
+            await broadcaster.stop()
+            return broadcaster
+
+        broadcaster = asyncio.run(scenario())
+        texts = [at for at, _, text in self.server.sent if text == "signal"]
+        photos = [at for at, _, text in self.server.sent if text == "chart"]
+        self.assertEqual((len(texts), len(photos)), (19, 19))
+        self.assertLessEqual(max(texts), min(photos))
+        self.assertEqual(self.server.photos[0], (2, "upload"))
+        self.assertEqual({file_id for _, file_id in self.server.photos[1:]}, {"stub-photo"})
+        self.assertEqual(broadcaster.get_stats()["photo_uploads"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
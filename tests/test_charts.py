@@ -0,0 +1,171 @@
+"""
+Unit Tests for the Chart Service
+"""
+
+import asyncio
+import importlib.util
+import os
+import tempfile
+import time
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.chart_generator import ChartService, chart_key, signal_overlays, render_chart
+
+def fake_render(spec, path):
+    """Stand-in renderer (module level so the spawned workers can import it)"""
+    time.sleep(0.3)
+    with open(path, "wb") as f:
+        f.write(b"PNG" + str(spec["bars"][-1]["close"]).encode() + b"." * 1000)
+
+def failing_render(spec, path):
+    raise ValueError("no data")
+
+def make_bars(count: int = 30, last_close: float = 2000.0):
+    bars = [{"timestamp_utc": f"2025-01-02T10:{i:02d}:00", "open": 2000.0, "high": 2001.0,
+             "low": 1999.0, "close": 2000.0, "volume": 10} for i in range(count)]
+    bars[-1]["close"] = last_close
+    return bars
+
+class TestChartKey(unittest.TestCase):
+    """Test what identifies a chart"""
+
+    def test_key_covers_range_and_overlays(self):
+        bars = make_bars()
+        overlays = signal_overlays({"entry_price": 2000.0, "sl_price": 1995.0, "tp_price": 2010.0})
+        key = chart_key("XAUUSD", "M1", bars, overlays, 100)
+        self.assertEqual(key, chart_key("XAUUSD", "M1", make_bars(), dict(overlays), 100))
+        self.assertNotEqual(key, chart_key("XAUUSD", "M5", bars, overlays, 100))
+        self.assertNotEqual(key, chart_key("XAUUSD", "M1", bars[1:], overlays, 100))
+        self.assertNotEqual(key, chart_key("XAUUSD", "M1", make_bars(last_close=2000.5), overlays, 100))
+        self.assertNotEqual(key, chart_key("XAUUSD", "M1", bars, signal_overlays({"entry_price": 2001.0}), 100))
+        self.assertEqual(set(overlays["levels"]), {"entry", "sl", "tp"})
+
+class TestChartService(unittest.TestCase):
+    """Test caching, de-duplication and eviction with a stand-in renderer in the process pool"""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.now = 1_000_000.0
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _run(self, scenario, **kwargs):
+        async def wrapper():
+            service = ChartService(cache_dir=self.dir.name, workers=2, dpi=100, clock=lambda: self.now,
+                                   **dict({"renderer": fake_render}, **kwargs)).start()
+            try:
+                return service, await scenario(service)
+            finally:
+                await service.stop()
+        return asyncio.run(wrapper())
+
+    def test_concurrent_requests_share_one_render(self):
+        async def scenario(service):
+            paths = await asyncio.gather(*[service.get("XAUUSD", "M1", make_bars()) for _ in range(5)])
+            again = await service.get("XAUUSD", "M1", make_bars())
+            return paths, again
+
+        service, (paths, again) = self._run(scenario)
+        self.assertEqual(len(set(paths)), 1)
+        self.assertEqual(again, paths[0])
+        self.assertTrue(Path(paths[0]).read_bytes().startswith(b"PNG2000.0"))
+        stats = service.get_stats()
+        self.assertEqual((stats["renders"], stats["deduplicated"], stats["hits"]), (1, 4, 1))
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual([p for p in os.listdir(self.dir.name) if p.endswith(".tmp")], [])
+
+    def test_event_loop_stays_responsive(self):
+        async def scenario(service):
+            render = asyncio.create_task(service.get("XAUUSD", "M1", make_bars()))
+            ticks = 0
+            while not render.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            return ticks
+
+        _, ticks = self._run(scenario)
+        self.assertGreater(ticks, 10)  # the 0.3s render ran in another process
+
+    def test_ttl_and_size_eviction(self):
+        async def scenario(service):
+            first = await service.get("XAUUSD", "M1", make_bars(last_close=1.0))
+            self.now += 10
+            second = await service.get("XAUUSD", "M1", make_bars(last_close=2.0))
+            self.now += 10
+            await service.get("XAUUSD", "M1", make_bars(last_close=1.0))  # hit: first is now the newest used
+            third = await service.get("XAUUSD", "M1", make_bars(last_close=3.0))
+            evicted_by_size = (os.path.exists(first), os.path.exists(second), os.path.exists(third))
+
+            self.now += 3600 + 1
+            fourth = await service.get("XAUUSD", "M1", make_bars(last_close=4.0))
+            return evicted_by_size, (os.path.exists(first), os.path.exists(third), os.path.exists(fourth))
+
+        # Room for two ~1KB charts; one hour TTL
+        service, (by_size, by_ttl) = self._run(scenario, max_mb=2500 / (1024 * 1024), ttl_hours=1, evict_grace=0)
+        self.assertEqual(by_size, (True, False, True))
+        self.assertEqual(by_ttl, (False, False, True))
+        self.assertEqual(service.get_stats()["cached"], 1)
+
+    def test_recent_charts_survive_eviction(self):
+        """Test charts still within the grace period are kept even beyond max_mb"""
+        async def scenario(service):
+            first = await service.get("XAUUSD", "M1", make_bars(last_close=1.0))
+            self.now += 10
+            second = await service.get("XAUUSD", "M1", make_bars(last_close=2.0))
+            self.now += 10
+            third = await service.get("XAUUSD", "M1", make_bars(last_close=3.0))
+            kept = (os.path.exists(first), os.path.exists(second), os.path.exists(third))
+            self.now += 100
+            await service.get("XAUUSD", "M1", make_bars(last_close=4.0))
+            return kept, (os.path.exists(first), os.path.exists(second))
+
+        _, (kept, later) = self._run(scenario, max_mb=2500 / (1024 * 1024), evict_grace=60)
+        self.assertEqual(kept, (True, True, True))
+        self.assertEqual(later, (False, False))
+
+    def test_deleted_file_is_rendered_again(self):
+        async def scenario(service):
+            path = await service.get("XAUUSD", "M1", make_bars())
+            os.remove(path)
+            again = await service.get("XAUUSD", "M1", make_bars())
+            return again, os.path.exists(again)
+
+        service, (path, exists) = self._run(scenario)
+        self.assertTrue(exists)
+        self.assertEqual((service.get_stats()["renders"], service.get_stats()["hits"]), (2, 0))
+
+    def test_restart_reuses_cached_files(self):
+        async def scenario(service):
+            return await service.get("XAUUSD", "M1", make_bars())
+
+        _, path = self._run(scenario)
+        service, again = self._run(scenario)
+        self.assertEqual(again, path)
+        self.assertEqual(service.get_stats()["renders"], 0)
+
+    def test_failed_render_is_not_cached(self):
+        async def scenario(service):
+            return await asyncio.gather(service.get("XAUUSD", "M1", make_bars()),
+                                        service.get("XAUUSD", "M1", make_bars()))
+
+        service, paths = self._run(scenario, renderer=failing_render)
+        self.assertEqual(paths, [None, None])
+        self.assertEqual(service.get_stats()["failed"], 1)
+        self.assertEqual(service.get_stats()["cached"], 0)
+
+    @unittest.skipUnless(importlib.util.find_spec("mplfinance"), "mplfinance not installed")
+    def test_render_chart(self):
+        path = os.path.join(self.dir.name, "chart.png")
+        render_chart({"bars": [dict(bar, timestamp=bar.pop("timestamp_utc")) for bar in make_bars()],
+                      "overlays": signal_overlays({"entry_price": 2000.0, "sl_price": 1999.0}),
+                      "title": "XAUUSD M1", "dpi": 100}, path)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(8), b"\x89PNG\r\n\x1a\n")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit Tests for Data Mapper Module
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import datetime
+from utils.data_mapper import (
+    normalize_market_data, normalize_batch, load_csv_batch, batch_to_records,
+    format_signal_message, format_trade_result, format_trade_history
+)
+
+class TestNormalizeMarketData(unittest.TestCase):
+    """Test single-bar normalization driven by provider schemas"""
+
+    def test_polygon(self):
+        """Test epoch ms timestamps and raw bid/ask passthrough"""
+        bar = normalize_market_data({"t": 1700055000000, "o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 10}, "polygon")
+        self.assertEqual(bar["timestamp_utc"], "2023-11-15T13:30:00+00:00")
+        self.assertEqual((bar["open"], bar["close"], bar["volume"]), (1.0, 1.5, 10))
+        self.assertIsNone(bar["bid"])
+
+    def test_goldapi_uses_price(self):
+        """Test GoldAPI maps price onto OHLC and bid/ask"""
+        bar = normalize_market_data({"price": "2035.5", "timestamp": "2025-11-15T12:30:00"}, "goldapi")
+        self.assertEqual(bar["high"], 2035.5)
+        self.assertEqual(bar["bid"], 2035.5)
+        self.assertEqual(bar["volume"], 0)
+
+    def test_unknown_source(self):
+        with self.assertRaises(ValueError):
+            normalize_market_data({}, "nope")
+
+class TestNormalizeBatch(unittest.TestCase):
+    """Test columnar batch normalization"""
+
+    def test_polygon_response(self):
+        """Test a full Polygon response becomes epoch-ms columns"""
+        response = {"results": [
+            {"t": 1700055000000, "o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 10},
+            {"t": 1700055060000, "o": 1.5, "h": 2.5, "l": 1, "c": 2, "v": 20},
+        ]}
+        batch = normalize_batch(response, "polygon")
+        self.assertEqual(batch["timestamp_ms"].tolist(), [1700055000000, 1700055060000])
+        self.assertEqual(batch["close"].tolist(), [1.5, 2.0])
+        self.assertEqual(batch["volume"].dtype.kind, "i")
+        self.assertTrue(all(v != v for v in batch["bid"].tolist()))
+
+    def test_finnhub_columnar(self):
+        """Test Finnhub candle arrays and second timestamps"""
+        response = {"s": "ok", "t": [1700055000, 1700055060], "o": [1, 2], "h": [2, 3],
+                    "l": [0, 1], "c": [1.5, 2.5], "v": [5, 6]}
+        batch = normalize_batch(response, "finnhub")
+        self.assertEqual(batch["timestamp_ms"].tolist(), [1700055000000, 1700055060000])
+        self.assertEqual(batch["open"].tolist(), [1.0, 2.0])
+
+    def test_twelvedata_sorted_ascending(self):
+        """Test newest-first ISO rows are parsed and reordered"""
+        response = {"values": [
+            {"datetime": "2023-11-15 13:31:00", "open": "2", "high": "3", "low": "1", "close": "2.5", "volume": "0"},
+            {"datetime": "2023-11-15 13:30:00", "open": "1", "high": "2", "low": "0", "close": "1.5", "volume": "0"},
+        ]}
+        batch = normalize_batch(response, "twelvedata")
+        self.assertEqual(batch["timestamp_ms"].tolist(), [1700055000000, 1700055060000])
+        self.assertEqual(batch["close"].tolist(), [1.5, 2.5])
+
+    def test_matches_single_bar_normalizer(self):
+        """Test batch output round-trips to the per-bar standard format"""
+        raw = {"t": 1700055000000, "o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 10}
+        self.assertEqual(batch_to_records(normalize_batch([raw], "polygon")), [normalize_market_data(raw, "polygon")])
+
+    def test_empty_response(self):
+        batch = normalize_batch({"status": "OK"}, "polygon")
+        self.assertEqual(len(batch["timestamp_ms"]), 0)
+
+    def test_load_csv_batch(self):
+        """Test CSV import into columns"""
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as f:
+            f.write("timestamp,open,high,low,close,volume\n")
+            f.write("2023-11-15T13:30:00,1,2,0.5,1.5,10\n")
+            f.write("2023-11-15T13:31:00,1.5,2.5,1,2,20\n")
+        try:
+            batch = load_csv_batch(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(batch["timestamp_ms"].tolist(), [1700055000000, 1700055060000])
+        self.assertEqual(batch["volume"].tolist(), [10, 20])
+
+class TestMessageFormatting(unittest.TestCase):
+    """Test Telegram texts name the instrument and use its price precision"""
+
+    def test_fx_signal_and_result(self):
+        signal = {"symbol": "EURUSD", "direction": "BUY", "entry_price": 1.08573,
+                  "sl_price": 1.08423, "tp_price": 1.08873, "confidence_score": 80}
+        text = format_signal_message(signal)
+        self.assertIn("BUY EURUSD", text)
+        self.assertIn("Entry: 1.08573", text)
+        self.assertIn("Stop Loss: 1.08423", text)
+
+        result = format_trade_result(dict(signal, status="CLOSED_WIN", exit_price=1.08873,
+                                          pips_gained=30.0, virtual_pl_usd=3.0))
+        self.assertIn("Trade Closed: EURUSD", result)
+        self.assertIn("Exit: 1.08873", result)
+
+    def test_history_precision(self):
+        rows = [{"created_at": datetime(2025, 11, 15, 12, 0), "symbol": symbol, "direction": "SELL",
+                 "status": "OPEN", "entry_price": price, "pips_gained": None, "virtual_pl_usd": None}
+                for symbol, price in (("USDJPY", 151.234), ("XAUUSD", 2035.5))]
+        text = format_trade_history(rows)
+        self.assertIn("USDJPY SELL @ 151.234", text)
+        self.assertIn("XAUUSD SELL @ 2035.50", text)
+
+if __name__ == "__main__":
+    unittest.main()
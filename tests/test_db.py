@@ -0,0 +1,111 @@
+"""
+Unit Tests for Database Migration
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from unittest.mock import patch
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+from data.db import migrate_db, create_read_engine, engine as writer_engine
+from data.models import Base, Trade
+
+class TestMigrateDb(unittest.TestCase):
+    """Test indexes are added to databases created before they existed"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.engine = create_engine(f"sqlite:///{self.path}")
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def test_missing_indexes_created(self):
+        Base.metadata.create_all(self.engine)
+        for index in Trade.__table__.indexes:
+            index.drop(self.engine)
+        self.assertEqual(inspect(self.engine).get_indexes("trades"), [])
+
+        migrate_db(self.engine)
+        migrate_db(self.engine)  # idempotent
+
+        names = {index["name"] for index in inspect(self.engine).get_indexes("trades")}
+        self.assertEqual(names, {"ix_trades_status_created_at", "ix_trades_created_at",
+                                 "ix_trades_variant_created_at_id"})
+
+    def test_missing_columns_added(self):
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE trades (id VARCHAR(36) PRIMARY KEY)"))
+            conn.execute(text("INSERT INTO trades (id) VALUES ('t1')"))
+
+        migrate_db(self.engine)
+
+        self.assertIn("variant", {column["name"] for column in inspect(self.engine).get_columns("trades")})
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT variant FROM trades")).scalar(), "live")
+
+    def test_risk_query_uses_index(self):
+        Base.metadata.create_all(self.engine)
+        migrate_db(self.engine)
+        with self.engine.connect() as conn:
+            plan = conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT count(*) FROM trades WHERE status = 'OPEN'"
+            )).fetchall()
+        self.assertIn("ix_trades_status_created_at", plan[0][-1])
+
+class TestReadEngine(unittest.TestCase):
+    """Test HTTP/Telegram readers get their own read-only pool"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.url = f"sqlite:///{self.path}"
+        self.writer = create_engine(self.url)
+        Base.metadata.create_all(self.writer)
+
+    def tearDown(self):
+        self.writer.dispose()
+        os.remove(self.path)
+
+    def test_file_sqlite_read_pool(self):
+        with patch("data.db.DATABASE_URL", self.url), patch("data.db.DB_READ_POOL_SIZE", 2):
+            reader = create_read_engine()
+        try:
+            self.assertIsNot(reader, writer_engine)
+            self.assertEqual(reader.pool.size(), 2)
+            with reader.connect() as conn:
+                self.assertEqual(conn.execute(text("SELECT count(*) FROM trades")).scalar(), 0)
+                with self.assertRaises(OperationalError):
+                    conn.execute(text("DELETE FROM trades"))
+        finally:
+            reader.dispose()
+
+    def test_reader_does_not_block_open_write(self):
+        """Test a reader sees committed data while the writer holds a transaction"""
+        with patch("data.db.DATABASE_URL", self.url):
+            reader = create_read_engine()
+        try:
+            with self.writer.connect() as conn:
+                conn.execute(text("PRAGMA journal_mode=WAL"))
+            with self.writer.begin() as conn:
+                conn.execute(text("INSERT INTO bot_state (key, value, updated_at) VALUES ('a', '1', '2025-11-15 12:00:00')"))
+                with reader.connect() as read_conn:
+                    count = read_conn.execute(text("SELECT count(*) FROM bot_state")).scalar()
+            self.assertEqual(count, 0)
+        finally:
+            reader.dispose()
+
+    def test_memory_sqlite_shares_writer(self):
+        with patch("data.db.DATABASE_URL", "sqlite://"):
+            self.assertIs(create_read_engine(), writer_engine)
+
+if __name__ == "__main__":
+    unittest.main()
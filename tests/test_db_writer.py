@@ -0,0 +1,156 @@
+"""
+Unit Tests for Background DB Writer
+"""
+
+import os
+import tempfile
+import unittest
+import uuid
+import sys
+from pathlib import Path
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from data.models import Base, Trade, TradeStatus, TradeDirection
+from data.db_writer import DBWriter
+from config.strategy import StrategyEngine, RiskState
+from data.trade_stats import TradeStatistics
+from utils.position_book import OpenPositionBook
+
+def make_trade(signal_id: str, entry: float = 2035.0) -> Trade:
+    return Trade(signal_id=signal_id, direction=TradeDirection.BUY, entry_price=entry,
+                 sl_price=entry - 0.25, tp_price=entry + 0.45,
+                 signal_timestamp_utc=datetime.utcnow(), confidence_score=80)
+
+class TestDBWriter(unittest.TestCase):
+    """Test per-tick transactions and the strategy's pending-close guard"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.engine = create_engine(f"sqlite:///{self.path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.writer = DBWriter(self.engine).start()
+
+    def tearDown(self):
+        self.writer.stop()
+        self.db.close()
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def test_one_commit_per_tick(self):
+        for i in range(3):
+            self.writer.submit(lambda s, i=i: s.add(make_trade(f"sig-{i}")))
+        self.assertTrue(self.writer.wait_idle())
+
+        self.assertEqual(self.db.query(Trade).count(), 3)
+        self.assertEqual(self.writer.stats["commits"], 1)
+        self.assertEqual(self.writer.stats["applied"], 3)
+        self.assertGreater(self.writer.stats["last_commit_ms"], 0)
+
+    def test_failed_tick_rolls_back(self):
+        """Test a failing mutation discards its whole tick, later ticks still commit"""
+        def add_and_flush(session, signal_id):
+            session.add(make_trade(signal_id))
+            session.flush()
+
+        self.writer.submit(lambda s: add_and_flush(s, "dup"))
+        self.writer.submit(lambda s: s.add(make_trade("ok-1")))
+        self.writer.submit(lambda s: add_and_flush(s, "dup"))  # unique signal_id violation
+        self.writer.wait_idle()
+        self.writer.submit(lambda s: s.add(make_trade("ok-2")))
+        self.writer.wait_idle()
+
+        self.assertEqual([t.signal_id for t in self.db.query(Trade).all()], ["ok-2"])
+        self.assertEqual(self.writer.stats["failed_ticks"], 1)
+
+    def test_close_is_queued_once(self):
+        """Test a trade is not closed again while its update is still queued"""
+        self.writer.submit(lambda s: s.add(make_trade("sig-1")))
+        self.writer.wait_idle()
+
+        strategy = StrategyEngine(self.db, writer=self.writer)
+        market = {"current_price": 2035.5, "timestamp": datetime(2025, 11, 15, 12, 0)}
+        strategy.update_trades(market)
+        strategy.update_trades(market)  # writer has not been told to commit yet
+        self.assertEqual(self.writer.stats["submitted"], 2)  # insert + one close
+
+        self.writer.wait_idle()
+        self.db.rollback()
+        trade = self.db.query(Trade).one()
+        self.assertEqual(trade.status, TradeStatus.CLOSED_WIN)
+        self.assertEqual(trade.exit_price, 2035.45)
+
+        strategy.update_trades(market)
+        self.assertEqual(strategy.pending_close, set())
+
+    def test_failed_close_is_retried(self):
+        """Test a close whose tick rolled back is written again, once"""
+        self.writer.submit(lambda s: s.add(make_trade("sig-1")))
+        self.writer.wait_idle()
+
+        def poison(session):
+            raise RuntimeError("disk I/O error")
+
+        risk_state = RiskState()
+        risk_state.open_positions = 1
+        strategy = StrategyEngine(self.db, writer=self.writer, risk_state=risk_state)
+        market = {"current_price": 2035.5, "timestamp": datetime(2025, 11, 15, 12, 0)}
+        strategy.update_trades(market)
+        self.writer.submit(poison)  # fails the close's tick
+        self.writer.wait_idle()
+        self.db.rollback()
+        self.assertEqual(self.db.query(Trade).one().status, TradeStatus.OPEN)
+        self.assertEqual(len(strategy.failed_closes), 1)
+
+        strategy.update_trades(market)  # re-submits the close, does not close again
+        self.writer.wait_idle()
+        self.db.rollback()
+        self.assertEqual(self.db.query(Trade).one().status, TradeStatus.CLOSED_WIN)
+        self.assertEqual(risk_state.open_positions, 0)
+        self.assertAlmostEqual(strategy.virtual_balance - 1000000, self.db.query(Trade).one().virtual_pl_usd)
+        self.assertEqual(len(strategy.failed_closes), 0)
+
+    def _open_in_failed_tick(self):
+        risk_state, book, stats = RiskState(), OpenPositionBook(), TradeStatistics()
+        strategy = StrategyEngine(self.db, writer=self.writer, risk_state=risk_state, position_book=book,
+                                  stats=stats)
+        trade = make_trade("sig-1")
+        trade.id = str(uuid.uuid4())
+        strategy.open_trade(trade)
+
+        def poison(session):
+            raise RuntimeError("disk I/O error")
+
+        self.writer.submit(poison)  # fails the insert's tick
+        self.writer.wait_idle()
+        self.db.rollback()
+        self.assertEqual(self.db.query(Trade).count(), 0)
+        self.assertEqual(len(strategy.failed_opens), 1)
+        return strategy, risk_state, book, stats
+
+    def test_failed_insert_is_retried(self):
+        """Test an insert whose tick rolled back is written by the next exit check"""
+        strategy, risk_state, book, stats = self._open_in_failed_tick()
+        strategy.update_trades({"current_price": 2035.0, "timestamp": datetime(2025, 11, 15, 12, 0)})
+        self.writer.wait_idle()
+        self.db.rollback()
+        self.assertEqual(self.db.query(Trade).one().status, TradeStatus.OPEN)
+        self.assertEqual((risk_state.open_positions, len(book.positions), stats.open), (1, 1, 1))
+
+    def test_unwritable_insert_is_undone(self):
+        """Test a trade whose insert never commits leaves the book, risk counters and stats"""
+        with patch("config.strategy.DB_WRITER_TRADE_RETRIES", 0):
+            strategy, risk_state, book, stats = self._open_in_failed_tick()
+            strategy.update_trades({"current_price": 2035.0, "timestamp": datetime(2025, 11, 15, 12, 0)})
+        self.assertEqual((risk_state.trades_today, risk_state.open_positions), (0, 0))
+        self.assertEqual((len(book.positions), stats.opened, stats.open), (0, 0, 0))
+        self.assertEqual(len(strategy.failed_opens), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Unit Tests for the Async HTTP Server
+"""
+
+import asyncio
+import json
+import time
+import unittest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.http_server import AsyncHTTPServer, JSONSnapshot, Response
+
+async def request(reader, writer, path: str, method: str = "GET", headers: dict = None):
+    """Send one request on an open connection and read the reply"""
+    lines = [f"{method} {path} HTTP/1.1", "Host: test"] + [f"{k}: {v}" for k, v in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode()
+    status = int(head.split()[1])
+    reply_headers = {}
+    for line in head.split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            reply_headers[name.lower()] = value.strip()
+    length = int(reply_headers.get("content-length", 0))
+    body = await reader.readexactly(length) if method != "HEAD" and length else b""
+    return status, reply_headers, body
+
+class TestAsyncHTTPServer(unittest.TestCase):
+    """Test routing, ETag revalidation and keep-alive"""
+
+    def setUp(self):
+        self.snapshot = JSONSnapshot({"trades": 1})
+        self.routes = {
+            "/status": self.snapshot.response,
+            "/health": lambda: Response.json({"status": "RUNNING"}),
+            "/boom": lambda: 1 / 0,
+        }
+
+    def _run(self, scenario):
+        async def runner():
+            server = await AsyncHTTPServer(self.routes, host="127.0.0.1", port=0).start()
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+                try:
+                    return await scenario(server, reader, writer)
+                finally:
+                    writer.close()
+            finally:
+                await server.stop()
+        return asyncio.run(runner())
+
+    def test_etag_revalidation(self):
+        async def scenario(server, reader, writer):
+            status, headers, body = await request(reader, writer, "/status")
+            self.assertEqual((status, json.loads(body)), (200, {"trades": 1}))
+            etag = headers["etag"]
+
+            status, _, body = await request(reader, writer, "/status", headers={"If-None-Match": etag})
+            self.assertEqual((status, body), (304, b""))
+
+            self.assertFalse(self.snapshot.update({"trades": 1}))  # unchanged data keeps its tag
+            self.assertTrue(self.snapshot.update({"trades": 2}))
+            status, headers, body = await request(reader, writer, "/status", headers={"If-None-Match": etag})
+            self.assertEqual((status, json.loads(body)), (200, {"trades": 2}))
+            self.assertNotEqual(headers["etag"], etag)
+            return server.get_stats()
+
+        stats = self._run(scenario)
+        self.assertEqual((stats["requests"], stats["not_modified"], stats["connections"]), (3, 1, 1))
+
+    def test_errors_and_methods(self):
+        async def scenario(server, reader, writer):
+            self.assertEqual((await request(reader, writer, "/missing"))[0], 404)
+            self.assertEqual((await request(reader, writer, "/health", method="POST"))[0], 405)
+            self.assertEqual((await request(reader, writer, "/boom"))[0], 500)
+            status, headers, body = await request(reader, writer, "/health?probe=1", method="HEAD")
+            self.assertEqual((status, body), (200, b""))
+            self.assertGreater(int(headers["content-length"]), 0)
+            status, headers, _ = await request(reader, writer, "/health", headers={"Connection": "close"})
+            self.assertEqual(headers["connection"], "close")
+            self.assertEqual(await reader.read(), b"")  # server closed the connection
+
+        self._run(scenario)
+
+    def test_bad_bodies(self):
+        """Test chunked bodies are refused and a client leaving mid-body is not an error"""
+        async def scenario(server, reader, writer):
+            errors = []
+            asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+            status, headers, _ = await request(reader, writer, "/health", method="POST",
+                                               headers={"Transfer-Encoding": "chunked"})
+            self.assertEqual((status, headers["connection"]), (400, "close"))
+            self.assertEqual(await reader.read(), b"")
+
+            _, partial = await asyncio.open_connection("127.0.0.1", server.port)
+            partial.write(b"POST /health HTTP/1.1\r\nContent-Length: 100\r\n\r\nabc")
+            await partial.drain()
+            partial.close()
+            for _ in range(100):
+                if server.get_stats()["open_connections"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            return errors, server.get_stats()
+
+        errors, stats = self._run(scenario)
+        self.assertEqual(errors, [])
+        self.assertEqual(stats["open_connections"], 0)
+
+    def test_throughput(self):
+        async def scenario(server, reader, writer):
+            started = time.perf_counter()
+            for _ in range(2000):
+                status, _, _ = await request(reader, writer, "/status")
+                self.assertEqual(status, 200)
+            return 2000 / (time.perf_counter() - started)
+
+        # Client and server share one core here; comfortably above 1000 req/s
+        self.assertGreater(self._run(scenario), 1000)
+
+class TestHealthEndpoint(unittest.TestCase):
+    """Test health and status never touch the database"""
+
+    def test_in_memory_only(self):
+        import main
+        with patch.object(main, "SessionLocal", side_effect=AssertionError("DB used")), \
+                patch.object(main, "ReadSessionLocal", side_effect=AssertionError("DB used")):
+            self.assertIn(main.health_check().status, (200, 503))
+            main.refresh_status()
+            response = main.get_status()
+        self.assertEqual(response.status, 200)
+        self.assertIn("trades", json.loads(response.body))
+        self.assertEqual(response.etag, main.status_snapshot.etag)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,7 +9,7 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from utils.indicators import IndicatorCalculator
+from utils.indicators import IndicatorCalculator, SharedIndicatorCache
 
 class TestIndicators(unittest.TestCase):
     """Test indicator calculations"""
@@ -102,5 +102,21 @@ class TestIndicators(unittest.TestCase):
         pips = self.calc.calculate_pips_to_level(2035.50, 2035.00)
         self.assertEqual(pips, -50.0)
 
+class TestSharedIndicatorCache(unittest.TestCase):
+    """Test engines sharing a snapshot compute each indicator once"""
+    
+    def test_hits_on_same_snapshot(self):
+        cache = SharedIndicatorCache(max_entries=2)
+        closes = [2035.0 + i * 0.1 for i in range(30)]
+        
+        first = cache.calculate_rsi(closes, 14)
+        self.assertIs(cache.calculate_rsi(closes, 14), first)
+        self.assertEqual(first, IndicatorCalculator().calculate_rsi(closes, 14))
+        cache.calculate_rsi(closes, 9)          # other parameters: own entry
+        cache.calculate_rsi(list(closes), 14)   # other snapshot: own entry, evicts the oldest
+        self.assertTrue(cache.is_rsi_oversold(20))  # uncached helpers pass through
+        
+        self.assertEqual(cache.get_stats(), {"hits": 1, "misses": 3, "entries": 2})
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,112 @@
+"""
+Unit Tests for Staged Pipeline Module
+"""
+
+import asyncio
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.pipeline import Pipeline, Stage, BLOCK, DROP_NEWEST, DROP_OLDEST, COALESCE, _Envelope
+
+def envelope(value):
+    return _Envelope(value, 0.0)
+
+class TestStagePolicies(unittest.TestCase):
+    """Test what a full queue does under each policy"""
+
+    def _fill(self, policy, merge=None):
+        async def run():
+            stage = Stage("s", lambda item: item, maxsize=2, policy=policy, merge=merge)
+            results = [await stage.put(envelope(value)) for value in (1, 2, 3)]
+            return stage, results, [e.payload for e in stage._items]
+        return asyncio.run(run())
+
+    def test_drop_newest(self):
+        stage, results, items = self._fill(DROP_NEWEST)
+        self.assertEqual((results, items), ([True, True, False], [1, 2]))
+        self.assertEqual(stage.metrics["dropped"], 1)
+
+    def test_drop_oldest(self):
+        stage, results, items = self._fill(DROP_OLDEST)
+        self.assertEqual((results, items), ([True, True, True], [2, 3]))
+        self.assertEqual(stage.metrics["dropped"], 1)
+
+    def test_coalesce(self):
+        stage, results, items = self._fill(COALESCE, merge=lambda pending, incoming: pending + incoming)
+        self.assertEqual((results, items), ([True, True, False], [1, 5]))
+        self.assertEqual(stage.metrics["coalesced"], 1)
+        self.assertEqual(stage.metrics["max_queue_depth"], 2)
+
+    def test_block_waits_for_room(self):
+        async def run():
+            stage = Stage("s", lambda item: item, maxsize=1, policy=BLOCK)
+            await stage.put(envelope(1))
+            blocked = asyncio.create_task(stage.put(envelope(2)))
+            await asyncio.sleep(0.01)
+            self.assertFalse(blocked.done())
+            self.assertEqual((await stage.get()).payload, 1)
+            await blocked
+            return [e.payload for e in stage._items]
+        self.assertEqual(asyncio.run(run()), [2])
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            Stage("s", lambda item: item, policy="spill")
+
+class TestPipeline(unittest.TestCase):
+    """Test items flow through concurrent stages with per-stage metrics"""
+
+    def test_flow_filter_and_errors(self):
+        seen = []
+
+        async def fetch(item):
+            await asyncio.sleep(0)
+            return item * 10
+
+        def check(item):
+            if item == 30:
+                raise RuntimeError("bad item")
+            return item if item != 20 else None  # filtered
+
+        async def run():
+            pipeline = Pipeline([Stage("fetch", fetch), Stage("check", check), Stage("sink", seen.append)]).start()
+            for item in (1, 2, 3, 4):
+                await pipeline.submit(item)
+            self.assertTrue(await pipeline.join(timeout=2))
+            await pipeline.stop()
+            return pipeline.get_metrics()
+
+        metrics = asyncio.run(run())
+        self.assertEqual(seen, [10, 40])
+        self.assertEqual(metrics["fetch"]["processed"], 4)
+        self.assertEqual(metrics["check"]["errors"], 1)
+        self.assertEqual(metrics["sink"]["processed"], 2)
+        self.assertGreaterEqual(metrics["sink"]["max_age_ms"], metrics["sink"]["max_ms"])
+
+    def test_slow_stage_does_not_block_producer(self):
+        """Test a coalescing front stage absorbs a burst while the next stage is busy"""
+        processed = []
+
+        async def slow(item):
+            await asyncio.sleep(0.05)
+            processed.append(item)
+
+        async def run():
+            pipeline = Pipeline([Stage("slow", slow, maxsize=1, policy=COALESCE)]).start()
+            await pipeline.submit(0)
+            await asyncio.sleep(0.01)  # 0 is in progress
+            for item in range(1, 6):
+                await asyncio.wait_for(pipeline.submit(item), timeout=0.01)
+            self.assertTrue(await pipeline.join(timeout=2))
+            await pipeline.stop()
+            return pipeline.get_metrics()["slow"]
+
+        metrics = asyncio.run(run())
+        self.assertEqual(processed, [0, 5])
+        self.assertEqual(metrics["coalesced"], 4)
+
+if __name__ == "__main__":
+    unittest.main()
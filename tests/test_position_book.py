@@ -0,0 +1,106 @@
+"""
+Unit Tests for Open-Position Book Module
+"""
+
+import unittest
+import sys
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.position_book import OpenPositionBook, Position
+from config.strategy import StrategyEngine
+from data.db import SessionLocal, init_db
+from data.trade_stats import TradeStatistics
+from data.models import Trade, TradeStatus, TradeDirection, BotState
+
+def make_position(pid: str, direction: TradeDirection, entry: float, sl: float, tp: float) -> Position:
+    return Position(pid, f"sig-{pid}", direction, entry, sl, tp)
+
+class TestOpenPositionBook(unittest.TestCase):
+    """Test level lookups on each side of the book"""
+
+    def setUp(self):
+        self.book = OpenPositionBook(fixed_point=False)
+        self.book.add(make_position("b1", TradeDirection.BUY, 2035.0, 2034.0, 2036.0))
+        self.book.add(make_position("b2", TradeDirection.BUY, 2035.5, 2034.5, 2037.0))
+        self.book.add(make_position("s1", TradeDirection.SELL, 2035.0, 2036.0, 2034.0))
+
+    def _hits(self, price):
+        return sorted((p.id, status.value, exit_price) for p, status, exit_price in self.book.triggered(price))
+
+    def test_nothing_between_levels(self):
+        self.assertEqual(self._hits(2035.2), [])
+
+    def test_levels_are_inclusive(self):
+        """Test touching a level triggers it (<= / >= like the DB path)"""
+        self.assertEqual(self._hits(2036.0), [("b1", "CLOSED_WIN", 2036.0), ("s1", "CLOSED_LOSE", 2036.0)])
+        self.assertEqual(self._hits(2034.0), [("b1", "CLOSED_LOSE", 2034.0), ("b2", "CLOSED_LOSE", 2034.5),
+                                              ("s1", "CLOSED_WIN", 2034.0)])
+
+    def test_remove(self):
+        self.book.remove("b1")
+        self.assertEqual(self._hits(2036.0), [("s1", "CLOSED_LOSE", 2036.0)])
+        self.assertEqual(len(self.book), 2)
+        self.assertIsNone(self.book.remove("b1"))
+
+    def test_fixed_point_keys(self):
+        """Test float noise does not hide a touched level in tick mode"""
+        book = OpenPositionBook(fixed_point=True)
+        book.add(make_position("b1", TradeDirection.BUY, 2035.10, 2034.85, 2035.40))
+        self.assertEqual(len(book.triggered(2035.10 + 0.1 + 0.1 + 0.1)), 1)
+
+class TestStrategyWithBook(unittest.TestCase):
+    """Test update_trades closes from the book without querying open trades"""
+
+    def setUp(self):
+        self.db = SessionLocal()
+        init_db()
+
+    def tearDown(self):
+        self.db.query(Trade).delete()
+        self.db.query(BotState).delete()
+        self.db.commit()
+        self.db.close()
+
+    def test_close_from_book(self):
+        trade = Trade(id="book-trade-1", signal_id="book-signal-1", direction=TradeDirection.SELL,
+                      entry_price=2035.0, sl_price=2035.5, tp_price=2034.0,
+                      signal_timestamp_utc=datetime.utcnow(), confidence_score=80)
+        self.db.add(trade)
+        self.db.commit()
+
+        book = OpenPositionBook(fixed_point=False).load(self.db)
+        stats = TradeStatistics()
+        engine = StrategyEngine(self.db, position_book=book, stats=stats)
+        engine.update_trades({"current_price": 2034.9, "timestamp": datetime(2025, 11, 15, 12, 0)})
+        self.assertEqual(len(book), 1)
+
+        engine.update_trades({"current_price": 2033.9, "timestamp": datetime(2025, 11, 15, 12, 1)})
+        self.assertEqual(len(book), 0)
+        self.db.refresh(trade)
+        self.assertEqual(trade.status, TradeStatus.CLOSED_WIN)
+        self.assertEqual(trade.exit_price, 2034.0)
+        self.assertEqual(trade.pips_gained, 100.0)
+        self.assertEqual(stats.summary()["wins"], 1)
+        self.assertEqual(stats.by_direction["SELL"]["pips"], 100.0)
+        self.assertAlmostEqual(trade.virtual_pl_usd, 1.0)  # 100 pips x $1/pip/lot x 0.01 lot
+
+    def test_close_fx_trade(self):
+        """Test P/L uses the symbol's pip value (EURUSD: $10/pip per lot)"""
+        trade = Trade(id="book-trade-fx", signal_id="book-signal-fx", ticker="EURUSD",
+                      direction=TradeDirection.BUY, entry_price=1.0850, sl_price=1.0840, tp_price=1.0870,
+                      signal_timestamp_utc=datetime.utcnow(), confidence_score=80)
+        self.db.add(trade)
+        self.db.commit()
+
+        book = OpenPositionBook(fixed_point=False, symbol="EURUSD").load(self.db)
+        engine = StrategyEngine(self.db, position_book=book, symbol="EURUSD")
+        engine.update_trades({"current_price": 1.0875, "timestamp": datetime(2025, 11, 15, 12, 0)})
+        self.db.refresh(trade)
+        self.assertEqual(trade.pips_gained, 20.0)
+        self.assertAlmostEqual(trade.virtual_pl_usd, 2.0)  # 20 pips x $10 x 0.01 lot
+
+if __name__ == "__main__":
+    unittest.main()
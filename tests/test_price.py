@@ -0,0 +1,82 @@
+"""
+Unit Tests for Fixed-Point Price Module
+"""
+
+import unittest
+import sys
+from pathlib import Path
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.price import (
+    to_ticks, from_ticks, snap_price, ticks_to_pips, pip_size, pip_value, price_decimals
+)
+from config.strategy import StrategyEngine
+from data.models import TradeStatus, TradeDirection
+
+class TestTicks(unittest.TestCase):
+    """Test price <-> tick conversion"""
+
+    def test_round_trip(self):
+        self.assertEqual(to_ticks(2035.15), 203515)
+        self.assertEqual(from_ticks(203515), 2035.15)
+        self.assertEqual(to_ticks(-0.015), -2)
+
+    def test_float_noise_is_snapped(self):
+        """Test accumulated float error does not move the level"""
+        price = 2035.10 + 0.1 + 0.1 + 0.1  # 2035.3999999999...
+        self.assertEqual(to_ticks(price), 203540)
+        self.assertEqual(snap_price(price), 2035.4)
+
+    def test_pips(self):
+        self.assertEqual(ticks_to_pips(250), 250.0)
+
+    def test_other_symbols(self):
+        """Test FX and JPY pairs use their own tick and pip sizes"""
+        self.assertEqual(to_ticks(1.08573, "EURUSD"), 108573)
+        self.assertEqual(ticks_to_pips(25, "EURUSD"), 2.5)
+        self.assertEqual(ticks_to_pips(25, "USDJPY"), 2.5)
+        self.assertEqual(pip_size("EURUSD"), 0.0001)
+        self.assertEqual(price_decimals("EURUSD"), 5)
+        self.assertAlmostEqual(pip_value("XAUUSD"), 1.0)
+        self.assertAlmostEqual(pip_value("EURUSD"), 10.0)
+        self.assertAlmostEqual(pip_value("USDJPY", 150.0), 1000 / 150)
+
+class TestFixedPointExits(unittest.TestCase):
+    """Test SL/TP hit checks in fixed-point mode"""
+
+    def setUp(self):
+        self.engine = StrategyEngine(MagicMock())
+
+    def _trade(self, direction, entry, sl, tp):
+        return SimpleNamespace(direction=direction, entry_price=entry, sl_price=sl, tp_price=tp,
+                               status=TradeStatus.OPEN, signal_id="t1")
+
+    def test_exact_touch_hits_tp(self):
+        """Test a price that touches TP through float noise still closes the trade"""
+        trade = self._trade(TradeDirection.BUY, 2035.10, 2034.85, 2035.40)
+        price = 2035.10 + 0.1 + 0.1 + 0.1  # float64 lands just below 2035.40
+        self.assertLess(price, 2035.40)
+
+        self.engine._update_trades_fixed([trade], to_ticks(price), datetime(2025, 11, 15, 12, 0))
+        self.assertEqual(trade.status, TradeStatus.CLOSED_WIN)
+        self.assertEqual(trade.exit_price, 2035.40)
+        self.assertEqual(trade.pips_gained, 30.0)
+
+    def test_sell_sl(self):
+        trade = self._trade(TradeDirection.SELL, 2035.10, 2035.35, 2034.60)
+        self.engine._update_trades_fixed([trade], to_ticks(2035.35), datetime(2025, 11, 15, 12, 0))
+        self.assertEqual(trade.status, TradeStatus.CLOSED_LOSE)
+        self.assertEqual(trade.pips_gained, -25.0)
+
+    def test_levels_on_tick_grid(self):
+        with patch("config.strategy.FIXED_POINT_PRICES", True):
+            sl, tp, _ = self.engine._calculate_levels("BUY", entry=2035.507, atr=0.333, spread=0.02)
+        self.assertEqual(sl, from_ticks(to_ticks(sl)))
+        self.assertEqual(tp, from_ticks(to_ticks(tp)))
+
+if __name__ == "__main__":
+    unittest.main()
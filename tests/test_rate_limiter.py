@@ -0,0 +1,99 @@
+"""
+Unit Tests for Rate Limiter Module
+"""
+
+import asyncio
+import math
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.rate_limiter import TokenBucket, RateLimiter, PRIORITY_LOW
+
+class FakeClock:
+    """Deterministic clock whose sleep advances time"""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+class TestTokenBucket(unittest.TestCase):
+    """Test burst, per-minute refill and daily budget"""
+
+    def setUp(self):
+        self.clock = FakeClock(1700006400.0)  # 00:00 UTC
+
+    def test_burst_then_refill(self):
+        """Test burst is available at once and refills at per-minute rate"""
+        bucket = TokenBucket(burst=3, per_minute=6, clock=self.clock)
+        self.assertEqual([bucket.try_acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.try_acquire(), 10.0)
+
+        self.clock.now += 10
+        self.assertEqual(bucket.try_acquire(), 0.0)
+
+    def test_low_priority_reserve(self):
+        """Test low priority callers are deferred below the reserve level"""
+        bucket = TokenBucket(burst=4, per_minute=60, low_priority_reserve=0.5, clock=self.clock)
+        bucket.try_acquire()
+        self.assertEqual(bucket.try_acquire(PRIORITY_LOW), 0.0)  # 3 tokens >= 1 + reserve of 2
+        self.assertGreater(bucket.try_acquire(PRIORITY_LOW), 0.0)  # 2 tokens left, reserved
+        self.assertEqual(bucket.try_acquire(), 0.0)  # normal priority may use it
+
+    def test_daily_budget_paced(self):
+        """Test daily budget is spread over the rest of the UTC day"""
+        bucket = TokenBucket(burst=2, per_minute=60, per_day=1440, clock=self.clock)
+        bucket.try_acquire()
+        bucket.get_status()
+        self.assertAlmostEqual(bucket.rate * 60, 1439 / 1440, places=3)
+
+        bucket.used_today = 1440
+        self.assertEqual(bucket.try_acquire(), math.inf)
+
+        self.clock.now += 86400  # next UTC day resets the budget
+        self.assertEqual(bucket.try_acquire(), 0.0)
+
+class TestRateLimiter(unittest.TestCase):
+    """Test async acquisition across providers"""
+
+    def setUp(self):
+        self.clock = FakeClock(1700006400.0)
+        self.limiter = RateLimiter(
+            {"polygon": {"burst": 1, "per_minute": 30, "per_day": 0}},
+            max_wait=5.0, clock=self.clock, sleep=self.clock.sleep,
+        )
+
+    def test_wait_or_skip(self):
+        """Test short waits are slept, long waits are skipped"""
+        self.assertTrue(asyncio.run(self.limiter.acquire("polygon")))
+        self.assertTrue(asyncio.run(self.limiter.acquire("polygon")))  # waits 2s
+        self.assertAlmostEqual(self.clock.now, 1700006402.0)
+
+        self.limiter.penalize("polygon")
+        self.assertFalse(asyncio.run(self.limiter.acquire("polygon", max_wait=0.5)))
+        self.assertEqual(self.limiter.get_status()["polygon"]["deferred"], 1)
+        self.assertEqual(self.limiter.get_status()["polygon"]["throttled"], 1)
+
+    def test_unknown_provider_unlimited(self):
+        """Test providers without a budget are not limited"""
+        self.assertTrue(asyncio.run(self.limiter.acquire("goldapi")))
+
+    def test_plan_shared_across_shards(self):
+        """Test each of several processes on the same API key gets its share of the plan"""
+        limiter = RateLimiter({"twelvedata": {"burst": 8, "per_minute": 8, "per_day": 800},
+                               "finnhub": {"burst": 1, "per_minute": 60, "per_day": 0}},
+                              clock=self.clock, shares=4)
+        status = limiter.get_status()
+        self.assertEqual((limiter.buckets["twelvedata"].burst, status["twelvedata"]["per_day"]), (2, 200))
+        self.assertAlmostEqual(limiter.buckets["twelvedata"].per_minute, 2.0)
+        self.assertEqual((limiter.buckets["finnhub"].burst, status["finnhub"]["per_day"]), (1, 0))
+
+if __name__ == "__main__":
+    unittest.main()
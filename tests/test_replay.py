@@ -0,0 +1,70 @@
+"""
+Unit Tests for Provider Record & Replay Module
+"""
+
+import asyncio
+import json
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.replay import ResponseRecorder, ReplayServer
+from services.rest_poller import RESTPoller
+
+class TestReplay(unittest.TestCase):
+    """Test recording provider responses and serving them back"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        recorder = ResponseRecorder(self.tmp.name)
+        for i, close in enumerate([2035.5, 2036.0]):
+            body = json.dumps({"status": "OK", "results": [
+                {"t": 1700055000000 + i * 60000, "o": 2035.0, "h": 2036.5, "l": 2034.5, "c": close, "v": 10}
+            ]})
+            recorder.record("polygon", "/v2/aggs/ticker/C:XAUUSD/range/1/minute",
+                            {"from": "2023-11-15", "to": "2023-11-15", "apiKey": "secret", "limit": 1},
+                            200, body, 12.5)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_secrets_not_recorded(self):
+        """Test API keys are stripped from recordings"""
+        content = (Path(self.tmp.name) / "polygon.jsonl").read_text()
+        self.assertNotIn("secret", content)
+
+    def test_replay_through_poller(self):
+        """Test RESTPoller in replay mode gets recorded responses in order"""
+        server = ReplayServer(self.tmp.name).start()
+        try:
+            poller = RESTPoller(mode="replay", replay_base_url=server.url)
+            poller.quote_cache_ttl = 0
+
+            async def scenario():
+                return [await poller.get_market_data(timeframe="M1") for _ in range(3)]
+
+            bars = asyncio.run(scenario())
+            self.assertEqual([b["close"] for b in bars], [2035.5, 2036.0, 2035.5])
+            self.assertEqual(server.stats["served"], 3)
+        finally:
+            server.stop()
+
+    def test_error_injection(self):
+        """Test injected errors are returned instead of recordings"""
+        server = ReplayServer(self.tmp.name, error_rate=1.0, error_status=429)
+        try:
+            status, _ = server.respond("/polygon/v2/aggs/ticker/C:XAUUSD/range/1/minute?limit=1")
+            self.assertEqual(status, 429)
+            self.assertEqual(server.stats["errors_injected"], 1)
+
+            server.error_rate = 0
+            status, _ = server.respond("/polygon/v2/aggs/ticker/C:XAUUSD/range/5/minute?limit=1")
+            self.assertEqual(status, 404)
+        finally:
+            server.stop()
+
+if __name__ == "__main__":
+    unittest.main()
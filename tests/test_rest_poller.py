@@ -0,0 +1,126 @@
+"""
+Unit Tests for REST Poller Module
+"""
+
+import asyncio
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.rest_poller import RESTPoller
+from services.rate_limiter import PRIORITY_LOW
+
+class TestRESTPollerCache(unittest.TestCase):
+    """Test shared TTL cache and single-flight request coalescing"""
+
+    def setUp(self):
+        self.poller = RESTPoller()
+        self.calls = 0
+
+        async def fake_polygon(symbol, timeframe, priority="normal"):
+            self.calls += 1
+            await asyncio.sleep(0.05)
+            return {"t": 1700055000000, "o": 2035.0, "h": 2036.0, "l": 2034.0, "c": 2035.5, "v": 10}
+
+        async def no_data(symbol, timeframe, priority="normal"):
+            return None
+
+        self.poller._fetch_from_polygon = fake_polygon
+        self.poller._fetch_from_finnhub = no_data
+        self.poller._fetch_from_twelvedata = no_data
+
+    def test_concurrent_callers_share_request(self):
+        """Test concurrent callers trigger a single provider request"""
+        async def scenario():
+            return await asyncio.gather(*[self.poller.get_market_data(timeframe="M1") for _ in range(10)])
+
+        results = asyncio.run(scenario())
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(r["close"] == 2035.5 for r in results))
+        self.assertEqual(self.poller.cache_stats["coalesced"], 9)
+
+    def test_priorities_not_coalesced(self):
+        """Test a normal caller does not join a low-priority request in flight"""
+        async def scenario():
+            low = asyncio.create_task(self.poller.get_market_data(timeframe="M1", priority=PRIORITY_LOW))
+            await asyncio.sleep(0)
+            await self.poller.get_market_data(timeframe="M1")
+            await self.poller.get_market_data(timeframe="M1", priority=PRIORITY_LOW)  # served from cache
+            await low
+
+        asyncio.run(scenario())
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.poller.cache_stats["coalesced"], 0)
+
+    def test_ttl_cache(self):
+        """Test fresh values are served without a provider call"""
+        self.poller.quote_cache_ttl = 0.1
+
+        async def scenario():
+            await self.poller.get_market_data(timeframe="M1")
+            await self.poller.get_market_data(timeframe="M1")
+            await self.poller.get_market_data(timeframe="M5")  # different key
+            await asyncio.sleep(0.15)
+            await self.poller.get_market_data(timeframe="M1")
+
+        asyncio.run(scenario())
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(self.poller.cache_stats["hits"], 1)
+
+    def test_failures_not_cached(self):
+        """Test a failed fetch is retried by the next caller"""
+        async def failing(symbol, timeframe, priority="normal"):
+            self.calls += 1
+            return None
+
+        self.poller._fetch_from_polygon = failing
+
+        async def scenario():
+            await self.poller.get_market_data(timeframe="M1")
+            await self.poller.get_market_data(timeframe="M1")
+
+        asyncio.run(scenario())
+        self.assertEqual(self.calls, 2)
+
+class TestRESTPollerMultiSymbol(unittest.TestCase):
+    """Test per-symbol caches and batched provider requests"""
+
+    def setUp(self):
+        self.poller = RESTPoller()
+        self.single_calls = []
+        self.batch_calls = []
+
+        async def fake_batch(symbols, timeframe, priority="normal"):
+            self.batch_calls.append(list(symbols))
+            return {symbol: {"open": 1.1, "high": 1.2, "low": 1.0, "close": 1.15, "volume": 0,
+                             "datetime": "2025-11-15 12:00:00"} for symbol in symbols if symbol != "USDJPY"}
+
+        async def fake_polygon(symbol, timeframe, priority="normal"):
+            self.single_calls.append(symbol)
+            return {"t": 1700055000000, "o": 150.0, "h": 150.2, "l": 149.9, "c": 150.1, "v": 10}
+
+        self.poller._fetch_twelvedata_batch = fake_batch
+        self.poller._fetch_from_polygon = fake_polygon
+
+    def test_batch_with_fallback(self):
+        """Test one batched request serves all symbols it returns, the rest fall back"""
+        results = asyncio.run(self.poller.get_market_data_batch(["EURUSD", "GBPUSD", "USDJPY"], "M1"))
+        self.assertEqual(self.batch_calls, [["EURUSD", "GBPUSD", "USDJPY"]])
+        self.assertEqual(self.single_calls, ["USDJPY"])
+        self.assertEqual(results["EURUSD"]["close"], 1.15)
+        self.assertEqual(results["USDJPY"]["close"], 150.1)
+
+        # Batched results are in the shared cache for single-symbol callers
+        asyncio.run(self.poller.get_market_data("GBPUSD", "M1"))
+        self.assertEqual(self.single_calls, ["USDJPY"])
+
+    def test_caches_are_per_symbol(self):
+        self.poller.add_to_cache({"timestamp_utc": "2025-11-15T12:00:00", "close": 2035.0}, "M1")
+        self.poller.add_to_cache({"timestamp_utc": "2025-11-15T12:00:00", "close": 1.085}, "M1", "EURUSD")
+        self.assertEqual([b["close"] for b in self.poller.get_cached_data("M1")], [2035.0])
+        self.assertEqual([b["close"] for b in self.poller.get_cached_data("M1", "EURUSD")], [1.085])
+
+if __name__ == "__main__":
+    unittest.main()
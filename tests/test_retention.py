@@ -0,0 +1,101 @@
+"""
+Unit Tests for Market Data Retention Module
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, select
+from data.retention import MarketDataRetention, floor_timestamp
+from data.models import Base, MarketDataCache, TimeframeEnum
+
+NOW = datetime(2025, 11, 20, 12, 0)  # Thursday
+
+def insert_bars(engine, timeframe: str, start: datetime, count: int, step: timedelta) -> None:
+    rows = []
+    for i in range(count):
+        price = 2000.0 + i
+        rows.append({"ticker": "XAUUSD", "timeframe": TimeframeEnum(timeframe), "timestamp_utc": start + step * i,
+                     "open": price, "high": price + 0.5, "low": price - 0.5, "close": price + 0.25,
+                     "volume": 10, "created_at": NOW})
+    with engine.begin() as conn:
+        conn.execute(MarketDataCache.__table__.insert(), rows)
+
+class TestMarketDataRetention(unittest.TestCase):
+    """Test tiered rollups, batched deletes and the compaction window"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.engine = create_engine(f"sqlite:///{self.path}")
+        Base.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def _bars(self, timeframe: str):
+        table = MarketDataCache.__table__
+        with self.engine.connect() as conn:
+            return conn.execute(select(table).where(table.c.timeframe == TimeframeEnum(timeframe))
+                                .order_by(table.c.timestamp_utc)).all()
+
+    def _job(self, **kwargs) -> MarketDataRetention:
+        options = dict(engine=self.engine, m1_days=14, m5_days=90, h1_days=0, batch_size=7,
+                       off_session_hours=[21], clock=lambda: NOW)
+        options.update(kwargs)
+        return MarketDataRetention(**options)
+
+    def test_floor_timestamp(self):
+        self.assertEqual(floor_timestamp(datetime(2025, 11, 20, 12, 7, 31), 300), datetime(2025, 11, 20, 12, 5))
+        self.assertEqual(floor_timestamp(datetime(2025, 11, 20, 12, 59), 3600), datetime(2025, 11, 20, 12, 0))
+
+    def test_old_m1_rolled_into_m5(self):
+        old = NOW - timedelta(days=20)
+        insert_bars(self.engine, "M1", old, 10, timedelta(minutes=1))
+        insert_bars(self.engine, "M1", NOW - timedelta(hours=1), 5, timedelta(minutes=1))
+
+        result = self._job().run_once()
+
+        self.assertEqual(result["rolled_up"], 2)
+        self.assertEqual(result["deleted"], 10)
+        self.assertEqual(len(self._bars("M1")), 5)
+        first, second = self._bars("M5")
+        self.assertEqual(first.timestamp_utc, old)
+        self.assertEqual((first.open, first.high, first.low, first.close, first.volume),
+                         (2000.0, 2004.5, 1999.5, 2004.25, 50))
+        self.assertEqual(second.open, 2005.0)
+
+    def test_existing_bucket_kept(self):
+        """Test a stored M5 bar wins over the rollup of its M1 bars"""
+        old = NOW - timedelta(days=20)
+        insert_bars(self.engine, "M5", old, 1, timedelta(minutes=5))
+        insert_bars(self.engine, "M1", old, 5, timedelta(minutes=1))
+
+        self._job().run_once()
+        self.assertEqual([bar.close for bar in self._bars("M5")], [2000.25])
+        self.assertEqual(self._bars("M1"), [])
+
+    def test_m5_rolled_into_h1_and_h1_expired(self):
+        insert_bars(self.engine, "M5", NOW - timedelta(days=100), 24, timedelta(minutes=5))
+        insert_bars(self.engine, "H1", NOW - timedelta(days=400), 3, timedelta(hours=1))
+
+        result = self._job(h1_days=365).run_once()
+
+        self.assertEqual(self._bars("M5"), [])
+        self.assertEqual(len(self._bars("H1")), 2)
+        self.assertEqual(result["deleted"], 24 + 3)
+
+    def test_compaction_only_off_session(self):
+        self.assertEqual(self._job().run_once()["compacted"], 0)
+        self.assertEqual(self._job(clock=lambda: NOW.replace(hour=21)).run_once()["compacted"], 1)
+        self.assertEqual(self._job(clock=lambda: NOW + timedelta(days=2)).run_once()["compacted"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
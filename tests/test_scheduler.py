@@ -0,0 +1,80 @@
+"""
+Unit Tests for Bar-Close Scheduler Module
+"""
+
+import asyncio
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.scheduler import BarCloseScheduler
+
+class FakeClock:
+    """Deterministic clock whose sleep advances time"""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+class TestBarCloseScheduler(unittest.TestCase):
+    """Test bar-close alignment, quote cadence and deadline metrics"""
+
+    def setUp(self):
+        self.t0 = 1700055000.0  # aligned to a 5 minute boundary
+        self.clock = FakeClock(self.t0 + 30)
+        self.scheduler = BarCloseScheduler(
+            bar_seconds=60, close_offset=1.0, quote_interval=10.0,
+            late_tolerance=0.5, clock=self.clock, sleep=self.clock.sleep,
+        )
+
+    def test_quote_cadence_then_bar(self):
+        """Test quote wake-ups between closes and bar wake-up after close"""
+        kinds = [asyncio.run(self.scheduler.wait_next())["kind"] for _ in range(4)]
+        self.assertEqual(kinds, ["quote", "quote", "quote", "bar"])
+        self.assertAlmostEqual(self.clock.now, self.t0 + 61.0)
+        self.assertEqual(self.scheduler.metrics["missed_deadlines"], 0)
+
+    def test_m5_close_reported(self):
+        """Test M5 is reported on 5 minute boundaries only"""
+        self.scheduler.quote_interval = 0
+        wakeup = asyncio.run(self.scheduler.wait_next())
+        self.assertEqual(wakeup["timeframes"], ["M1"])
+
+        self.clock.now = self.t0 + 290
+        self.scheduler._next_close = None
+        wakeup = asyncio.run(self.scheduler.wait_next())
+        self.assertEqual(wakeup["timeframes"], ["M1", "M5"])
+
+    def test_missed_deadline_metric(self):
+        """Test overrunning a deadline is counted and the schedule catches up"""
+        self.scheduler.quote_interval = 0
+        self.scheduler.next_bar_deadline()
+        self.clock.now = self.t0 + 185  # loop was blocked for ~2 minutes
+        wakeup = asyncio.run(self.scheduler.wait_next())
+
+        self.assertEqual(wakeup["kind"], "bar")
+        self.assertEqual(self.scheduler.metrics["missed_deadlines"], 1)
+        self.assertGreater(self.scheduler.metrics["max_lateness_ms"], 100000)
+        self.assertEqual(self.scheduler._next_close, self.t0 + 240)
+
+    def test_provider_delay_learning(self):
+        """Test stale fetches push the wake-up later and fresh ones decay it"""
+        bar_close = self.t0 + 60
+        stale_bar = {"timestamp_utc": "2023-11-15T13:29:00+00:00"}  # t0 - 60
+        fresh_bar = {"timestamp_utc": "2023-11-15T13:30:00+00:00"}  # t0
+
+        self.assertFalse(self.scheduler.observe_bar(stale_bar, bar_close))
+        self.assertEqual(self.scheduler.provider_delay, 1.0)
+        self.assertTrue(self.scheduler.observe_bar(fresh_bar, bar_close))
+        self.assertLess(self.scheduler.provider_delay, 1.0)
+        self.assertEqual(self.scheduler.metrics["stale_fetches"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
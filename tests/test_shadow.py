@@ -0,0 +1,84 @@
+"""
+Unit Tests for Shadow Strategy Variants
+"""
+
+import unittest
+import sys
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.strategy import RiskManager, StrategyEngine, strategy_params
+from data.db import SessionLocal, init_db
+from data.models import Trade, BotState
+from data.trade_stats import TradeStatistics
+from services.shadow import ShadowRunner
+
+def make_signal(direction: str = "BUY") -> dict:
+    return {"signal_id": "sig-shadow", "symbol": "XAUUSD", "direction": direction, "entry_price": 2035.0,
+            "sl_price": 2034.0, "tp_price": 2037.0, "confidence_score": 85}
+
+class TestStrategyParams(unittest.TestCase):
+    """Test variant parameter overrides"""
+
+    def test_overrides(self):
+        params = strategy_params({"RSI_PERIOD": 9})
+        self.assertEqual(params["RSI_PERIOD"], 9)
+        self.assertEqual(StrategyEngine(None, params={"RSI_PERIOD": 9}).params, params)
+
+    def test_unknown_parameter(self):
+        with self.assertRaises(ValueError):
+            strategy_params({"RSI_PERIOD_TYPO": 9})
+
+class TestShadowRunner(unittest.TestCase):
+    """Test shadow variants trade their own ledger on the live snapshots"""
+
+    def setUp(self):
+        self.db = SessionLocal()
+        init_db()
+        self.db.query(Trade).delete()
+        self.db.query(BotState).delete()
+        self.db.commit()
+        self.runner = ShadowRunner(self.db, ["XAUUSD"], {"tight_sl": {"SL_ATR_MULTIPLIER": 1.0},
+                                                         "slow_rsi": {"RSI_PERIOD": 21}}).load()
+
+    def tearDown(self):
+        self.db.query(Trade).delete()
+        self.db.query(BotState).delete()
+        self.db.commit()
+        self.db.close()
+
+    def test_invalid_names(self):
+        for name in ("live", "", "x" * 33):
+            with self.assertRaises(ValueError):
+                ShadowRunner(self.db, ["XAUUSD"], {name: {}})
+
+    def test_ledgers_are_separate(self):
+        tight = self.runner.variants["tight_sl"]
+        tight.engines["XAUUSD"].generate_signal = lambda data: make_signal()
+        analysis = {"current_price": 2035.0, "timestamp": datetime.utcnow()}
+
+        signals = self.runner.process({"kind": "analysis", "analyses": {"XAUUSD": analysis}})
+
+        self.assertEqual([signal["variant"] for signal in signals], ["tight_sl"])
+        trade = self.db.query(Trade).one()
+        self.assertEqual(trade.variant, "tight_sl")
+        self.assertEqual(len(tight.books["XAUUSD"]), 1)
+
+        # Live ledger and the other variant are untouched
+        self.assertEqual(TradeStatistics().rebuild(self.db).opened, 0)
+        self.assertEqual(RiskManager(self.db)._get_trades_today(), 0)
+        self.assertEqual(TradeStatistics(variant="tight_sl").rebuild(self.db).opened, 1)
+        comparison = self.runner.compare(live=TradeStatistics())
+        self.assertEqual(sorted(comparison), ["live", "slow_rsi", "tight_sl"])
+        self.assertEqual((comparison["tight_sl"]["opened"], comparison["slow_rsi"]["opened"]), (1, 0))
+
+        # Quotes drive the variant's exits: TP hit closes it as a win in its own stats
+        self.runner.process({"kind": "quote", "prices": {"XAUUSD": 2037.5}, "timestamp": datetime.utcnow()})
+        self.assertEqual(len(tight.books["XAUUSD"]), 0)
+        self.assertEqual(tight.stats.summary()["wins"], 1)
+        self.assertEqual(self.runner.compare()["tight_sl"]["closed"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,9 +9,9 @@ from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from config.strategy import StrategyEngine, RiskManager
+from config.strategy import StrategyEngine, RiskManager, RiskState
 from data.db import SessionLocal, init_db
-from data.models import Trade, TradeStatus, TradeDirection
+from data.models import Trade, TradeStatus, TradeDirection, BotState
 
 class TestStrategy(unittest.TestCase):
     """Test strategy engine"""
@@ -113,5 +113,81 @@ class TestRiskManager(unittest.TestCase):
         count = self.risk_mgr._get_trades_today()
         self.assertEqual(count, 1)
 
+class TestRiskState(unittest.TestCase):
+    """Test in-memory risk counters"""
+    
+    def setUp(self):
+        self.db = SessionLocal()
+        init_db()
+        self.now = datetime(2025, 11, 15, 23, 59)
+        self.state = RiskState(clock=lambda: self.now)
+    
+    def tearDown(self):
+        self.db.query(BotState).delete()
+        self.db.commit()
+        self.db.close()
+    
+    def test_events_and_day_reset(self):
+        """Test counters follow open/close events and reset at UTC midnight"""
+        self.state.on_trade_opened()
+        self.state.on_trade_closed(-2.5)
+        self.state.on_trade_opened()
+        self.assertEqual(self.state.get_trades_today(), 2)
+        self.assertEqual(self.state.get_daily_loss(), 2.5)
+        self.assertEqual(self.state.open_positions, 1)
+        
+        self.now = datetime(2025, 11, 16, 0, 1)
+        self.assertEqual(self.state.get_trades_today(), 0)
+        self.assertEqual(self.state.get_daily_loss(), 0.0)
+        self.assertEqual(self.state.open_positions, 1)  # positions carry over
+    
+    def test_snapshot_restore(self):
+        """Test a restart on the same day resumes the snapshot"""
+        self.state.on_trade_opened()
+        self.state.on_trade_closed(-1.0)
+        self.state.snapshot_mutation()(self.db)
+        self.db.commit()
+        
+        restored = RiskState(clock=lambda: self.now).load(self.db)
+        self.assertEqual(restored.to_dict(), self.state.to_dict())
+        
+        next_day = RiskState(clock=lambda: datetime(2025, 11, 16, 8, 0)).load(self.db)
+        self.assertEqual(next_day.trades_today, 0)
+    
+    def test_risk_manager_uses_state(self):
+        """Test checks read the state (no DB rows needed)"""
+        risk_mgr = RiskManager(self.db, state=self.state)
+        self.assertTrue(risk_mgr.can_generate_signal()[0])
+        self.state.on_trade_opened()
+        can_trade, reason = risk_mgr.can_generate_signal()
+        self.assertFalse(can_trade)
+        self.assertIn("concurrent", reason)
+    
+    def test_limits_span_shards(self):
+        """Test the other shards' snapshot rows count towards the limits"""
+        self.assertEqual(RiskState.shard_key(0), "risk_state")
+        self.state.peer_keys = [RiskState.shard_key(1)]
+        risk_mgr = RiskManager(self.db, state=self.state)
+        
+        peer = RiskState(clock=lambda: self.now)
+        peer.STATE_KEY = RiskState.shard_key(1)
+        peer.on_trade_opened()
+        peer.snapshot_mutation()(self.db)
+        self.db.commit()
+        can_trade, reason = risk_mgr.can_generate_signal()
+        self.assertFalse(can_trade)
+        self.assertIn("concurrent", reason)
+        
+        peer.on_trade_closed(-1e9)
+        peer.snapshot_mutation()(self.db)
+        self.db.commit()
+        can_trade, reason = risk_mgr.can_generate_signal()
+        self.assertFalse(can_trade)
+        self.assertIn("Daily loss", reason)
+        
+        # Yesterday's loss no longer counts
+        self.now = datetime(2025, 11, 16, 0, 1)
+        self.assertTrue(risk_mgr.can_generate_signal()[0])
+
 if __name__ == "__main__":
     unittest.main()
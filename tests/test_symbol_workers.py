@@ -0,0 +1,75 @@
+"""
+Unit Tests for Symbol Worker Sharding
+"""
+
+import time
+import unittest
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.symbol_workers import shard_symbols, worker_count, SymbolWorkerPool
+
+SYMBOLS = ["XAUUSD", "XAGUSD", "XPTUSD", "EURUSD", "GBPUSD"]
+
+class TestSharding(unittest.TestCase):
+    """Test symbols are split evenly across worker processes"""
+
+    def test_round_robin(self):
+        self.assertEqual(shard_symbols(SYMBOLS, 2), [["XAUUSD", "XPTUSD", "GBPUSD"], ["XAGUSD", "EURUSD"]])
+        self.assertEqual(shard_symbols(SYMBOLS, 1), [SYMBOLS])
+
+    def test_never_more_shards_than_symbols(self):
+        self.assertEqual(len(shard_symbols(["XAUUSD"], 4)), 1)
+        self.assertEqual(worker_count(["XAUUSD"], workers=4), 1)
+
+    def test_auto_size(self):
+        """Test workers=0 sizes from symbols per worker, capped at the core count"""
+        symbols = [f"S{i}" for i in range(20)]
+        with patch("services.symbol_workers.os.cpu_count", return_value=8):
+            self.assertEqual(worker_count(symbols, workers=0, per_worker=8), 3)
+        with patch("services.symbol_workers.os.cpu_count", return_value=2):
+            self.assertEqual(worker_count(symbols, workers=0, per_worker=8), 2)
+
+class TestEventRelay(unittest.TestCase):
+    """Test worker events reach the parent's broadcaster"""
+
+    def test_relay_thread(self):
+        received = []
+        pool = SymbolWorkerPool([["XAUUSD"]], on_event=received.append).start()
+        pool.events.put(("signal", {"symbol": "XAUUSD"}, []))
+        deadline = time.monotonic() + 5
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.01)
+        pool.stop()
+        self.assertEqual(received, [("signal", {"symbol": "XAUUSD"}, [])])
+        self.assertIsNone(pool._relay)
+
+    def test_parent_broadcasts_worker_events(self):
+        import main
+        from data.trade_stats import TradeStatistics
+        signal = {"symbol": "EURUSD", "direction": "BUY", "entry_price": 1.085, "sl_price": 1.084,
+                  "tp_price": 1.087}
+        trade = dict(signal, status="CLOSED_WIN", exit_price=1.087, pips_gained=20.0, virtual_pl_usd=2.0,
+                     closed_at=datetime(2025, 11, 14, 9))
+        with patch.object(main, "broadcaster", MagicMock()) as broadcaster, \
+                patch.object(main, "chart_service", MagicMock()) as charts, \
+                patch.object(main, "trade_stats", TradeStatistics()) as stats, \
+                patch.object(main, "db_writer", MagicMock()) as writer:
+            main.relay_shard_event(("signal", signal, [{"close": 1.085}]))
+            main.relay_shard_event(("trade", trade, []))
+        broadcaster.publish_signal.assert_called_once_with(signal)
+        broadcaster.publish_trade_result.assert_called_once_with(trade)
+        self.assertEqual(charts.schedule.call_args_list[0].args[2], [{"close": 1.085}])
+        # The parent's statistics count the worker's trade too, and get snapshotted
+        summary = stats.summary()
+        self.assertEqual((stats.opened, stats.open, summary["wins"]), (1, 0, 1))
+        self.assertAlmostEqual(summary["total_pl_usd"], 2.0)
+        self.assertEqual(list(stats.by_day), ["2025-11-14"])
+        self.assertEqual(writer.submit.call_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
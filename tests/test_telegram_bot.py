@@ -0,0 +1,96 @@
+"""
+Unit Tests for the Telegram Bot on the Trading Event Loop
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import main
+from data.db import init_db
+from data.subscribers import SubscriberRegistry
+from tests.telegram_stub_server import StubBotAPIServer
+
+class TestTelegramInLoop(unittest.TestCase):
+    """Test commands are served by the Application running on the caller's loop"""
+
+    def setUp(self):
+        init_db()
+        self.server = StubBotAPIServer().start()
+        self.registry = SubscriberRegistry()
+        main.command_latency.clear()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_disabled_without_token(self):
+        with patch.object(main, "TELEGRAM_BOT_TOKEN", ""):
+            self.assertIsNone(asyncio.run(main.start_telegram_bot()))
+
+    def test_commands_run_on_loop(self):
+        handler_threads = []
+        summary = main.trade_stats.summary
+
+        def recording_summary(*args, **kwargs):
+            handler_threads.append(threading.get_ident())
+            return summary(*args, **kwargs)
+
+        async def scenario():
+            app_tg = await main.start_telegram_bot()
+            self.assertIsNotNone(app_tg)
+            try:
+                self.server.push_command(42, "/monitor")
+                self.server.push_command(42, "/status")
+                deadline = time.monotonic() + 10
+                while len(self.server.sent) < 2 and time.monotonic() < deadline:
+                    await asyncio.sleep(0.02)
+            finally:
+                await main.stop_telegram_bot(app_tg)
+            return threading.get_ident()
+
+        with patch.object(main, "TELEGRAM_BOT_TOKEN", "123:TEST"), \
+                patch.object(main, "TELEGRAM_API_BASE", self.server.url), \
+                patch.object(main, "subscriber_registry", self.registry), \
+                patch.object(main.trade_stats, "summary", recording_summary):
+            loop_thread = asyncio.run(scenario())
+
+        replies = [text for _, chat, text in self.server.sent if chat == 42]
+        self.assertEqual(len(replies), 2)
+        self.assertIn("XAUUSD signals activated", replies[0])
+        self.assertIn("Subscribers: 1", replies[1])
+        self.assertTrue(self.registry.is_active(42))
+        self.assertEqual(handler_threads, [loop_thread])
+        self.assertEqual(main.command_latency["status"]["count"], 1)
+        self.assertGreater(main.command_latency["monitor"]["last_ms"], 0)
+
+    def test_history_and_performance(self):
+        async def scenario():
+            app_tg = await main.start_telegram_bot()
+            try:
+                self.server.push_command(7, "/riwayat 5")
+                self.server.push_command(7, "/performa")
+                deadline = time.monotonic() + 10
+                while len(self.server.sent) < 2 and time.monotonic() < deadline:
+                    await asyncio.sleep(0.02)
+            finally:
+                await main.stop_telegram_bot(app_tg)
+
+        with patch.object(main, "TELEGRAM_BOT_TOKEN", "123:TEST"), \
+                patch.object(main, "TELEGRAM_API_BASE", self.server.url), \
+                patch.object(main, "ADMIN_USER_IDS", [7]):
+            main.command_cache.clear()
+            asyncio.run(scenario())
+
+        replies = sorted(text for _, chat, text in self.server.sent if chat == 7)
+        self.assertEqual(len(replies), 2)
+        self.assertIn("Performance Report", replies[0])
+        self.assertTrue(replies[1].startswith("📜"))  # history page (or "no trades")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Unit Tests for Tick Aggregator Module
+"""
+
+import unittest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.tick_aggregator import TickAggregator
+from utils.data_mapper import normalize_quote
+
+class TestTickAggregator(unittest.TestCase):
+    """Test local tick-to-bar aggregation"""
+
+    def setUp(self):
+        self.agg = TickAggregator(timeframes=("M1", "M5"), max_bars=3)
+        self.t0 = 1700055000  # aligned to a 5 minute boundary
+
+    def test_ohlc_and_spread_stats(self):
+        """Test OHLCV and spread statistics of a single bar"""
+        self.agg.add_tick(2035.50, bid=2035.48, ask=2035.52, timestamp=self.t0 + 1)
+        self.agg.add_tick(2036.00, bid=2035.97, ask=2036.03, timestamp=self.t0 + 10)
+        self.agg.add_tick(2035.00, bid=2034.99, ask=2035.01, timestamp=self.t0 + 20)
+        self.agg.add_tick(2035.25, timestamp=self.t0 + 30)
+
+        bar = self.agg.get_current_bar("M1")
+        self.assertEqual(bar["open"], 2035.50)
+        self.assertEqual(bar["high"], 2036.00)
+        self.assertEqual(bar["low"], 2035.00)
+        self.assertEqual(bar["close"], 2035.25)
+        self.assertEqual(bar["tick_count"], 4)
+        self.assertAlmostEqual(bar["spread_min"], 0.02, places=6)
+        self.assertAlmostEqual(bar["spread_max"], 0.06, places=6)
+        self.assertAlmostEqual(bar["spread_avg"], 0.04, places=6)
+        self.assertEqual(bar["bid"], 2034.99)
+
+    def test_bar_completion(self):
+        """Test that crossing a boundary completes the previous bar"""
+        self.agg.add_tick(2035.0, timestamp=self.t0)
+        closed = self.agg.add_tick(2036.0, timestamp=self.t0 + 60)
+
+        self.assertEqual([tf for tf, _ in closed], ["M1"])
+        self.assertEqual(len(self.agg.get_bars("M1")), 1)
+        self.assertEqual(len(self.agg.get_bars("M5")), 0)
+
+        closed = self.agg.add_tick(2037.0, timestamp=self.t0 + 300)
+        self.assertEqual(sorted(tf for tf, _ in closed), ["M1", "M5"])
+        m5_bar = self.agg.get_bars("M5")[0]
+        self.assertEqual(m5_bar["open"], 2035.0)
+        self.assertEqual(m5_bar["close"], 2036.0)
+
+    def test_bounded_memory(self):
+        """Test completed bars are capped at max_bars"""
+        for i in range(10):
+            self.agg.add_tick(2035.0 + i, timestamp=self.t0 + i * 60)
+        self.assertEqual(len(self.agg.get_bars("M1")), 3)
+        self.assertEqual(self.agg.get_bars("M1")[-1]["close"], 2043.0)
+
+    def test_late_tick_dropped(self):
+        """Test ticks older than the running bar are dropped"""
+        self.agg.add_tick(2035.0, timestamp=self.t0 + 60)
+        self.agg.add_tick(2099.0, timestamp=self.t0 + 5)
+        self.assertEqual(self.agg.late_ticks, 1)
+        self.assertEqual(self.agg.get_current_bar("M1")["high"], 2035.0)
+
+    def test_finnhub_quote(self):
+        """Test Finnhub quote is treated as a tick, not a candle"""
+        quote = normalize_quote({"c": 2035.5, "h": 2050.0, "l": 2020.0, "o": 2030.0, "t": self.t0}, "finnhub")
+        self.assertEqual(quote["price"], 2035.5)
+        self.assertEqual(quote["timestamp"], float(self.t0))
+
+        self.agg.add_quote(quote)
+        bar = self.agg.get_current_bar("M1")
+        self.assertEqual(bar["high"], 2035.5)
+        self.assertEqual(bar["low"], 2035.5)
+
+class TestStreamedStrategyInputs(unittest.TestCase):
+    """Test the strategy sees completed streamed bars only"""
+
+    def test_forming_bar_not_evaluated(self):
+        import main
+        from services.rest_poller import RESTPoller
+        poller = RESTPoller()
+        t0 = 1700055000
+        evaluated = {}
+
+        def tick(price, offset):
+            poller.add_quote({"price": price, "bid": price - 0.02, "ask": price + 0.02, "timestamp": t0 + offset})
+            return main.strategy_inputs([main.DEFAULT_SYMBOL], True, evaluated)
+
+        with patch.object(main, "rest_poller", poller):
+            for minute in range(6):
+                tick(2000.0 + minute, minute * 60)
+            item = tick(2010.0, 6 * 60 + 1)  # first tick of a bar: M1 of minute 5 just closed
+            self.assertEqual(item["kind"], "analysis")
+            analysis = item["analyses"][main.DEFAULT_SYMBOL]
+            self.assertEqual(analysis["m1_closes"][-1], 2005.0)
+            self.assertEqual(analysis["current_price"], 2010.0)
+
+            item = tick(2050.0, 6 * 60 + 30)  # same bar still forming
+            self.assertEqual(item["kind"], "quote")
+            self.assertEqual(item["prices"], {main.DEFAULT_SYMBOL: 2050.0})
+
+            item = tick(2020.0, 7 * 60)
+            self.assertEqual(item["analyses"][main.DEFAULT_SYMBOL]["m1_closes"][-1], 2050.0)
+
+if __name__ == "__main__":
+    unittest.main()
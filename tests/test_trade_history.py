@@ -0,0 +1,140 @@
+"""
+Unit Tests for Trade History Pagination and Rendered Reply Cache
+"""
+
+import asyncio
+import unittest
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from data.db import SessionLocal, init_db
+from data.models import Trade, TradeStatus, TradeDirection
+from data.trade_history import trade_page, encode_cursor, decode_cursor
+from utils.data_mapper import format_trade_history
+from utils.render_cache import RenderCache
+
+class TestTradePage(unittest.TestCase):
+    """Test keyset pages cover the ledger exactly once, newest first"""
+
+    def setUp(self):
+        self.db = SessionLocal()
+        init_db()
+        self.db.query(Trade).delete()
+        base = datetime(2025, 11, 14, 9)
+        for index in range(25):
+            # Pairs share a timestamp so the id tie-breaker matters
+            created = base + timedelta(minutes=index // 2)
+            self.db.add(Trade(id=f"t{index:02d}", signal_id=f"sig-{index}", direction=TradeDirection.BUY,
+                              entry_price=2035.0, sl_price=2034.0, tp_price=2037.0, signal_timestamp_utc=created,
+                              confidence_score=80, status=TradeStatus.OPEN, created_at=created))
+        self.db.add(Trade(id="shadow", signal_id="sig-shadow", direction=TradeDirection.SELL, entry_price=2035.0,
+                          sl_price=2036.0, tp_price=2033.0, signal_timestamp_utc=base, confidence_score=80,
+                          created_at=base + timedelta(hours=1), variant="tight_sl"))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.query(Trade).delete()
+        self.db.commit()
+        self.db.close()
+
+    def test_pages(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            rows, cursor = trade_page(self.db, 10, cursor)
+            seen += [row["id"] for row in rows]
+            pages += 1
+            if cursor is None:
+                break
+            cursor = decode_cursor(encode_cursor(cursor))
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, [f"t{index:02d}" for index in reversed(range(25))])
+
+    def test_cursor_round_trip(self):
+        cursor = (datetime(2025, 11, 14, 9, 0, 0, 123456), "7f1c0a3e-0000-4000-8000-000000000000")
+        self.assertEqual(decode_cursor(encode_cursor(cursor)), cursor)
+        self.assertLessEqual(len("rw:50:999:" + encode_cursor(cursor)), 64)
+        self.assertIsNone(decode_cursor("garbage"))
+
+    def test_uses_index(self):
+        plan = self.db.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM trades WHERE variant = 'live' "
+            "AND (created_at, id) < ('2025-11-14 09:05:00.000000', 't10') ORDER BY created_at DESC, id DESC LIMIT 11"
+        )).fetchall()
+        detail = " ".join(row[-1] for row in plan)
+        self.assertIn("ix_trades_variant_created_at_id", detail)
+        self.assertNotIn("TEMP B-TREE", detail)
+
+    def test_format(self):
+        rows, _ = trade_page(self.db, 2)
+        message = format_trade_history(rows)
+        self.assertIn("page 1", message)
+        self.assertEqual(message.count("XAUUSD BUY"), 2)
+
+class TestRenderCache(unittest.TestCase):
+    """Test concurrent identical requests share one render"""
+
+    def test_single_flight_and_expiry(self):
+        now = [0.0]
+        cache = RenderCache(ttl=5, clock=lambda: now[0])
+        renders = []
+
+        async def render():
+            renders.append(1)
+            await asyncio.sleep(0.01)
+            return f"reply {len(renders)}"
+
+        async def scenario():
+            replies = await asyncio.gather(*[cache.get("performa", render) for _ in range(50)])
+            self.assertEqual(set(replies), {"reply 1"})
+            now[0] = 4.0
+            self.assertEqual(await cache.get("performa", render), "reply 1")
+            now[0] = 6.0
+            self.assertEqual(await cache.get("performa", render), "reply 2")
+
+        asyncio.run(scenario())
+        self.assertEqual(cache.get_stats(), {"hits": 50, "renders": 2, "entries": 1})
+
+    def test_failure_not_cached(self):
+        cache = RenderCache(ttl=5)
+
+        async def fail():
+            raise RuntimeError("db down")
+
+        async def ok():
+            return "ok"
+
+        async def scenario():
+            with self.assertRaises(RuntimeError):
+                await cache.get("riwayat", fail)
+            return await cache.get("riwayat", ok)
+
+        self.assertEqual(asyncio.run(scenario()), "ok")
+
+    def test_cancelled_render_not_cached(self):
+        """Test a cancelled render releases its waiters and the next caller renders again"""
+        cache = RenderCache(ttl=5)
+
+        async def slow():
+            await asyncio.sleep(10)
+
+        async def ok():
+            return "ok"
+
+        async def scenario():
+            first = asyncio.create_task(cache.get("riwayat", slow))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(cache.get("riwayat", ok))
+            await asyncio.sleep(0)
+            first.cancel()
+            results = await asyncio.wait_for(asyncio.gather(first, waiter, return_exceptions=True), 1)
+            self.assertTrue(all(isinstance(r, asyncio.CancelledError) for r in results))
+            return await asyncio.wait_for(cache.get("riwayat", ok), 1)
+
+        self.assertEqual(asyncio.run(scenario()), "ok")
+
+if __name__ == "__main__":
+    unittest.main()
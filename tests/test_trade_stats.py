@@ -0,0 +1,116 @@
+"""
+Unit Tests for Trade Statistics Module
+"""
+
+import unittest
+import sys
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.trade_stats import TradeStatistics, risk_reward
+from data.db import SessionLocal, init_db
+from data.models import Trade, TradeStatus, TradeDirection, BotState
+
+def make_trade(tid: str, direction: TradeDirection, status: TradeStatus, pl: float, pips: float,
+               closed_at: datetime) -> Trade:
+    return Trade(id=tid, signal_id=f"sig-{tid}", direction=direction,
+                 entry_price=2035.0, sl_price=2034.0 if direction == TradeDirection.BUY else 2036.0,
+                 tp_price=2037.0 if direction == TradeDirection.BUY else 2033.0,
+                 signal_timestamp_utc=closed_at, confidence_score=80, status=status,
+                 exit_timestamp_utc=None if status == TradeStatus.OPEN else closed_at,
+                 pips_gained=pips, virtual_pl_usd=pl)
+
+class TestTradeStatistics(unittest.TestCase):
+    """Test incremental updates match a rebuild from history"""
+
+    def setUp(self):
+        self.db = SessionLocal()
+        init_db()
+        self.db.query(Trade).delete()
+        self.trades = [
+            make_trade("t1", TradeDirection.BUY, TradeStatus.CLOSED_WIN, 2.0, 200.0, datetime(2025, 11, 14, 9)),
+            make_trade("t2", TradeDirection.SELL, TradeStatus.CLOSED_LOSE, -1.0, -100.0, datetime(2025, 11, 14, 15)),
+            make_trade("t3", TradeDirection.SELL, TradeStatus.CLOSED_WIN, 2.0, 200.0, datetime(2025, 11, 15, 10)),
+            make_trade("t4", TradeDirection.BUY, TradeStatus.OPEN, None, None, datetime(2025, 11, 15, 11)),
+        ]
+        self.db.add_all(self.trades)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.query(Trade).delete()
+        self.db.query(BotState).filter(BotState.key == TradeStatistics.STATE_KEY).delete()
+        self.db.commit()
+        self.db.close()
+
+    def _incremental(self) -> TradeStatistics:
+        stats = TradeStatistics()
+        for trade in self.trades:
+            stats.record_open()
+            if trade.status != TradeStatus.OPEN:
+                stats.record_close(trade.direction, trade.status, trade.virtual_pl_usd, trade.pips_gained,
+                                   trade.exit_timestamp_utc,
+                                   risk_reward(trade.direction, trade.entry_price, trade.sl_price, trade.tp_price))
+        return stats
+
+    def test_summary(self):
+        summary = self._incremental().summary()
+        self.assertEqual((summary["closed"], summary["wins"], summary["losses"]), (3, 2, 1))
+        self.assertAlmostEqual(summary["win_rate"], 200 / 3)
+        self.assertAlmostEqual(summary["total_pl_usd"], 3.0)
+        self.assertAlmostEqual(summary["profit_factor"], 4.0)
+        self.assertAlmostEqual(summary["total_pips"], 300.0)
+        self.assertAlmostEqual(summary["avg_rr"], 2.0)
+
+    def test_rebuild_matches_incremental(self):
+        incremental = self._incremental().to_dict()
+        rebuilt = TradeStatistics().rebuild(self.db).to_dict()
+        self.assertEqual(rebuilt["opened"], 4)
+        self.assertEqual(rebuilt["open"], 1)
+        self.assertEqual(sorted(rebuilt["by_day"]), ["2025-11-14", "2025-11-15"])
+        self.assertEqual(rebuilt["by_direction"]["SELL"]["closed"], 2)
+        self.assertEqual(sorted(rebuilt["by_week"]), ["2025-W46"])
+        for key in ("opened", "open", "totals", "by_day", "by_week", "by_direction"):
+            self.assertEqual(rebuilt[key], incremental[key], key)
+
+    def test_periods(self):
+        stats = self._incremental()
+        days = stats.periods("day", 1)
+        self.assertEqual([day for day, _ in days], ["2025-11-15"])
+        self.assertEqual(days[0][1]["wins"], 1)
+        (week, summary), = stats.periods("week", 4)
+        self.assertEqual((week, summary["closed"]), ("2025-W46", 3))
+
+    def test_bucket_retention(self):
+        """Test only the most recent days and weeks are kept, totals keep everything"""
+        stats = TradeStatistics(day_buckets=1, week_buckets=1)
+        for day in (1, 14, 15):
+            stats.record_close(TradeDirection.BUY, TradeStatus.CLOSED_WIN, 1.0, 10.0, datetime(2025, 11, day))
+        self.assertEqual(list(stats.by_day), ["2025-11-15"])
+        self.assertEqual(list(stats.by_week), ["2025-W46"])
+        self.assertEqual(stats.summary()["closed"], 3)
+        rebuilt = TradeStatistics(day_buckets=1, week_buckets=1).rebuild(self.db)
+        self.assertEqual(list(rebuilt.by_day), ["2025-11-15"])
+
+    def test_snapshot_without_weeks(self):
+        value = self._incremental().to_dict()
+        del value["by_week"]
+        self.db.merge(BotState(key=TradeStatistics.STATE_KEY, value=value))
+        self.db.commit()
+        restored = TradeStatistics().load(self.db)
+        self.assertEqual(restored.by_week["2025-W46"]["closed"], 3)
+
+    def test_snapshot_round_trip(self):
+        stats = self._incremental()
+        stats.snapshot_mutation()(self.db)
+        self.db.commit()
+        # Load must come from the snapshot, not a rebuild over the table
+        self.db.query(Trade).delete()
+        self.db.commit()
+        restored = TradeStatistics().load(self.db)
+        self.assertTrue(restored.loaded)
+        self.assertEqual(restored.to_dict(), stats.to_dict())
+
+if __name__ == "__main__":
+    unittest.main()
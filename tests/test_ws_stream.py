@@ -0,0 +1,92 @@
+"""
+Unit Tests for WebSocket Stream Module
+"""
+
+import asyncio
+import json
+import time
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.ws_stream import WebSocketStream, parse_stream_message
+from tests.ws_stub_server import StubWebSocketServer
+
+async def _wait_until(condition, timeout: float = 3.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        await asyncio.sleep(0.02)
+    return condition()
+
+class TestParseStreamMessage(unittest.TestCase):
+    """Test pushed message parsing"""
+
+    def test_finnhub_trades(self):
+        """Test Finnhub trade batches become quote events"""
+        raw = json.dumps({"type": "trade", "data": [
+            {"p": 2035.5, "s": "OANDA:XAU_USD", "t": 1700055000123, "v": 2},
+            {"p": 2035.6, "s": "OANDA:XAU_USD", "t": 1700055000456, "v": 1},
+        ]})
+        events = parse_stream_message(raw)
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0][0], "quote")
+        self.assertEqual(events[0][1]["price"], 2035.5)
+        self.assertAlmostEqual(events[0][1]["timestamp"], 1700055000.123)
+
+    def test_bar_and_ping(self):
+        """Test bar messages pass through and pings are ignored"""
+        events = parse_stream_message(json.dumps({"type": "bar", "timeframe": "M5", "close": 2035.0}))
+        self.assertEqual(events[0][0], "bar")
+        self.assertEqual(events[0][1]["timeframe"], "M5")
+        self.assertEqual(parse_stream_message(json.dumps({"type": "ping"})), [])
+        self.assertEqual(parse_stream_message("not json"), [])
+
+class TestWebSocketStream(unittest.TestCase):
+    """Test streaming client against the local stand-in server"""
+
+    def setUp(self):
+        self.server = StubWebSocketServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_stream_reconnect_and_fallback(self):
+        """Test ticks delivery, reconnect after drop and stale-feed fallback"""
+        quotes = []
+
+        async def scenario():
+            stream = WebSocketStream(
+                url=self.server.url, symbol="OANDA:XAU_USD", on_quote=quotes.append,
+                stale_seconds=0.5, reconnect_min=0.05, reconnect_max=0.1,
+            )
+            stream.start()
+            try:
+                self.assertTrue(await _wait_until(lambda: self.server.client_count() == 1))
+                self.assertTrue(await _wait_until(lambda: self.server.received))
+                self.assertEqual(json.loads(self.server.received[0])["symbol"], "OANDA:XAU_USD")
+                self.assertFalse(stream.check_health())  # no data yet -> REST
+
+                self.server.send(json.dumps({"type": "trade", "data": [{"p": 2035.5, "t": 1700055000000, "v": 1}]}))
+                self.assertTrue(await stream.wait_for_update(2.0))
+                self.assertEqual(quotes[0]["price"], 2035.5)
+                self.assertTrue(stream.check_health())
+
+                # Network drop -> reconnect with backoff
+                self.server.drop_clients()
+                self.assertTrue(await _wait_until(lambda: stream.reconnects >= 1 and self.server.client_count() == 1))
+
+                # Silence -> stale -> REST fallback
+                await asyncio.sleep(0.7)
+                self.assertFalse(stream.check_health())
+                self.assertTrue(stream.fallback_active)
+            finally:
+                stream.stop()
+
+        asyncio.run(scenario())
+
+if __name__ == "__main__":
+    unittest.main()
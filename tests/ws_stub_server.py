@@ -0,0 +1,157 @@
+"""
+Local Stand-in WebSocket Server
+Minimal RFC 6455 text-frame server for exercising services.ws_stream offline
+"""
+
+import base64
+import hashlib
+import socket
+import struct
+import threading
+from typing import List
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+class StubWebSocketServer:
+    """
+    Accepts WebSocket clients on localhost, records what they send and
+    pushes text frames to them on demand
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen(8)
+        self.host, self.port = self._sock.getsockname()
+        self.url = f"ws://{self.host}:{self.port}/"
+
+        self.received: List[str] = []
+        self.connections = 0
+        self._clients: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self) -> "StubWebSocketServer":
+        self._running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        self.drop_clients()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def send(self, text: str) -> None:
+        """Push a text frame to every connected client"""
+        payload = text.encode("utf-8")
+        header = bytes([0x81])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 65536:
+            header += bytes([126]) + struct.pack(">H", len(payload))
+        else:
+            header += bytes([127]) + struct.pack(">Q", len(payload))
+
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.sendall(header + payload)
+            except OSError:
+                self._remove(client)
+
+    def drop_clients(self) -> None:
+        """Abruptly close all client connections (simulates a network drop)"""
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            client.close()
+
+    # ===== INTERNALS =====
+    def _accept_loop(self) -> None:
+        while self._running:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve_client, args=(client,), daemon=True).start()
+
+    def _serve_client(self, client: socket.socket) -> None:
+        try:
+            request = b""
+            while b"\r\n\r\n" not in request:
+                chunk = client.recv(4096)
+                if not chunk:
+                    return
+                request += chunk
+
+            key = ""
+            for line in request.decode("latin-1").split("\r\n"):
+                if line.lower().startswith("sec-websocket-key:"):
+                    key = line.split(":", 1)[1].strip()
+            accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+            client.sendall((
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+            ).encode())
+
+            with self._lock:
+                self._clients.append(client)
+                self.connections += 1
+
+            while self._running:
+                opcode, payload = self._read_frame(client)
+                if opcode is None or opcode == 0x8:
+                    break
+                if opcode == 0x1:
+                    self.received.append(payload.decode("utf-8"))
+        except OSError:
+            pass
+        finally:
+            self._remove(client)
+
+    def _read_frame(self, client: socket.socket):
+        header = self._recv_exact(client, 2)
+        if header is None:
+            return None, None
+        opcode = header[0] & 0x0F
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self._recv_exact(client, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self._recv_exact(client, 8))[0]
+        mask = self._recv_exact(client, 4) if header[1] & 0x80 else b"\x00\x00\x00\x00"
+        data = self._recv_exact(client, length) or b""
+        return opcode, bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+    def _recv_exact(self, client: socket.socket, size: int):
+        data = b""
+        while len(data) < size:
+            chunk = client.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _remove(self, client: socket.socket) -> None:
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+        try:
+            client.close()
+        except OSError:
+            pass
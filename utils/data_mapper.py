@@ -3,9 +3,63 @@ Data Normalization & Mapping
 Transform API responses into standardized format
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List
 from datetime import datetime
+import numpy as np
+import pandas as pd
 import pytz
+from utils.price import DEFAULT_SYMBOL, price_decimals
+
+# ===== PROVIDER SCHEMAS =====
+# Declared once and shared by the single-bar and batch normalizers.
+#   records:   key holding the bar list in a full response (None = bare list)
+#   columnar:  response is already column arrays (Finnhub candles)
+#   timestamp: (source key, unit) with unit "ms", "s" or "iso"
+#   fields:    standard field -> source key (None = constant 0)
+PROVIDER_SCHEMAS = {
+    "polygon": {
+        "records": "results",
+        "columnar": False,
+        "timestamp": ("t", "ms"),
+        "fields": {"open": "o", "high": "h", "low": "l", "close": "c", "volume": "v", "bid": "bid", "ask": "ask"},
+    },
+    "finnhub": {
+        "records": None,
+        "columnar": True,
+        "timestamp": ("t", "s"),
+        "fields": {"open": "o", "high": "h", "low": "l", "close": "c", "volume": "v", "bid": "bid", "ask": "ask"},
+    },
+    "twelvedata": {
+        "records": "values",
+        "columnar": False,
+        "timestamp": ("datetime", "iso"),
+        "fields": {"open": "open", "high": "high", "low": "low", "close": "close", "volume": "volume",
+                   "bid": "bid", "ask": "ask"},
+    },
+    "goldapi": {
+        # GoldAPI only provides current price, not OHLC (not ideal for backtesting)
+        "records": None,
+        "columnar": False,
+        "timestamp": ("timestamp", "iso"),
+        "fields": {"open": "price", "high": "price", "low": "price", "close": "price", "volume": None,
+                   "bid": "price", "ask": "price"},
+    },
+    "csv": {
+        "records": None,
+        "columnar": False,
+        "timestamp": ("timestamp", "iso"),
+        "fields": {"open": "open", "high": "high", "low": "low", "close": "close", "volume": "volume",
+                   "bid": "bid", "ask": "ask"},
+    },
+}
+
+PRICE_FIELDS = ("open", "high", "low", "close")
+
+def _get_schema(source: str) -> Dict[str, Any]:
+    schema = PROVIDER_SCHEMAS.get(source.lower())
+    if schema is None:
+        raise ValueError(f"Unknown data source: {source}")
+    return schema
 
 def normalize_market_data(raw_data: Dict[str, Any], source: str = "polygon") -> Dict[str, Any]:
     """
@@ -23,91 +77,179 @@ def normalize_market_data(raw_data: Dict[str, Any], source: str = "polygon") ->
         "ask": 2035.52
     }
     """
+    schema = _get_schema(source)
+    fields = schema["fields"]
+    ts_key, ts_unit = schema["timestamp"]
     
-    if source.lower() == "polygon":
-        return _normalize_polygon(raw_data)
-    elif source.lower() == "finnhub":
-        return _normalize_finnhub(raw_data)
-    elif source.lower() == "twelvedata":
-        return _normalize_twelvedata(raw_data)
-    elif source.lower() == "goldapi":
-        return _normalize_goldapi(raw_data)
+    if ts_unit == "iso":
+        timestamp_utc = raw_data.get(ts_key, datetime.utcnow().isoformat())
     else:
-        raise ValueError(f"Unknown data source: {source}")
-
-def _normalize_polygon(data: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Normalize Polygon.io format
-    Example: {"t": 1700055000000, "o": 2035.15, "h": 2035.85, "l": 2035.10, "c": 2035.50, "v": 1250}
-    """
-    timestamp_ms = data.get("t", 0)
-    timestamp_utc = datetime.fromtimestamp(timestamp_ms / 1000, tz=pytz.UTC).isoformat()
+        divisor = 1000 if ts_unit == "ms" else 1
+        timestamp_utc = datetime.fromtimestamp(raw_data.get(ts_key, 0) / divisor, tz=pytz.UTC).isoformat()
     
-    return {
-        "timestamp_utc": timestamp_utc,
-        "open": float(data.get("o", 0)),
-        "high": float(data.get("h", 0)),
-        "low": float(data.get("l", 0)),
-        "close": float(data.get("c", 0)),
-        "volume": int(data.get("v", 0)),
-        "bid": data.get("bid"),
-        "ask": data.get("ask"),
-    }
+    normalized = {"timestamp_utc": timestamp_utc}
+    for field in PRICE_FIELDS:
+        normalized[field] = float(raw_data.get(fields[field], 0))
+    normalized["volume"] = int(raw_data.get(fields["volume"], 0)) if fields["volume"] else 0
+    for field in ("bid", "ask"):
+        # Passed through as-is unless the schema maps them onto a price key
+        value = raw_data.get(fields[field])
+        normalized[field] = float(value) if value is not None and fields[field] != field else value
+    
+    return normalized
 
-def _normalize_finnhub(data: Dict[str, Any]) -> Dict[str, Any]:
+def normalize_batch(response: Any, source: str = "polygon") -> Dict[str, np.ndarray]:
     """
-    Normalize Finnhub format
-    Example: {"t": 1700055000, "o": 2035.15, "h": 2035.85, "l": 2035.10, "c": 2035.50, "v": 1250}
+    Normalize a whole provider response into columnar arrays in one pass
+    
+    Timestamps are integer epoch milliseconds (UTC); no datetime objects or
+    ISO strings are created per bar. Rows are returned oldest first.
+    
+    Args:
+        response: Full provider response (dict) or a list of raw bar dicts
+        source: Provider schema name (see PROVIDER_SCHEMAS)
+    
+    Returns:
+        {"timestamp_ms": int64[n], "open"/"high"/"low"/"close": float64[n],
+         "volume": int64[n], "bid"/"ask": float64[n] (NaN when missing)}
     """
-    timestamp_sec = data.get("t", 0)
-    timestamp_utc = datetime.fromtimestamp(timestamp_sec, tz=pytz.UTC).isoformat()
+    schema = _get_schema(source)
+    fields = schema["fields"]
+    ts_key, ts_unit = schema["timestamp"]
     
-    return {
-        "timestamp_utc": timestamp_utc,
-        "open": float(data.get("o", 0)),
-        "high": float(data.get("h", 0)),
-        "low": float(data.get("l", 0)),
-        "close": float(data.get("c", 0)),
-        "volume": int(data.get("v", 0)),
-        "bid": data.get("bid"),
-        "ask": data.get("ask"),
-    }
+    if schema["columnar"]:
+        columns = response if isinstance(response, dict) else {}
+        n = len(columns.get(ts_key) or [])
+        
+        def column(key):
+            values = columns.get(key) if key else None
+            return values if values is not None and len(values) == n else None
+    else:
+        records = response
+        if isinstance(response, dict):
+            records = response.get(schema["records"]) or [] if schema["records"] else [response]
+        records = records or []
+        n = len(records)
+        
+        def column(key):
+            if not key or not records or key not in records[0]:
+                return None
+            return [r.get(key) for r in records]
+    
+    # Timestamps -> epoch ms
+    raw_ts = column(ts_key)
+    if raw_ts is None:
+        timestamp_ms = np.zeros(n, dtype=np.int64)
+    elif ts_unit == "iso":
+        timestamp_ms = pd.to_datetime(pd.Series(raw_ts), utc=True).to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    else:
+        scale = 1 if ts_unit == "ms" else 1000
+        timestamp_ms = np.asarray(raw_ts, dtype=np.int64) * scale
+    
+    batch = {"timestamp_ms": timestamp_ms}
+    for field in PRICE_FIELDS:
+        values = column(fields[field])
+        batch[field] = np.asarray(values, dtype=np.float64) if values is not None else np.zeros(n)
+    
+    volume = column(fields["volume"])
+    batch["volume"] = np.asarray(volume, dtype=np.float64).astype(np.int64) if volume is not None else np.zeros(n, dtype=np.int64)
+    
+    for field in ("bid", "ask"):
+        values = column(fields[field])
+        batch[field] = (np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+                        if values is not None else np.full(n, np.nan))
+    
+    # Some providers (TwelveData) return newest first
+    if n > 1 and np.any(np.diff(batch["timestamp_ms"]) < 0):
+        order = np.argsort(batch["timestamp_ms"], kind="stable")
+        batch = {name: values[order] for name, values in batch.items()}
+    
+    return batch
 
-def _normalize_twelvedata(data: Dict[str, Any]) -> Dict[str, Any]:
+def load_csv_batch(path: str) -> Dict[str, np.ndarray]:
     """
-    Normalize TwelveData format
+    Load an OHLCV CSV (timestamp,open,high,low,close,volume[,bid,ask]) into columnar arrays
+    
+    Parsing is vectorized by pandas; timestamps become epoch milliseconds.
     """
-    timestamp_utc = data.get("datetime", datetime.utcnow().isoformat())
+    frame = pd.read_csv(path)
+    columns = set(frame.columns)
+    n = len(frame)
     
-    return {
-        "timestamp_utc": timestamp_utc,
-        "open": float(data.get("open", 0)),
-        "high": float(data.get("high", 0)),
-        "low": float(data.get("low", 0)),
-        "close": float(data.get("close", 0)),
-        "volume": int(data.get("volume", 0)),
-        "bid": data.get("bid"),
-        "ask": data.get("ask"),
-    }
+    timestamp_ms = pd.to_datetime(frame["timestamp"], utc=True).to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    batch = {"timestamp_ms": timestamp_ms}
+    for field in PRICE_FIELDS:
+        batch[field] = frame[field].to_numpy(dtype=np.float64)
+    batch["volume"] = frame["volume"].to_numpy(dtype=np.int64) if "volume" in columns else np.zeros(n, dtype=np.int64)
+    for field in ("bid", "ask"):
+        batch[field] = frame[field].to_numpy(dtype=np.float64) if field in columns else np.full(n, np.nan)
+    return batch
 
-def _normalize_goldapi(data: Dict[str, Any]) -> Dict[str, Any]:
+def batch_to_records(batch: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Convert a columnar batch back to standard bar dicts (ISO timestamps), e.g. for caches"""
+    records = []
+    bids = batch["bid"].tolist()
+    asks = batch["ask"].tolist()
+    for i, (ts, o, h, l, c, v) in enumerate(zip(
+            batch["timestamp_ms"].tolist(), batch["open"].tolist(), batch["high"].tolist(),
+            batch["low"].tolist(), batch["close"].tolist(), batch["volume"].tolist())):
+        records.append({
+            "timestamp_utc": datetime.fromtimestamp(ts / 1000, tz=pytz.UTC).isoformat(),
+            "open": o, "high": h, "low": l, "close": c, "volume": v,
+            "bid": None if bids[i] != bids[i] else bids[i],
+            "ask": None if asks[i] != asks[i] else asks[i],
+        })
+    return records
+
+def normalize_quote(raw_data: Dict[str, Any], source: str = "finnhub") -> Dict[str, Any]:
     """
-    Normalize GoldAPI.io format
-    Note: GoldAPI only provides current price, not OHLC
+    Normalize a spot quote (not a candle) to standard tick format
+
+    Standard format:
+    {
+        "timestamp": 1700055000.0,   # epoch seconds (receive time if provider has none)
+        "price": 2035.50,
+        "bid": 2035.48,
+        "ask": 2035.52,
+        "volume": 0
+    }
     """
-    timestamp_utc = data.get("timestamp", datetime.utcnow().isoformat())
-    price = float(data.get("price", 0))
-    
-    # For GoldAPI, use current price for all OHLC (not ideal for backtesting)
+    source = source.lower()
+
+    if source == "finnhub":
+        # Example: {"c": 2035.50, "h": ..., "l": ..., "o": ..., "pc": ..., "t": 1700055000}
+        # h/l/o are the session's values, not a bar, so only "c" is used
+        price = raw_data.get("c")
+        timestamp = raw_data.get("t")
+    elif source == "goldapi":
+        price = raw_data.get("price")
+        timestamp = raw_data.get("timestamp")
+    elif source == "twelvedata":
+        # /price endpoint: {"price": "2035.50"}
+        price = raw_data.get("price")
+        timestamp = None
+    elif source == "polygon":
+        # Last quote: {"bid": 2035.48, "ask": 2035.52, "timestamp": 1700055000000}
+        bid, ask = raw_data.get("bid"), raw_data.get("ask")
+        price = raw_data.get("price") or ((bid + ask) / 2 if bid and ask else None)
+        timestamp = raw_data.get("timestamp")
+        if timestamp:
+            timestamp = timestamp / 1000
+    else:
+        raise ValueError(f"Unknown data source: {source}")
+
+    if not isinstance(timestamp, (int, float)) or timestamp <= 0:
+        timestamp = datetime.utcnow().replace(tzinfo=pytz.UTC).timestamp()
+
+    bid = raw_data.get("bid")
+    ask = raw_data.get("ask")
+
     return {
-        "timestamp_utc": timestamp_utc,
-        "open": price,
-        "high": price,
-        "low": price,
-        "close": price,
-        "volume": 0,  # GoldAPI doesn't provide volume
-        "bid": price,
-        "ask": price,
+        "timestamp": float(timestamp),
+        "price": float(price) if price is not None else None,
+        "bid": float(bid) if bid is not None else None,
+        "ask": float(ask) if ask is not None else None,
+        "volume": int(raw_data.get("v") or raw_data.get("volume") or 0),
     }
 
 def format_signal_message(signal: Dict[str, Any]) -> str:
@@ -120,6 +262,8 @@ def format_signal_message(signal: Dict[str, Any]) -> str:
     Returns:
         Formatted message string
     """
+    symbol = signal.get("symbol", DEFAULT_SYMBOL)
+    digits = price_decimals(symbol)
     direction = signal.get("direction", "UNKNOWN")
     entry_price = signal.get("entry_price", 0)
     sl_price = signal.get("sl_price", 0)
@@ -130,16 +274,16 @@ def format_signal_message(signal: Dict[str, Any]) -> str:
     
     direction_emoji = "📈 BUY" if direction == "BUY" else "📉 SELL"
     
-    message = f"""{direction_emoji}
+    message = f"""{direction_emoji} {symbol}
 
 🎯 Signal ID: {signal_id}
 🕐 Time: {timestamp}
 ⭐ Confidence: {confidence:.1f}%
 
 📊 Price Levels:
-Entry: {entry_price:.2f}
-Stop Loss: {sl_price:.2f}
-Take Profit: {tp_price:.2f}
+Entry: {entry_price:.{digits}f}
+Stop Loss: {sl_price:.{digits}f}
+Take Profit: {tp_price:.{digits}f}
 
 🛡️ Risk/Reward: {signal.get('rr_ratio', 'N/A')}
 """
@@ -149,6 +293,8 @@ def format_trade_result(trade: Dict[str, Any]) -> str:
     """
     Format closed trade result for Telegram message
     """
+    symbol = trade.get("symbol", DEFAULT_SYMBOL)
+    digits = price_decimals(symbol)
     direction = trade.get("direction", "UNKNOWN")
     status = trade.get("status", "UNKNOWN")
     entry_price = trade.get("entry_price", 0)
@@ -159,12 +305,65 @@ def format_trade_result(trade: Dict[str, Any]) -> str:
     status_emoji = "✅" if "WIN" in status else "❌"
     pl_color = "+" if pl_usd >= 0 else ""
     
-    message = f"""{status_emoji} Trade Closed
+    message = f"""{status_emoji} Trade Closed: {symbol}
 
 Direction: {direction}
-Entry: {entry_price:.2f}
-Exit: {exit_price:.2f}
+Entry: {entry_price:.{digits}f}
+Exit: {exit_price:.{digits}f}
 Pips: {pl_color}{pips:.2f}
 P/L: ${pl_color}{pl_usd:.2f}
 """
     return message
+
+def format_trade_history(trades: List[Dict[str, Any]], page: int = 1) -> str:
+    """
+    Format one /riwayat page of trades (newest first)
+    
+    Args:
+        trades: Rows from data.trade_history.trade_page
+        page: Page number shown in the header
+    """
+    if not trades:
+        return "📜 No trades yet." if page == 1 else "📜 No older trades."
+    
+    status_emoji = {"OPEN": "⏳", "CLOSED_WIN": "✅", "CLOSED_LOSE": "❌", "CANCELLED": "🚫"}
+    lines = [f"📜 Trade History (page {page})", ""]
+    for trade in trades:
+        digits = price_decimals(trade["symbol"])
+        line = (f"{status_emoji.get(trade['status'], '•')} {trade['created_at']:%m-%d %H:%M} "
+                f"{trade['symbol']} {trade['direction']} @ {trade['entry_price']:.{digits}f}")
+        if trade["status"] != "OPEN" and trade["pips_gained"] is not None:
+            pl_usd = trade["virtual_pl_usd"] or 0
+            line += f" → {trade['pips_gained']:+.1f} pips (${pl_usd:+.2f})"
+        lines.append(line)
+    return "\n".join(lines)
+
+def format_performance(totals: Dict[str, Any], days: List, weeks: List,
+                       by_direction: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Format the /performa report from trade statistics summaries
+    
+    Args:
+        totals: All-time summary
+        days / weeks: (period key, summary) pairs, newest first
+        by_direction: Direction -> summary
+    """
+    def row(label: str, s: Dict[str, Any]) -> str:
+        return (f"{label}: {s['closed']} trades, {s['win_rate']:.0f}% win, "
+                f"{s['total_pips']:+.1f} pips, ${s['total_pl_usd']:+.2f}")
+    
+    lines = [
+        "📊 Performance Report",
+        "",
+        f"Trades: {totals['closed']} closed ({totals['wins']}W / {totals['losses']}L)",
+        f"Win rate: {totals['win_rate']:.1f}%",
+        f"P/L: ${totals['total_pl_usd']:+.2f} | Pips: {totals['total_pips']:+.1f}",
+        f"Profit factor: {totals['profit_factor']:.2f} | Avg R/R: {totals['avg_rr']:.2f}",
+    ]
+    if by_direction:
+        lines += ["", "🧭 By direction"] + [row(d, s) for d, s in sorted(by_direction.items())]
+    if days:
+        lines += ["", "📅 Daily"] + [row(day, s) for day, s in days]
+    if weeks:
+        lines += ["", "🗓️ Weekly"] + [row(week, s) for week, s in weeks]
+    return "\n".join(lines)
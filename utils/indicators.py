@@ -5,8 +5,13 @@ EMA, RSI, Stochastic, ATR, Volume calculations
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple
-from collections import deque
+from typing import List, Dict, Tuple, Optional
+from collections import deque, OrderedDict
+from config.settings import (
+    FIXED_POINT_PRICES, EMA_PERIODS_FAST, EMA_PERIODS_MED, EMA_PERIODS_SLOW,
+    RSI_PERIOD, STOCH_K_PERIOD, STOCH_SMOOTH_K, STOCH_D_PERIOD, ATR_PERIOD
+)
+from utils.price import to_ticks, ticks_to_pips, pip_size
 
 class IndicatorCalculator:
     """Calculate technical indicators for OHLCV data"""
@@ -233,13 +238,85 @@ class IndicatorCalculator:
             sma.append(np.mean(values[i - period + 1:i + 1]))
         return sma
     
-    def calculate_pips_to_level(self, current_price: float, target_price: float) -> float:
+    def snapshot(self, high_prices: List[float], low_prices: List[float],
+                 close_prices: List[float]) -> Dict[str, Optional[float]]:
+        """
+        Indicator values at the last bar, keyed like the MarketDataCache columns
+        
+        Uses the configured periods (ema_5/ema_10/ema_20 hold the fast/med/slow EMA).
+        Values not yet defined for the available history are None.
+        """
+        stoch_k, stoch_d = self.calculate_stochastic(high_prices, low_prices, close_prices,
+                                                     STOCH_K_PERIOD, STOCH_SMOOTH_K, STOCH_D_PERIOD)
+        values = {
+            "ema_5": self.calculate_ema(close_prices, EMA_PERIODS_FAST),
+            "ema_10": self.calculate_ema(close_prices, EMA_PERIODS_MED),
+            "ema_20": self.calculate_ema(close_prices, EMA_PERIODS_SLOW),
+            "rsi": self.calculate_rsi(close_prices, RSI_PERIOD),
+            "stoch_k": stoch_k,
+            "stoch_d": stoch_d,
+            "atr": self.calculate_atr(high_prices, low_prices, close_prices, ATR_PERIOD),
+        }
+        snapshot = {}
+        for name, series in values.items():
+            last = series[-1] if len(series) else np.nan
+            snapshot[name] = None if np.isnan(last) else float(last)
+        return snapshot
+    
+    def calculate_pips_to_level(self, current_price: float, target_price: float,
+                                symbol: str = "XAUUSD") -> float:
         """
         Calculate pips from current price to target
-        For XAUUSD: 1 pip = 0.01
+        For XAUUSD: 1 pip = 0.01 (other symbols: SYMBOL_PIP_SIZES)
         """
-        pips = (target_price - current_price) / 0.01
+        if FIXED_POINT_PRICES:
+            return ticks_to_pips(to_ticks(target_price, symbol) - to_ticks(current_price, symbol), symbol)
+        pips = (target_price - current_price) / pip_size(symbol)
         return round(pips, 2)
 
+class SharedIndicatorCache:
+    """
+    Memoizing front for IndicatorCalculator shared by several strategy engines
+
+    Series results are keyed by the identity of the input lists plus the
+    parameters, so engines evaluating the same bar snapshot (live and shadow
+    variants) compute each distinct indicator once. Inputs are held by the
+    cache, so an id cannot be reused while its entry lives. Results are shared:
+    callers must not mutate them.
+    """
+
+    CACHED = ("calculate_ema", "get_ema_alignment", "calculate_rsi", "calculate_stochastic",
+              "calculate_atr", "calculate_volume_sma")
+
+    def __init__(self, calc: Optional[IndicatorCalculator] = None, max_entries: int = 256):
+        self.calc = calc or IndicatorCalculator()
+        self.max_entries = max_entries
+        self._entries: "OrderedDict" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def __getattr__(self, name):
+        method = getattr(self.calc, name)
+        if name not in self.CACHED:
+            return method
+
+        def cached(*args, **kwargs):
+            key = (name,) + tuple(id(arg) if isinstance(arg, list) else arg for arg in args) \
+                + tuple(sorted(kwargs.items()))
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            result = method(*args, **kwargs)
+            self._entries[key] = (args, result)
+            self.stats["misses"] += 1
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return result
+        return cached
+
+    def get_stats(self):
+        return dict(self.stats, entries=len(self._entries))
+
 # Global calculator instance
 indicator_calc = IndicatorCalculator()
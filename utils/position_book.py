@@ -0,0 +1,129 @@
+"""
+Open-Position Book
+In-memory open trades with SL/TP levels in sorted arrays, so one price update
+finds every triggered position with a binary search
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Any, List, Optional, Tuple
+from config.settings import FIXED_POINT_PRICES
+from data.models import Trade, TradeStatus, TradeDirection, LIVE_VARIANT
+from utils.price import to_ticks
+
+# Sorts after every id, so (level, _MAX_ID) bounds all entries at level
+_MAX_ID = "\uffff"
+
+class Position:
+    """Open trade fields needed for exit checks (detached from any DB session)"""
+
+    __slots__ = ("id", "signal_id", "direction", "entry_price", "sl_price", "tp_price")
+
+    def __init__(self, id: str, signal_id: str, direction: TradeDirection,
+                 entry_price: float, sl_price: float, tp_price: float):
+        self.id = id
+        self.signal_id = signal_id
+        self.direction = direction
+        self.entry_price = entry_price
+        self.sl_price = sl_price
+        self.tp_price = tp_price
+
+    @classmethod
+    def from_trade(cls, trade: Trade) -> "Position":
+        return cls(trade.id, trade.signal_id, TradeDirection(trade.direction),
+                   trade.entry_price, trade.sl_price, trade.tp_price)
+
+class OpenPositionBook:
+    """
+    Open positions indexed by level
+
+    Four sorted lists of (level, id) keep the trigger side of each level:
+    BUY SL hit at price <= sl, BUY TP at price >= tp, SELL SL at price >= sl,
+    SELL TP at price <= tp. In FIXED_POINT_PRICES mode levels are integer ticks.
+    """
+
+    def __init__(self, fixed_point: bool = FIXED_POINT_PRICES, symbol: str = "XAUUSD",
+                 variant: str = LIVE_VARIANT):
+        self.fixed_point = fixed_point
+        self.symbol = symbol
+        self.variant = variant
+        self.positions: Dict[str, Position] = {}
+        self._buy_sl: List[Tuple[Any, str]] = []
+        self._buy_tp: List[Tuple[Any, str]] = []
+        self._sell_sl: List[Tuple[Any, str]] = []
+        self._sell_tp: List[Tuple[Any, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, position_id: str) -> bool:
+        return position_id in self.positions
+
+    def load(self, db) -> "OpenPositionBook":
+        """Load the symbol's open trades (of this variant) once at startup"""
+        self.clear()
+        for trade in db.query(Trade).filter(Trade.status == TradeStatus.OPEN, Trade.ticker == self.symbol,
+                                            Trade.variant == self.variant).all():
+            self.add(trade)
+        return self
+
+    def clear(self) -> None:
+        self.positions.clear()
+        for levels in (self._buy_sl, self._buy_tp, self._sell_sl, self._sell_tp):
+            levels.clear()
+
+    def add(self, trade) -> Position:
+        """Add an opened trade (Trade row or Position); it must have an id"""
+        position = trade if isinstance(trade, Position) else Position.from_trade(trade)
+        if position.id in self.positions:
+            self.remove(position.id)
+        self.positions[position.id] = position
+        sl_levels, tp_levels = self._levels(position.direction)
+        insort(sl_levels, (self._key(position.sl_price), position.id))
+        insort(tp_levels, (self._key(position.tp_price), position.id))
+        return position
+
+    def remove(self, position_id: str) -> Optional[Position]:
+        position = self.positions.pop(position_id, None)
+        if position is None:
+            return None
+        sl_levels, tp_levels = self._levels(position.direction)
+        for levels, price in ((sl_levels, position.sl_price), (tp_levels, position.tp_price)):
+            entry = (self._key(price), position.id)
+            index = bisect_left(levels, entry)
+            if index < len(levels) and levels[index] == entry:
+                del levels[index]
+        return position
+
+    def triggered(self, price: float) -> List[Tuple[Position, TradeStatus, float]]:
+        """
+        Positions whose SL or TP is hit at price (SL wins if both are)
+
+        Returns:
+            List of (position, CLOSED_LOSE/CLOSED_WIN, exit_price)
+        """
+        key = self._key(price)
+        hits: Dict[str, Tuple[Position, TradeStatus, float]] = {}
+
+        # Only the ends of each list can be hit
+        for _, position_id in self._buy_tp[:bisect_right(self._buy_tp, (key, _MAX_ID))]:
+            position = self.positions[position_id]
+            hits[position_id] = (position, TradeStatus.CLOSED_WIN, position.tp_price)
+        for _, position_id in self._sell_tp[bisect_left(self._sell_tp, (key, "")):]:
+            position = self.positions[position_id]
+            hits[position_id] = (position, TradeStatus.CLOSED_WIN, position.tp_price)
+        for _, position_id in self._buy_sl[bisect_left(self._buy_sl, (key, "")):]:
+            position = self.positions[position_id]
+            hits[position_id] = (position, TradeStatus.CLOSED_LOSE, position.sl_price)
+        for _, position_id in self._sell_sl[:bisect_right(self._sell_sl, (key, _MAX_ID))]:
+            position = self.positions[position_id]
+            hits[position_id] = (position, TradeStatus.CLOSED_LOSE, position.sl_price)
+
+        return list(hits.values())
+
+    def _levels(self, direction: TradeDirection) -> Tuple[List, List]:
+        if direction == TradeDirection.BUY:
+            return self._buy_sl, self._buy_tp
+        return self._sell_sl, self._sell_tp
+
+    def _key(self, price: float):
+        return to_ticks(price, self.symbol) if self.fixed_point else price
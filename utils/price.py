@@ -0,0 +1,62 @@
+"""
+Fixed-Point Price Utilities
+Integer tick representation per symbol (XAUUSD: 1 tick = 0.01)
+"""
+
+from functools import lru_cache
+from config.settings import SYMBOL_TICK_SIZES, SYMBOL_PIP_SIZES, SYMBOL_CONTRACT_SIZES, PIP_SIZE
+
+DEFAULT_SYMBOL = "XAUUSD"
+
+def tick_size(symbol: str = DEFAULT_SYMBOL) -> float:
+    """Tick size for symbol (falls back to 0.01)"""
+    return SYMBOL_TICK_SIZES.get(symbol, 0.01)
+
+def pip_size(symbol: str = DEFAULT_SYMBOL) -> float:
+    """Pip size for symbol (falls back to PIP_SIZE)"""
+    return SYMBOL_PIP_SIZES.get(symbol, PIP_SIZE)
+
+def pip_value(symbol: str = DEFAULT_SYMBOL, price: float = 0.0) -> float:
+    """
+    USD value of one pip for one standard lot
+
+    Args:
+        symbol: Trading symbol (contract size falls back to XAUUSD's 100)
+        price: Exchange rate used to convert USD-based pairs (USDJPY etc.) from the quote currency
+
+    Example: XAUUSD -> 1.0, EURUSD -> 10.0, USDJPY @ 150 -> 6.67
+    """
+    value = pip_size(symbol) * SYMBOL_CONTRACT_SIZES.get(symbol, 100)
+    if symbol.startswith("USD") and price > 0:
+        value /= price
+    return value
+
+def to_ticks(price: float, symbol: str = DEFAULT_SYMBOL) -> int:
+    """
+    Convert a price to integer ticks, rounding half away from zero
+
+    Example: 2035.155 -> 203516 for XAUUSD
+    """
+    scaled = price / tick_size(symbol)
+    return int(scaled + 0.5) if scaled >= 0 else -int(-scaled + 0.5)
+
+@lru_cache(maxsize=None)
+def _decimals(size: float) -> int:
+    return len(f"{size:.10f}".rstrip("0").split(".")[1])
+
+def price_decimals(symbol: str = DEFAULT_SYMBOL) -> int:
+    """Decimal places of the symbol tick size (XAUUSD: 2)"""
+    return _decimals(tick_size(symbol))
+
+def from_ticks(ticks: int, symbol: str = DEFAULT_SYMBOL) -> float:
+    """Convert integer ticks back to the nearest float price"""
+    size = tick_size(symbol)
+    return round(ticks * size, _decimals(size))
+
+def snap_price(price: float, symbol: str = DEFAULT_SYMBOL) -> float:
+    """Round a price onto the symbol tick grid"""
+    return from_ticks(to_ticks(price, symbol), symbol)
+
+def ticks_to_pips(ticks: int, symbol: str = DEFAULT_SYMBOL) -> float:
+    """Convert a tick distance to pips"""
+    return round(ticks * tick_size(symbol) / pip_size(symbol), 2)
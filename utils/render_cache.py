@@ -0,0 +1,68 @@
+"""
+Rendered Response Cache
+Short-lived cache of rendered command replies shared by every user, with
+concurrent requests for the same key served by one render
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Awaitable, Hashable
+
+class RenderCache:
+    """
+    TTL cache of rendered replies (event-loop only, not thread-safe)
+
+    A burst of identical commands costs one render: the first caller renders,
+    the others await the same future, and later callers get the cached text
+    until it expires.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl: Seconds a rendered reply stays valid
+            max_entries: Entries kept (least recently used evicted)
+            clock: Time source, injectable for tests
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires, future)
+        self.stats = {"hits": 0, "renders": 0}
+
+    async def get(self, key: Hashable, render: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for key, rendering it with render() when missing or expired"""
+        entry = self._entries.get(key)
+        if entry is not None and (not entry[1].done() or entry[0] > self.clock()):
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return await asyncio.shield(entry[1])
+
+        future = asyncio.get_running_loop().create_future()
+        self._entries[key] = (self.clock() + self.ttl, future)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.stats["renders"] += 1
+        try:
+            value = await render()
+        except BaseException as e:
+            # Failures are not cached: waiting callers see the error, the next one retries
+            if self._entries.get(key, (None, None))[1] is future:
+                self._entries.pop(key)
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                future.exception()  # mark retrieved when nobody else was waiting
+            else:
+                future.cancel()  # the rendering caller was cancelled: release the waiters too
+            raise
+        self._entries[key] = (self.clock() + self.ttl, future)
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats, entries=len(self._entries))
@@ -0,0 +1,175 @@
+"""
+Tick-to-Bar Aggregation
+Build M1/M5 OHLCV bars and spread statistics locally from quote ticks
+"""
+
+import time
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+from datetime import datetime
+from collections import deque
+import pytz
+
+# Bar length per supported timeframe
+TIMEFRAME_SECONDS = {"M1": 60, "M5": 300}
+
+class _BarBuilder:
+    """Running OHLCV state for the bar currently being built (O(1) per tick)"""
+
+    __slots__ = ("start", "open", "high", "low", "close", "volume", "bid", "ask",
+                 "tick_count", "spread_count", "spread_sum", "spread_min", "spread_max")
+
+    def __init__(self, start: int, price: float):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = 0
+        self.bid = None
+        self.ask = None
+        self.tick_count = 0
+        self.spread_count = 0
+        self.spread_sum = 0.0
+        self.spread_min = None
+        self.spread_max = None
+
+    def update(self, price: float, bid: Optional[float], ask: Optional[float], volume: int) -> None:
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += volume
+        self.tick_count += 1
+
+        if bid is not None:
+            self.bid = bid
+        if ask is not None:
+            self.ask = ask
+        if bid is not None and ask is not None:
+            spread = ask - bid
+            self.spread_count += 1
+            self.spread_sum += spread
+            if self.spread_min is None or spread < self.spread_min:
+                self.spread_min = spread
+            if self.spread_max is None or spread > self.spread_max:
+                self.spread_max = spread
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Export in the standard normalized bar format (see utils.data_mapper)"""
+        return {
+            "timestamp_utc": datetime.fromtimestamp(self.start, tz=pytz.UTC).isoformat(),
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+            "bid": self.bid,
+            "ask": self.ask,
+            "tick_count": self.tick_count,
+            "spread_min": self.spread_min,
+            "spread_max": self.spread_max,
+            "spread_avg": self.spread_sum / self.spread_count if self.spread_count else None,
+        }
+
+class TickAggregator:
+    """
+    Aggregate quote ticks from any source into OHLCV bars
+
+    Each tick updates one running bar per timeframe in constant time.
+    Completed bars are kept in fixed-size deques, so memory is bounded
+    regardless of tick rate.
+    """
+
+    def __init__(self, timeframes: Iterable[str] = ("M1", "M5"), max_bars: int = 500):
+        """
+        Args:
+            timeframes: Timeframes to build (must be keys of TIMEFRAME_SECONDS)
+            max_bars: Maximum number of completed bars kept per timeframe
+        """
+        self.timeframes = {}
+        for timeframe in timeframes:
+            if timeframe not in TIMEFRAME_SECONDS:
+                raise ValueError(f"Unsupported timeframe: {timeframe}")
+            self.timeframes[timeframe] = TIMEFRAME_SECONDS[timeframe]
+
+        self.completed = {tf: deque(maxlen=max_bars) for tf in self.timeframes}
+        self.current: Dict[str, Optional[_BarBuilder]] = {tf: None for tf in self.timeframes}
+        self.last_tick_time = None
+        self.late_ticks = 0  # Ticks older than the running bar (dropped)
+
+    def add_tick(self, price: float, bid: Optional[float] = None, ask: Optional[float] = None,
+                 volume: int = 0, timestamp: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Add a single tick
+
+        Args:
+            price: Last/mid price
+            bid: Bid price (optional)
+            ask: Ask price (optional)
+            volume: Traded volume of this tick (0 for pure quotes)
+            timestamp: Epoch seconds; stamped with receive time if missing
+
+        Returns:
+            List of (timeframe, bar) tuples for bars completed by this tick
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        if price is None:
+            return []
+        price = float(price)
+
+        # Drop ticks that belong to an already completed bar
+        for timeframe, seconds in self.timeframes.items():
+            builder = self.current[timeframe]
+            if builder is not None and timestamp < builder.start:
+                self.late_ticks += 1
+                return []
+
+        closed = []
+        for timeframe, seconds in self.timeframes.items():
+            bar_start = int(timestamp) - int(timestamp) % seconds
+            builder = self.current[timeframe]
+
+            if builder is None or bar_start > builder.start:
+                if builder is not None:
+                    bar = builder.to_dict()
+                    self.completed[timeframe].append(bar)
+                    closed.append((timeframe, bar))
+                builder = _BarBuilder(bar_start, price)
+                self.current[timeframe] = builder
+
+            builder.update(price, bid, ask, volume)
+
+        self.last_tick_time = timestamp
+        return closed
+
+    def add_quote(self, quote: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Add a normalized quote (see utils.data_mapper.normalize_quote)
+
+        Returns:
+            List of (timeframe, bar) tuples for bars completed by this quote
+        """
+        return self.add_tick(
+            quote.get("price"),
+            bid=quote.get("bid"),
+            ask=quote.get("ask"),
+            volume=quote.get("volume") or 0,
+            timestamp=quote.get("timestamp"),
+        )
+
+    def get_bars(self, timeframe: str = "M1", include_current: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get completed bars (oldest first)
+
+        Args:
+            timeframe: M1 or M5
+            include_current: Append the bar still being built
+        """
+        bars = list(self.completed[timeframe])
+        if include_current and self.current[timeframe] is not None:
+            bars.append(self.current[timeframe].to_dict())
+        return bars
+
+    def get_current_bar(self, timeframe: str = "M1") -> Optional[Dict[str, Any]]:
+        """Get the bar currently being built, or None before the first tick"""
+        builder = self.current[timeframe]
+        return builder.to_dict() if builder is not None else None